@@ -0,0 +1,3 @@
+"""
+Benchmarks de la API de Validación de Textos
+"""
@@ -0,0 +1,192 @@
+"""
+Benchmark de los métodos de análisis de sentimientos sobre un corpus etiquetado en español
+
+Mide por método la latencia por texto (p50/p95/p99), el rendimiento con varios
+tamaños de lote, la memoria máxima (RSS) y el acuerdo con las etiquetas, y
+escribe el informe JSON que sirve /compare (METHOD_BENCHMARK_REPORT).
+Cada método se mide en un proceso nuevo para que la memoria de un modelo no
+cuente en los demás.
+
+Uso:
+    python -m benchmarks.bench_methods
+    python -m benchmarks.bench_methods --methods vader textblob --corpus mis_textos.jsonl
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config import SENTIMENT_MODELS, METHOD_BENCHMARK_REPORT
+
+# Comentarios del notebook y de examples.md con su polaridad esperada
+CORPUS: List[Tuple[str, str]] = [
+    ("Este producto es increíble, me encanta.", "positive"),
+    ("Me parece un producto promedio, nada fuera de lo común.", "neutral"),
+    ("No me gustó para nada, muy malo.", "negative"),
+    ("Excelente calidad, totalmente recomendado.", "positive"),
+    ("Horrible experiencia, nunca volveré a comprar.", "negative"),
+    ("La entrega fue rápida, pero el servicio al cliente no fue excelente.", "neutral"),
+    ("Muy buen servicio, pero el producto podría mejorar.", "neutral"),
+    ("Es lo peor que he comprado, muy decepcionado.", "negative"),
+    ("¡Me fascina! Sin duda volveré a comprar.", "positive"),
+    ("No cumple con las expectativas, esperaba mucho más.", "negative"),
+    ("Es un buen producto, aunque un poco caro.", "neutral"),
+    ("Muy satisfecho con la compra, todo perfecto.", "positive"),
+    ("El producto está bien, pero no es lo que esperaba.", "neutral"),
+    ("Me encanta este producto, es increíble!", "positive"),
+    ("Este producto es terrible, no sirve para nada.", "negative"),
+    ("¡Me encanta este proyecto! Es muy interesante y útil para la comunidad.", "positive"),
+    ("Este producto es terrible, no funciona nada bien.", "negative"),
+    ("Estoy muy decepcionado con los resultados del proyecto", "negative"),
+    ("Este código es una mierda, el desarrollador es un gilipollas", "negative"),
+    ("Excelente trabajo equipo!", "positive"),
+    ("Me siento frustrado con los resultados", "negative"),
+    ("Nuestro nuevo producto revoluciona el mercado con tecnología de vanguardia", "positive"),
+    ("¡Increíble día! #feliz #contento", "positive"),
+    ("Necesito ayuda con mi proyecto, ¿alguien puede ayudarme?", "neutral"),
+    ("El pedido llegó el martes por la tarde.", "neutral"),
+]
+
+LABEL_CLASSES = {
+    "Muy Negativo": "negative",
+    "Negativo": "negative",
+    "Neutral": "neutral",
+    "Positivo": "positive",
+    "Muy Positivo": "positive",
+}
+
+def load_corpus(paths: List[str]) -> List[Tuple[str, str]]:
+    """Corpus base más las líneas JSONL {"text": ..., "label": "negative|neutral|positive"} de los archivos indicados"""
+    corpus = list(CORPUS)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    corpus.append((item["text"], item["label"]))
+    return corpus
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def peak_rss_mb() -> Optional[float]:
+    """Memoria residente máxima del proceso en MB (None si el sistema no la expone)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la expresa en KB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def benchmark_method(method: str, corpus: List[Tuple[str, str]], batch_sizes: List[int], repeats: int,
+                     model_overrides: Dict[str, str]) -> Dict[str, Any]:
+    """Mide un método en el proceso actual (se ejecuta en un proceso nuevo por método)"""
+    import config
+    config.SENTIMENT_MODELS.update(model_overrides)
+    import main
+
+    texts = [text for text, _ in corpus]
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    for name in main.models_for_method(method):
+        main.model_registry.get(name)
+    load_time = time.perf_counter() - start
+    # Calentamiento
+    main.analyze_emotion_batch(texts[:2], method)
+
+    # Latencia de un texto por petición, por el mismo camino que /validate y los micro-lotes
+    latencies = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            main.analyze_emotion_batch([text], method)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    throughput = {}
+    for batch_size in batch_sizes:
+        workload = texts * max(1, (batch_size * 4) // len(texts) + 1)
+        start = time.perf_counter()
+        for offset in range(0, len(workload), batch_size):
+            main.analyze_emotion_batch(workload[offset:offset + batch_size], method)
+        throughput[str(batch_size)] = len(workload) / (time.perf_counter() - start)
+
+    results = main.analyze_emotion_batch(texts, method)
+    predictions = [LABEL_CLASSES.get(result["label"], "neutral") for result in results]
+    gold = [label for _, label in corpus]
+    agreement_by_label = {}
+    for label in sorted(set(gold)):
+        pairs = [(pred, expected) for pred, expected in zip(predictions, gold) if expected == label]
+        agreement_by_label[label] = sum(pred == expected for pred, expected in pairs) / len(pairs)
+
+    peak = peak_rss_mb()
+    return {
+        "load_time_seconds": load_time,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "mean": sum(latencies) / len(latencies),
+        },
+        "throughput_texts_per_second": throughput,
+        "peak_rss_mb": peak,
+        "model_rss_mb": peak - rss_before if peak is not None and rss_before is not None else None,
+        "agreement": sum(pred == expected for pred, expected in zip(predictions, gold)) / len(gold),
+        "agreement_by_label": agreement_by_label,
+    }
+
+def recommend(methods: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """Método recomendado para cada tipo de tráfico según las mediciones"""
+    best_batch = max(
+        methods.items(), key=lambda item: max(item[1]["throughput_texts_per_second"].values())
+    )[0]
+    return {
+        "realtime": min(methods.items(), key=lambda item: item[1]["latency_ms"]["p95"])[0],
+        "bulk": best_batch,
+        "accuracy": max(methods.items(), key=lambda item: item[1]["agreement"])[0],
+    }
+
+def run_benchmark(methods: List[str], corpus: List[Tuple[str, str]], batch_sizes: List[int], repeats: int,
+                  model_overrides: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for method in methods:
+        print(f"Midiendo '{method}'...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[method] = pool.submit(
+                benchmark_method, method, corpus, batch_sizes, repeats, model_overrides or {}
+            ).result()
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "processor": platform.processor()},
+        "corpus_size": len(corpus),
+        "batch_sizes": batch_sizes,
+        "repeats": repeats,
+        "methods": results,
+        "recommendations": recommend(results),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los métodos de análisis de sentimientos")
+    parser.add_argument("--methods", nargs="+", default=list(SENTIMENT_MODELS), choices=list(SENTIMENT_MODELS))
+    parser.add_argument("--corpus", nargs="*", default=[], help="Archivos JSONL con textos etiquetados adicionales")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--repeats", type=int, default=5, help="Pasadas sobre el corpus para medir la latencia")
+    parser.add_argument("--transformers-model", help="Modelo de transformers alternativo a medir")
+    parser.add_argument("--output", default=METHOD_BENCHMARK_REPORT, help="Archivo JSON del informe")
+    args = parser.parse_args()
+
+    overrides = {"transformers": args.transformers_model} if args.transformers_model else {}
+    report = run_benchmark(args.methods, load_corpus(args.corpus), args.batch_sizes, args.repeats, overrides)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    with open(args.output, "w", encoding="utf-8") as outfile:
+        outfile.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
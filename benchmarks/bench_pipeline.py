@@ -0,0 +1,185 @@
+"""
+Benchmark en proceso de cada etapa de /validate y de la petición completa
+
+Mide por método y longitud de texto el coste de las etapas en Python puro
+(validate_input, preprocesamiento, detect_profanity, generate_suggestions,
+correct_text, calculate_confidence, clave del caché y serialización), del
+análisis de emoción y de la petición completa a través de la app FastAPI con
+un cliente ASGI en proceso (sin red ni servidor). Por defecto los modelos de
+sentimiento se sustituyen por los de benchmarks/stubs.py, de modo que no se
+descarga BERT y el coste del framework y del posprocesamiento se separa del
+coste del modelo.
+
+Uso:
+    python -m benchmarks.bench_pipeline --output pipeline_bench.json
+    python -m benchmarks.bench_pipeline --methods vader transformers --lengths 40 280 1000
+    python -m benchmarks.bench_pipeline --real-models --methods textblob
+"""
+
+from typing import Any, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+from config import SENTIMENT_MODELS, MAX_TEXT_LENGTH
+from benchmarks.bench_methods import CORPUS
+from benchmarks.stubs import install_stub_models
+
+TEXT_LENGTHS = [40, 280, MAX_TEXT_LENGTH]
+
+# Etapas de posprocesamiento (todo lo que no es el modelo ni el detector de groserías)
+POST_PROCESSING_STAGES = ["validate_input", "cache_key", "generate_suggestions", "correct_text", "calculate_confidence"]
+
+def make_text(length: int) -> str:
+    """Texto de como máximo length caracteres con palabras de las frases del corpus (algunas con groserías)"""
+    words = " ".join(text for text, _ in CORPUS).split()
+    text = ""
+    for index in range(length):
+        word = words[index % len(words)]
+        if len(text) + len(word) + 1 > length:
+            break
+        text = f"{text} {word}" if text else word
+    return text
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Tiempos por llamada en microsegundos"""
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "mean_us": statistics.fmean(samples),
+    }
+
+def time_call(function: Callable[[], Any], repeats: int, number: int) -> Dict[str, float]:
+    """Tiempo por llamada de function: repeats rondas de number llamadas"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return summarize(samples)
+
+async def time_request(client: Any, body: Dict[str, Any], repeats: int, number: int) -> Dict[str, float]:
+    """Tiempo por petición a /validate a través del cliente ASGI"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            response = await client.post("/validate", json=body)
+            response.raise_for_status()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return summarize(samples)
+
+def benchmark_stages(main: Any, text: str, method: str, repeats: int, number: int) -> Dict[str, Dict[str, float]]:
+    """Cada etapa por separado, con las entradas que recibe dentro de /validate"""
+    from preprocessing import preprocess
+    from responses import dumps
+    from utils import validate_input, generate_suggestions, correct_text, calculate_confidence
+
+    emotion = main.analyze_emotion(text, method)
+    profanity = main.detect_profanity(text)
+    response = {"original_text": text, "emotion_score": emotion["score"], "suggestions": [], "corrected_text": text}
+    stages = {
+        "validate_input": lambda: validate_input(text),
+        # Sin el caché LRU: el coste de la primera vez que se ve el texto
+        "preprocess": lambda: preprocess.__wrapped__(text),
+        "cache_key": lambda: main.validation_cache_key(text, method),
+        "emotion": lambda: main.analyze_emotion(text, method),
+        "detect_profanity": lambda: main.detect_profanity(text),
+        "generate_suggestions": lambda: generate_suggestions(text, emotion["score"], profanity["profanity_count"], method),
+        "correct_text": lambda: correct_text(text, profanity["profanity_words"], profanity["profanity_matches"]),
+        "calculate_confidence": lambda: calculate_confidence(emotion["confidence"], profanity["profanity_count"], method),
+        "serialize_response": lambda: dumps(response),
+    }
+    return {name: time_call(function, repeats, number) for name, function in stages.items()}
+
+async def benchmark_requests(main: Any, text: str, method: str, repeats: int, number: int) -> Dict[str, Dict[str, float]]:
+    """Petición completa sin caché (análisis real) y con acierto en el caché"""
+    import httpx
+    body = {"text": text, "sentiment_method": method}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        cache_enabled, near_duplicate_enabled = main.RESULT_CACHE_ENABLED, main.NEAR_DUPLICATE_ENABLED
+        try:
+            # Sin caché ni índice de casi duplicados: cada petición pasa por el modelo
+            main.RESULT_CACHE_ENABLED = main.NEAR_DUPLICATE_ENABLED = False
+            await client.post("/validate", json=body)
+            miss = await time_request(client, body, repeats, number)
+            main.RESULT_CACHE_ENABLED, main.NEAR_DUPLICATE_ENABLED = True, near_duplicate_enabled
+            await client.post("/validate", json=body)
+            hit = await time_request(client, body, repeats, number)
+        finally:
+            main.RESULT_CACHE_ENABLED, main.NEAR_DUPLICATE_ENABLED = cache_enabled, near_duplicate_enabled
+    return {"validate": miss, "validate_cache_hit": hit}
+
+def breakdown(stages: Dict[str, Dict[str, float]], requests: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Reparto de la mediana de la petición completa entre modelo, groserías, posprocesamiento y framework"""
+    model = stages["emotion"]["median_us"]
+    profanity = stages["detect_profanity"]["median_us"]
+    post_processing = sum(stages[name]["median_us"] for name in POST_PROCESSING_STAGES)
+    total = requests["validate"]["median_us"]
+    return {
+        "model_us": model,
+        "profanity_us": profanity,
+        "post_processing_us": post_processing,
+        # Enrutado, validación de pydantic, serialización, paso por el pool de inferencia y micro-lotes
+        "framework_us": total - model - profanity - post_processing,
+        "total_us": total,
+    }
+
+def run_benchmark(methods: List[str], lengths: List[int], repeats: int, number: int,
+                  stub_models: bool = True, stub_latency_ms: float = 0.0) -> Dict[str, Any]:
+    import main
+    if stub_models:
+        install_stub_models(main.model_registry, stub_latency_ms)
+
+    results: Dict[str, Any] = {}
+    for method in methods:
+        for name in main.models_for_method(method) + ["profanity", "profanity_fuzzy"]:
+            main.model_registry.get(name)
+        results[method] = {}
+        for length in lengths:
+            text = make_text(length)
+            print(f"Midiendo '{method}' con {len(text)} caracteres...")
+            stages = benchmark_stages(main, text, method, repeats, number)
+            requests = asyncio.run(benchmark_requests(main, text, method, repeats, number))
+            results[method][str(length)] = {
+                "text_length": len(text),
+                "stages": stages,
+                "requests": requests,
+                "breakdown": breakdown(stages, requests),
+            }
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "processor": platform.processor()},
+        "stub_models": stub_models,
+        "stub_latency_ms": stub_latency_ms if stub_models else None,
+        "repeats": repeats,
+        "number": number,
+        "methods": results,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark en proceso de las etapas de /validate")
+    parser.add_argument("--methods", nargs="+", default=list(SENTIMENT_MODELS), choices=list(SENTIMENT_MODELS))
+    parser.add_argument("--lengths", nargs="+", type=int, default=TEXT_LENGTHS, help="Longitudes de texto en caracteres")
+    parser.add_argument("--repeats", type=int, default=5, help="Rondas por medición (se reporta la mediana)")
+    parser.add_argument("--number", type=int, default=200, help="Llamadas por ronda")
+    parser.add_argument("--real-models", action="store_true", help="Usar los modelos reales en lugar de los sustitutos")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Latencia simulada por mini-lote de transformers")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.methods, args.lengths, args.repeats, args.number, not args.real_models, args.stub_latency_ms)
+    for method, by_length in report["methods"].items():
+        for length, result in by_length.items():
+            parts = ", ".join(f"{name} {value:.0f}" for name, value in result["breakdown"].items())
+            print(f"{method:<13} {result['text_length']:>5} caracteres: {parts} (µs)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            json.dump(report, outfile, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
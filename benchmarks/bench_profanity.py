@@ -0,0 +1,144 @@
+"""
+Benchmark de detección de groserías: cobertura de variantes ofuscadas, precisión
+sobre textos limpios y tokens por segundo
+
+Uso:
+    python -m benchmarks.bench_profanity [--output resultados.json] [--skip-spanlp]
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import json
+import random
+import re
+import time
+from config import PROFANITY_COUNTRIES, PROFANITY_FUZZY_THRESHOLD, PROFANITY_FUZZY_MIN_LENGTH
+from lexicon import current_lexicon
+from profanity import ProfanityMatcher, FuzzyProfanityIndex, load_spanlp_words, merge_matches
+
+TEMPLATES = [
+    "Eres un {} y todos lo saben",
+    "Qué {} tan grande lo de hoy",
+    "No seas {}, por favor",
+    "Ese tipo es un {}!",
+]
+
+CLEAN_TEXTS = [
+    "Este producto es increíble, me encanta.",
+    "Me parece un producto promedio, nada fuera de lo común.",
+    "No me gustó para nada, muy malo.",
+    "Excelente calidad, totalmente recomendado.",
+    "Horrible experiencia, nunca volveré a comprar.",
+    "La película fue ridícula pero la pera estaba rica.",
+    "Necesito ayuda con mi proyecto, ¿alguien puede ayudarme?",
+    "El cono de helado se cayó en la calle.",
+    # Flexiones y palabras cercanas a entradas del léxico
+    "Qué situación tan ridícula, nos reímos mucho.",
+    "La batería se cargará en una hora.",
+    "Desde el palomar se ve toda la plaza.",
+    "Tengo pendientes dos informes y una disputa con el banco.",
+    "La computadora nueva funciona perfectamente.",
+    "El pollo con papas estaba delicioso.",
+    "Mi mamá preparó una mamadera para el bebé.",
+    "Compré una gorra y un pañuelo en el mercado.",
+]
+
+LEET = {"a": "4", "e": "3", "i": "1", "o": "0", "s": "$"}
+
+def obfuscations(word: str, rng: random.Random) -> Dict[str, str]:
+    """Variantes con las que se intenta evadir el filtro"""
+    position = rng.randrange(len(word))
+    return {
+        "plain": word,
+        "upper": word.upper(),
+        "leet": "".join(LEET.get(char, char) for char in word),
+        "stretched": word[:position] + word[position] * 4 + word[position + 1:],
+        "dotted": ".".join(word),
+        "spaced": " ".join(word),
+        "plural": word + "s",
+    }
+
+def build_corpus(words: List[str], seed: int = 13) -> List[Tuple[str, str, str]]:
+    """Genera (texto, variante, palabra) con una grosería ofuscada en cada texto"""
+    rng = random.Random(seed)
+    corpus = []
+    for word in words:
+        for variant, obfuscated in obfuscations(word, rng).items():
+            corpus.append((rng.choice(TEMPLATES).format(obfuscated), variant, word))
+    return corpus
+
+def run_detector(detect: Callable[[str], bool], corpus: List[Tuple[str, str, str]]) -> Dict[str, Any]:
+    errors = 0
+
+    def safe_detect(text: str) -> bool:
+        # Un fallo del detector cuenta como grosería no detectada
+        nonlocal errors
+        try:
+            return bool(detect(text))
+        except Exception:
+            errors += 1
+            return False
+
+    by_variant: Dict[str, List[int]] = {}
+    tokens = 0
+    start = time.perf_counter()
+    for text, variant, _ in corpus:
+        hits = by_variant.setdefault(variant, [0, 0])
+        hits[0] += int(safe_detect(text))
+        hits[1] += 1
+        tokens += len(re.findall(r"\S+", text))
+    false_positives = sum(int(safe_detect(text)) for text in CLEAN_TEXTS)
+    tokens += sum(len(text.split()) for text in CLEAN_TEXTS)
+    elapsed = time.perf_counter() - start
+    true_positives = sum(hits[0] for hits in by_variant.values())
+    flagged = true_positives + false_positives
+    return {
+        "errors": errors,
+        "recall": true_positives / len(corpus),
+        "recall_by_variant": {variant: hits[0] / hits[1] for variant, hits in by_variant.items()},
+        # Textos marcados que de verdad tenían una grosería
+        "precision": true_positives / flagged if flagged else 0.0,
+        "false_positives": false_positives,
+        "false_positive_rate": false_positives / len(CLEAN_TEXTS),
+        "clean_texts": len(CLEAN_TEXTS),
+        "tokens_per_second": tokens / elapsed if elapsed else 0.0,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de detección de groserías")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--skip-spanlp", action="store_true", help="Omitir la línea base de spanlp (lenta)")
+    args = parser.parse_args()
+
+    replacements = current_lexicon().replacements
+    lexicon = load_spanlp_words(PROFANITY_COUNTRIES) + list(replacements)
+    matcher = ProfanityMatcher(lexicon)
+    fuzzy_index = FuzzyProfanityIndex(lexicon, threshold=PROFANITY_FUZZY_THRESHOLD, min_length=PROFANITY_FUZZY_MIN_LENGTH)
+
+    targets = sorted(word for word in replacements if " " not in word)
+    corpus = build_corpus(targets)
+
+    detectors = {
+        "exact": lambda text: bool(matcher.find(text)),
+        "exact+fuzzy": lambda text: bool(merge_matches(matcher.find(text), fuzzy_index.find(text))),
+    }
+    if not args.skip_spanlp:
+        # Comparación palabra a palabra contra todo el léxico, como hacía la versión basada en spanlp
+        from spanlp.palabrota import Palabrota
+        from spanlp.domain.strategies import JaccardIndex
+        palabrota = Palabrota(distance_metric=JaccardIndex(threshold=0.9, normalize=False, n_gram=1))
+        detectors["spanlp_jaccard"] = palabrota.contains_palabrota
+
+    results = {
+        "corpus_size": len(corpus),
+        "lexicon_size": len(matcher.words),
+        "detectors": {name: run_detector(detect, corpus) for name, detect in detectors.items()},
+    }
+    report = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            outfile.write(report)
+    print(report)
+
+if __name__ == "__main__":
+    main()
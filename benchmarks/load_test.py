@@ -0,0 +1,362 @@
+"""
+Prueba de carga concurrente contra una instancia local de la API, con comparación contra una línea base
+
+Envía una mezcla de peticiones (/validate por método, /validate/batch,
+/validate/stream y los endpoints informativos) con textos en español de
+distinta longitud, con y sin groserías. Dos modos:
+- concurrencia fija (--concurrency): N clientes que envían una petición tras otra;
+- tasa de llegada (--rate): llegadas de Poisson a N peticiones/s, con la latencia
+  medida desde el instante previsto de cada llegada (incluye la espera en cola).
+
+Registra por endpoint y método la latencia p50/p95/p99, el rendimiento y la tasa
+de errores. Con --baseline compara contra un informe guardado y termina con
+código 1 si algo empeoró más de la tolerancia.
+
+Uso:
+    python -m benchmarks.load_test --start-server --stub-models --duration 30 --concurrency 32
+    python -m benchmarks.load_test --url http://localhost:8000 --rate 50 --methods vader textblob
+    python -m benchmarks.load_test --start-server --stub-models --output load_test_baseline.json
+    python -m benchmarks.load_test --start-server --stub-models --baseline load_test_baseline.json
+"""
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import zlib
+from config import SENTIMENT_MODELS, AUTO_METHOD, MAX_TEXT_LENGTH
+from benchmarks.bench_methods import CORPUS, percentile
+from benchmarks.bench_profanity import TEMPLATES, LEET
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_BASELINE = "load_test_baseline.json"
+DEFAULT_MIX = {"validate": 80, "batch": 10, "stream": 5, "info": 5}
+INFO_ENDPOINTS = ["/health", "/methods", "/compare"]
+BATCH_SIZE = 10
+STREAM_LINES = 20
+
+PROFANITY_WORDS = ["pendejo", "mierda", "gilipollas", "cabrón", "pinche", "güey"]
+
+def build_texts(seed: int = 7) -> List[str]:
+    """Mezcla de textos: comentarios cortos, con groserías (también ofuscadas) y largos"""
+    rng = random.Random(seed)
+    short = [text for text, _ in CORPUS]
+    profane = []
+    for word in PROFANITY_WORDS:
+        profane.append(rng.choice(TEMPLATES).format(word))
+        profane.append(rng.choice(TEMPLATES).format("".join(LEET.get(char, char) for char in word)))
+    long = []
+    for _ in range(10):
+        # Entre 300 y 900 caracteres: por encima del límite de Twitter y por debajo de MAX_TEXT_LENGTH
+        text = ""
+        while len(text) < rng.randint(300, 900):
+            text += rng.choice(short) + " "
+        long.append(text.strip())
+    # Proporciones aproximadas del tráfico real: 70% cortos, 20% con groserías, 10% largos
+    return short * 7 + profane * 4 + long * 2
+
+class RequestStats:
+    """Latencias y códigos de estado de un tipo de petición"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.texts = 0
+
+    def record(self, latency: float, status: str, texts: int) -> None:
+        self.latencies.append(latency * 1000)
+        self.statuses[status] += 1
+        self.texts += texts
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        total = len(self.latencies)
+        errors = sum(count for status, count in self.statuses.items() if not status.startswith("2"))
+        return {
+            "requests": total,
+            "throughput_rps": total / elapsed,
+            "texts_per_second": self.texts / elapsed,
+            "error_rate": errors / total,
+            "statuses": dict(self.statuses),
+            "latency_ms": {
+                "p50": percentile(self.latencies, 0.50),
+                "p95": percentile(self.latencies, 0.95),
+                "p99": percentile(self.latencies, 0.99),
+                "mean": sum(self.latencies) / total,
+                "max": max(self.latencies),
+            },
+        }
+
+def nonce_words(sequence: int, count: int = 4) -> str:
+    """Palabras inventadas distintas para cada número (los dígitos y signos no cambian la huella de casi duplicados)"""
+    words = []
+    for index in range(count):
+        value = zlib.crc32(f"{sequence}:{index}".encode("utf-8"))
+        words.append("".join(chr(ord("a") + (value >> shift) % 26) for shift in range(0, 30, 5)))
+    return " ".join(words)
+
+class LoadGenerator:
+    """Genera y envía las peticiones de la mezcla configurada"""
+
+    def __init__(self, client: Any, methods: List[str], mix: Dict[str, float], texts: List[str],
+                 cache_busting: bool, seed: int):
+        self.client = client
+        self.methods = methods
+        self.texts = texts
+        self.cache_busting = cache_busting
+        self.rng = random.Random(seed)
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.sequence = 0
+        self.stats: Dict[str, RequestStats] = defaultdict(RequestStats)
+
+    def text(self) -> str:
+        text = self.rng.choice(self.texts)
+        if self.cache_busting:
+            # Un sufijo distinto por texto evita que las peticiones acierten en el caché de resultados o
+            # reutilicen la emoción de una variante casi igual (más palabras cuanto más largo es el texto)
+            self.sequence += 1
+            nonce = nonce_words(self.sequence, 4 + len(text.split()) // 2)
+            text = f"{text[:MAX_TEXT_LENGTH - len(nonce) - 1]} {nonce}"
+        return text
+
+    def next_request(self) -> Tuple[str, str, Dict[str, Any], int]:
+        """(clave para las estadísticas, método HTTP, argumentos de httpx, textos enviados)"""
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        method = self.rng.choice(self.methods)
+        if kind == "validate":
+            return f"/validate:{method}", "POST", {
+                "url": "/validate", "json": {"text": self.text(), "sentiment_method": method}
+            }, 1
+        if kind == "batch":
+            return f"/validate/batch:{method}", "POST", {
+                "url": "/validate/batch", "params": {"method": method},
+                "json": [self.text() for _ in range(BATCH_SIZE)]
+            }, BATCH_SIZE
+        if kind == "stream":
+            body = "".join(json.dumps(self.text(), ensure_ascii=False) + "\n" for _ in range(STREAM_LINES))
+            return f"/validate/stream:{method}", "POST", {
+                "url": "/validate/stream", "params": {"method": method}, "content": body.encode("utf-8"),
+                "headers": {"Content-Type": "application/x-ndjson"}
+            }, STREAM_LINES
+        endpoint = self.rng.choice(INFO_ENDPOINTS)
+        return endpoint, "GET", {"url": endpoint}, 0
+
+    async def send(self, scheduled: float, measure_from: float) -> None:
+        key, http_method, arguments, texts = self.next_request()
+        try:
+            response = await self.client.request(http_method, **arguments)
+            await response.aread()
+            status = str(response.status_code)
+        except Exception as e:
+            status = type(e).__name__
+        # Las peticiones del calentamiento no cuentan
+        if scheduled >= measure_from:
+            self.stats[key].record(time.perf_counter() - scheduled, status, texts)
+
+async def run_closed_loop(generator: LoadGenerator, concurrency: int, measure_from: float, end: float) -> None:
+    async def worker():
+        while time.perf_counter() < end:
+            await generator.send(time.perf_counter(), measure_from)
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+async def run_open_loop(generator: LoadGenerator, rate: float, concurrency: int, measure_from: float, end: float) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def arrival(scheduled: float):
+        async with semaphore:
+            await generator.send(scheduled, measure_from)
+
+    scheduled = time.perf_counter()
+    while True:
+        scheduled += generator.rng.expovariate(rate)
+        if scheduled >= end:
+            break
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        task = asyncio.ensure_future(arrival(scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+async def run_load(url: str, methods: List[str], mix: Dict[str, float], duration: float, warmup: float,
+                   concurrency: int, rate: Optional[float], cache_busting: bool, timeout: float,
+                   seed: int) -> Dict[str, Any]:
+    """Ejecuta la prueba y devuelve el informe"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        generator = LoadGenerator(client, methods, mix, build_texts(seed), cache_busting, seed)
+        start = time.perf_counter()
+        measure_from = start + warmup
+        end = measure_from + duration
+        if rate:
+            await run_open_loop(generator, rate, concurrency, measure_from, end)
+        else:
+            await run_closed_loop(generator, concurrency, measure_from, end)
+        elapsed = time.perf_counter() - measure_from
+
+    total = RequestStats()
+    for stats in generator.stats.values():
+        total.latencies.extend(stats.latencies)
+        total.statuses.update(stats.statuses)
+        total.texts += stats.texts
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "processor": platform.processor()},
+        "settings": {
+            "methods": methods, "mix": mix, "duration": duration, "warmup": warmup,
+            "concurrency": concurrency, "rate": rate, "cache_busting": cache_busting, "seed": seed,
+        },
+        "total": total.summary(elapsed) if total.latencies else None,
+        "endpoints": {key: stats.summary(elapsed) for key, stats in sorted(generator.stats.items())},
+    }
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], latency_tolerance: float,
+                        throughput_tolerance: float, error_tolerance: float, min_latency_ms: float) -> List[str]:
+    """Regresiones respecto a la línea base (cadenas legibles; lista vacía si no hay)"""
+    regressions = []
+    for key, base in baseline["endpoints"].items():
+        current = report["endpoints"].get(key)
+        if current is None:
+            continue
+        for name in ("p50", "p95", "p99"):
+            before, after = base["latency_ms"][name], current["latency_ms"][name]
+            # El margen absoluto evita falsos positivos en latencias de pocos milisegundos
+            if after > before * (1 + latency_tolerance) and after - before > min_latency_ms:
+                regressions.append(f"{key}: latencia {name} {before:.1f} ms -> {after:.1f} ms")
+        before, after = base["throughput_rps"], current["throughput_rps"]
+        if after < before * (1 - throughput_tolerance):
+            regressions.append(f"{key}: rendimiento {before:.1f} -> {after:.1f} peticiones/s")
+        before, after = base["error_rate"], current["error_rate"]
+        if after > before + error_tolerance:
+            regressions.append(f"{key}: tasa de errores {before:.1%} -> {after:.1%}")
+    return regressions
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'endpoint':<32} {'peticiones':>10} {'pet/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>8}")
+    rows = list(report["endpoints"].items()) + ([("total", report["total"])] if report["total"] else [])
+    for key, summary in rows:
+        latency = summary["latency_ms"]
+        print(
+            f"{key:<32} {summary['requests']:>10} {summary['throughput_rps']:>8.1f} {latency['p50']:>8.1f} "
+            f"{latency['p95']:>8.1f} {latency['p99']:>8.1f} {summary['error_rate']:>8.1%}"
+        )
+
+def wait_until_ready(url: str, timeout: float) -> None:
+    """Espera a que la API responda y tenga todos los modelos cargados"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            health = httpx.get(f"{url}/health", timeout=2.0).json()
+            if health.get("models_loaded"):
+                return
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"La API en {url} no estuvo lista en {timeout:.0f}s")
+
+@contextmanager
+def local_server(port: int, stub_models: bool, stub_latency_ms: float, startup_timeout: float) -> Iterator[str]:
+    """Arranca una instancia local de la API en un subproceso"""
+    if stub_models:
+        command = [sys.executable, "-m", "benchmarks.stubs", "--host", "127.0.0.1", "--port", str(port),
+                   "--latency-ms", str(stub_latency_ms)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning"]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(command, cwd=root)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(url, startup_timeout)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """"validate=80,batch=10,stream=5,info=5" -> {"validate": 80.0, ...}"""
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Tipo de petición desconocido: '{kind}' (usa {', '.join(DEFAULT_MIX)})")
+        mix[kind] = float(weight)
+    return mix
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga concurrente de la API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API ya en marcha (se ignora con --start-server)")
+    parser.add_argument("--start-server", action="store_true", help="Arrancar una instancia local para la prueba")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto de la instancia local")
+    parser.add_argument("--stub-models", action="store_true", help="Instancia local con modelos sustitutos (sin BERT)")
+    parser.add_argument("--stub-latency-ms", type=float, default=10.0, help="Latencia simulada por mini-lote de transformers")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--methods", nargs="+", default=list(SENTIMENT_MODELS), choices=list(SENTIMENT_MODELS) + [AUTO_METHOD])
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Pesos por tipo, p. ej. validate=80,batch=10,stream=5,info=5")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de medición")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Segundos iniciales que no se miden")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes concurrentes (máximo de peticiones en vuelo con --rate)")
+    parser.add_argument("--rate", type=float, help="Llegadas por segundo (modo de tasa abierta)")
+    parser.add_argument("--cache-busting", action="store_true", help="Textos únicos para que no acierten en el caché ni en el índice de casi duplicados")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición en segundos")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Archivo JSON del informe (sirve como línea base)")
+    parser.add_argument("--baseline", help=f"Informe de referencia, p. ej. {DEFAULT_BASELINE}")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25, help="Aumento relativo de latencia permitido")
+    parser.add_argument("--throughput-tolerance", type=float, default=0.2, help="Caída relativa de rendimiento permitida")
+    parser.add_argument("--error-tolerance", type=float, default=0.01, help="Aumento absoluto de la tasa de errores permitido")
+    parser.add_argument("--min-latency-ms", type=float, default=2.0, help="Aumento absoluto mínimo de latencia para contar como regresión")
+    args = parser.parse_args()
+
+    if httpx is None:
+        raise ImportError("La prueba de carga requiere httpx: pip install httpx")
+
+    def run(url: str) -> Dict[str, Any]:
+        return asyncio.run(run_load(
+            url, args.methods, args.mix, args.duration, args.warmup, args.concurrency,
+            args.rate, args.cache_busting, args.timeout, args.seed
+        ))
+
+    if args.start_server:
+        with local_server(args.port, args.stub_models, args.stub_latency_ms, args.startup_timeout) as url:
+            report = run(url)
+    else:
+        report = run(args.url)
+    report["settings"]["stub_models"] = args.stub_models and args.start_server
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            json.dump(report, outfile, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["settings"] != report["settings"]:
+            print("Aviso: la línea base se midió con otra configuración")
+        regressions = compare_to_baseline(
+            report, baseline, args.latency_tolerance, args.throughput_tolerance,
+            args.error_tolerance, args.min_latency_ms
+        )
+        if regressions:
+            print("Regresiones respecto a la línea base:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("Sin regresiones respecto a la línea base")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Modelos sustitutos deterministas para benchmarks y pruebas de carga sin descargar BERT
+
+StubSentimentPipeline imita al pipeline de transformers (tokenizer + model) para
+que run_pipeline_batch siga el mismo camino que con BERT: ventanas solapadas,
+mini-lotes por longitud, padding y softmax. Los ids de los tokens salen de un
+hash estable de cada palabra, así que el mismo texto da siempre el mismo
+resultado. latency_ms simula el coste del modelo por mini-lote.
+
+Uso (servidor local con modelos sustitutos):
+    python -m benchmarks.stubs --port 8001 --latency-ms 20
+"""
+
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, NamedTuple, Union
+import argparse
+import re
+import time
+import zlib
+from config import SERVER_HOST
+
+STUB_VOCAB_SIZE = 8192
+STUB_METHODS = ("transformers", "textblob", "vader", "student")
+STUB_STUDENT_BUCKETS = 2 ** 16
+
+# Los mismos ids que BERT para los tokens especiales
+PAD_ID, CLS_ID, SEP_ID = 0, 101, 102
+
+def stable_hash(text: str) -> int:
+    """Hash independiente del proceso (hash() cambia en cada ejecución)"""
+    return zlib.crc32(text.encode("utf-8"))
+
+def hash_score(text: str) -> float:
+    """Score determinista entre -1 y 1"""
+    return (stable_hash(text) % 2001) / 1000.0 - 1.0
+
+class StubTokenizer:
+    """Tokenizador por palabras con ids por hash; admite las opciones de ventanas de los tokenizadores rápidos"""
+
+    def __init__(self, vocab_size: int = STUB_VOCAB_SIZE):
+        self.vocab_size = vocab_size
+
+    def encode(self, text: str) -> List[int]:
+        return [1000 + stable_hash(token) % (self.vocab_size - 1000) for token in re.findall(r"\w+|[^\w\s]", text.lower())]
+
+    def __call__(self, texts: Union[str, List[str]], truncation: bool = False, max_length: int = 512,
+                 stride: int = 0, return_overflowing_tokens: bool = False, **kwargs) -> Dict[str, List[Any]]:
+        if isinstance(texts, str):
+            texts = [texts]
+        body = max_length - 2
+        input_ids, owners = [], []
+        for index, text in enumerate(texts):
+            ids = self.encode(text)
+            start = 0
+            while True:
+                window = ids[start:start + body] if truncation else ids
+                input_ids.append([CLS_ID] + window + [SEP_ID])
+                owners.append(index)
+                if not (truncation and return_overflowing_tokens) or start + body >= len(ids):
+                    break
+                start += max(1, body - stride)
+        encodings = {"input_ids": input_ids, "attention_mask": [[1] * len(ids) for ids in input_ids]}
+        if return_overflowing_tokens:
+            encodings["overflow_to_sample_mapping"] = owners
+        return encodings
+
+    def pad(self, features: Dict[str, List[List[int]]], return_tensors: str = "pt") -> Dict[str, Any]:
+        import torch
+        length = max(len(row) for row in features["input_ids"])
+        return {key: torch.tensor([row + [PAD_ID] * (length - len(row)) for row in rows]) for key, rows in features.items()}
+
+class StubModel:
+    """Clasificador de 5 clases ("1 star" ... "5 stars") con pesos aleatorios fijos por token"""
+
+    def __init__(self, latency_ms: float = 0.0, vocab_size: int = STUB_VOCAB_SIZE):
+        import torch
+        self.latency = latency_ms / 1000.0
+        self.config = SimpleNamespace(
+            id2label={0: "1 star", 1: "2 stars", 2: "3 stars", 3: "4 stars", 4: "5 stars"},
+            max_position_embeddings=512
+        )
+        self.device = torch.device("cpu")
+        self._weights = torch.randn(vocab_size, 5, generator=torch.Generator().manual_seed(0)) * 3
+
+    def __call__(self, input_ids, attention_mask, **kwargs) -> SimpleNamespace:
+        if self.latency:
+            time.sleep(self.latency)
+        mask = attention_mask.unsqueeze(-1).float()
+        logits = (self._weights[input_ids] * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return SimpleNamespace(logits=logits)
+
+class StubSentimentPipeline:
+    """Sustituto del pipeline de sentiment-analysis de transformers"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.tokenizer = StubTokenizer()
+        self.model = StubModel(latency_ms)
+
+    def __call__(self, texts: Union[str, List[str]], **kwargs) -> List[Dict[str, Any]]:
+        from inference import run_pipeline_batch
+        return run_pipeline_batch(self, [texts] if isinstance(texts, str) else texts)
+
+class StubSentiment(NamedTuple):
+    polarity: float
+    subjectivity: float
+
+class StubTextBlob:
+    """Sustituto de TextBlob: solo la propiedad sentiment"""
+
+    def __init__(self, text: str):
+        self.sentiment = StubSentiment(hash_score(text), (stable_hash(text[::-1]) % 1001) / 1000.0)
+
+class StubVader:
+    """Sustituto de SentimentIntensityAnalyzer"""
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        compound = hash_score(text)
+        positive = max(compound, 0.0)
+        negative = max(-compound, 0.0)
+        return {"neg": negative, "neu": 1.0 - positive - negative, "pos": positive, "compound": compound}
+
+def stub_student_model() -> Any:
+    """Modelo alumno con pesos aleatorios fijos (el real sale de train_student.py)"""
+    import numpy as np
+    from student import HashedNgramFeaturizer, StudentModel
+    weights = np.random.default_rng(0).normal(size=(STUB_STUDENT_BUCKETS, 5))
+    labels = ["1 star", "2 stars", "3 stars", "4 stars", "5 stars"]
+    return StudentModel(weights, np.zeros(5), labels, HashedNgramFeaturizer(STUB_STUDENT_BUCKETS), {"version": "stub"})
+
+def install_stub_models(registry: Any, latency_ms: float = 0.0, methods: Iterable[str] = STUB_METHODS) -> None:
+    """Sustituye los cargadores de los métodos indicados (antes de que se carguen los modelos reales)"""
+    loaders = {
+        "transformers": lambda: StubSentimentPipeline(latency_ms),
+        "textblob": lambda: StubTextBlob,
+        "vader": StubVader,
+        "student": stub_student_model,
+    }
+    for method in methods:
+        registry.register(method, loaders[method])
+
+def serve(host: str, port: int, latency_ms: float) -> None:
+    """Arranca la API con los modelos sustitutos"""
+    import uvicorn
+    import main
+    install_stub_models(main.model_registry, latency_ms)
+    uvicorn.run(main.app, host=host, port=port, log_level="warning")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API con modelos sustitutos deterministas (sin descargar BERT)")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia simulada por mini-lote de transformers")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.latency_ms)
@@ -0,0 +1,250 @@
+"""
+Validación masiva de archivos CSV, JSONL o Parquet sin pasar por la API HTTP
+
+Lee el archivo por bloques, analiza cada bloque en un pool de procesos con la
+misma lógica de main.py (validate_batch) y escribe los resultados de forma
+incremental. Tras cada bloque escrito guarda un checkpoint, de modo que una
+ejecución interrumpida puede continuar con --resume.
+
+Uso:
+    python bulk.py comentarios.csv resultados.csv --text-column texto
+    python bulk.py comentarios.parquet resultados.jsonl --method vader --workers 8
+    python bulk.py comentarios.csv resultados.csv --resume
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config import BULK_CHUNK_SIZE, BULK_WORKERS, DEFAULT_SENTIMENT_METHOD, SENTIMENT_MODELS, PROFANITY_FUZZY_ENABLED, AUTO_METHOD
+
+RESULT_FIELDS = ["is_offensive", "emotion_score", "emotion_label", "confidence", "profanity_count", "valid", "error"]
+ROUTING_FIELDS = ["sentiment_method", "language"]  # Solo con --method auto
+
+Chunk = Tuple[List[str], List[Any]]
+
+def file_format(path: str) -> str:
+    """Formato del archivo según su extensión"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".csv", ".tsv"):
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".parquet":
+        return "parquet"
+    raise ValueError(f"Formato no soportado: '{extension}' (usa .csv, .jsonl o .parquet)")
+
+def as_text(value: Any) -> str:
+    """Convierte una celda en texto; las celdas vacías o nulas quedan como texto vacío"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value)
+
+def read_chunks(path: str, text_column: str, id_column: Optional[str], chunk_size: int) -> Iterator[Chunk]:
+    """Lee el archivo por bloques de chunk_size filas sin cargarlo completo en memoria"""
+    columns = [text_column] + ([id_column] if id_column else [])
+    fmt = file_format(path)
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Leer Parquet requiere pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            data = batch.to_pydict()
+            yield [as_text(value) for value in data[text_column]], data[id_column] if id_column else []
+        return
+
+    import pandas as pd
+    if fmt == "csv":
+        reader = pd.read_csv(
+            path, usecols=columns, chunksize=chunk_size, dtype=str, keep_default_na=False,
+            sep="\t" if path.lower().endswith(".tsv") else ","
+        )
+    else:
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+    for frame in reader:
+        yield [as_text(value) for value in frame[text_column].tolist()], frame[id_column].tolist() if id_column else []
+
+def skip_rows(chunks: Iterator[Chunk], rows: int) -> Iterator[Chunk]:
+    """Descarta las primeras filas (ya procesadas en una ejecución anterior)"""
+    for texts, ids in chunks:
+        if rows >= len(texts):
+            rows -= len(texts)
+            continue
+        if rows:
+            texts, ids = texts[rows:], ids[rows:]
+            rows = 0
+        yield texts, ids
+
+class ResultWriter:
+    """Escribe los resultados en CSV o JSONL, añadiendo al final del archivo"""
+
+    def __init__(self, path: str, fields: List[str], offset: int):
+        self.format = file_format(path)
+        if self.format == "parquet":
+            raise ValueError("La salida debe ser .csv o .jsonl (se escribe de forma incremental)")
+        self.fields = fields
+        # Descartar lo escrito después del último checkpoint
+        self._file = open(path, "r+b" if offset else "wb")
+        self._file.truncate(offset)
+        self._file.seek(offset)
+        if self.format == "csv" and offset == 0:
+            self._write_csv([dict(zip(fields, fields))])
+
+    def write(self, rows: List[Dict[str, Any]]) -> int:
+        """Escribe las filas y devuelve la posición del archivo tras vaciarlo a disco"""
+        if self.format == "csv":
+            self._write_csv(rows)
+        else:
+            self._file.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _write_csv(self, rows: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=self.fields, extrasaction="ignore").writerows(rows)
+        self._file.write(buffer.getvalue().encode("utf-8"))
+
+def checkpoint_path(output_path: str) -> str:
+    return output_path + ".checkpoint"
+
+def load_checkpoint(output_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(checkpoint_path(output_path), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_checkpoint(output_path: str, checkpoint: Dict[str, Any]) -> None:
+    """Guarda el checkpoint de forma atómica (escritura en un temporal y renombrado)"""
+    temporary = checkpoint_path(output_path) + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary, checkpoint_path(output_path))
+
+def init_worker(threads: int) -> None:
+    """Reparte los núcleos entre los procesos del pool"""
+    import main
+    main.TORCH_NUM_THREADS = threads
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+def process_chunk(texts: List[str], method: str) -> List[Dict[str, Any]]:
+    """Valida un bloque de textos en el proceso del pool"""
+    import main
+    return main.validate_batch(texts, method)
+
+def to_rows(start: int, texts: List[str], ids: List[Any], results: List[Dict[str, Any]],
+            id_column: Optional[str], keep_text: bool, result_fields: List[str] = RESULT_FIELDS) -> List[Dict[str, Any]]:
+    """Filas de salida: número de fila, id opcional, texto opcional y resultado"""
+    rows = []
+    for offset, (text, result) in enumerate(zip(texts, results)):
+        row = {"row": start + offset}
+        if id_column:
+            row[id_column] = ids[offset]
+        if keep_text:
+            row["text"] = text
+        row.update({field: result.get(field) for field in result_fields})
+        rows.append(row)
+    return rows
+
+def run(input_path: str, output_path: str, text_column: str = "text", id_column: Optional[str] = None,
+        method: str = DEFAULT_SENTIMENT_METHOD, chunk_size: int = BULK_CHUNK_SIZE, workers: int = BULK_WORKERS,
+        resume: bool = False, keep_text: bool = False) -> Dict[str, Any]:
+    """Procesa el archivo completo y devuelve un resumen con las filas por segundo"""
+    if method != AUTO_METHOD and method not in SENTIMENT_MODELS:
+        raise ValueError(f"Método '{method}' no válido. Métodos disponibles: {list(SENTIMENT_MODELS.keys()) + [AUTO_METHOD]}")
+
+    result_fields = RESULT_FIELDS + (ROUTING_FIELDS if method == AUTO_METHOD else [])
+    fields = ["row"] + ([id_column] if id_column else []) + (["text"] if keep_text else []) + result_fields
+
+    checkpoint = load_checkpoint(output_path) if resume else None
+    if checkpoint is not None and (checkpoint["input"] != os.path.abspath(input_path) or checkpoint["method"] != method):
+        raise ValueError("El checkpoint corresponde a otro archivo de entrada u otro método")
+    # Las filas ya escritas deben tener las mismas columnas (--id-column, --keep-text) que las que se añadan
+    if checkpoint is not None and checkpoint.get("fields") != fields:
+        raise ValueError(f"El checkpoint se escribió con otras columnas: {checkpoint.get('fields')}")
+    if checkpoint is None:
+        checkpoint = {"input": os.path.abspath(input_path), "method": method, "fields": fields, "rows_done": 0, "output_bytes": 0}
+    elif checkpoint["rows_done"]:
+        print(f"Reanudando desde la fila {checkpoint['rows_done']}")
+
+    writer = ResultWriter(output_path, fields, checkpoint["output_bytes"])
+    chunks = skip_rows(read_chunks(input_path, text_column, id_column, chunk_size), checkpoint["rows_done"])
+    resumed_rows = checkpoint["rows_done"]
+    start_time = time.perf_counter()
+
+    def write_chunk(texts: List[str], ids: List[Any], results: List[Dict[str, Any]]) -> None:
+        rows = to_rows(checkpoint["rows_done"], texts, ids, results, id_column, keep_text, result_fields)
+        checkpoint["output_bytes"] = writer.write(rows)
+        checkpoint["rows_done"] += len(rows)
+        save_checkpoint(output_path, checkpoint)
+        processed = checkpoint["rows_done"] - resumed_rows
+        print(f"{checkpoint['rows_done']} filas ({processed / (time.perf_counter() - start_time):.1f} filas/s)")
+
+    try:
+        if workers <= 1:
+            for texts, ids in chunks:
+                write_chunk(texts, ids, process_chunk(texts, method))
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            context = None
+            if "fork" in multiprocessing.get_all_start_methods():
+                # Cargar los modelos una vez y compartirlos copy-on-write con los procesos del pool
+                import main
+                from serve import preload_models
+                main.TORCH_NUM_THREADS = 1
+                preload_models(main.models_for_method(method) + ["profanity"] + (["profanity_fuzzy"] if PROFANITY_FUZZY_ENABLED else []))
+                context = multiprocessing.get_context("fork")
+
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=init_worker, initargs=(threads,)) as pool:
+                # Como mucho dos bloques en vuelo por proceso; se escriben en el orden del archivo
+                pending = deque()
+                for texts, ids in chunks:
+                    pending.append((texts, ids, pool.submit(process_chunk, texts, method)))
+                    if len(pending) >= workers * 2:
+                        texts, ids, future = pending.popleft()
+                        write_chunk(texts, ids, future.result())
+                while pending:
+                    texts, ids, future = pending.popleft()
+                    write_chunk(texts, ids, future.result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start_time
+    processed = checkpoint["rows_done"] - resumed_rows
+    summary = {
+        "rows": checkpoint["rows_done"],
+        "rows_processed": processed,
+        "elapsed_seconds": elapsed,
+        "rows_per_second": processed / elapsed if elapsed else 0.0
+    }
+    print(f"Completado: {processed} filas en {elapsed:.1f}s ({summary['rows_per_second']:.1f} filas/s)")
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validación masiva de archivos CSV, JSONL o Parquet")
+    parser.add_argument("input", help="Archivo de entrada (.csv, .tsv, .jsonl o .parquet)")
+    parser.add_argument("output", help="Archivo de resultados (.csv o .jsonl)")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--id-column", default=None, help="Columna que se copia a los resultados para identificar cada fila")
+    parser.add_argument("--method", default=DEFAULT_SENTIMENT_METHOD, choices=list(SENTIMENT_MODELS) + [AUTO_METHOD])
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=BULK_WORKERS)
+    parser.add_argument("--resume", action="store_true", help="Continuar desde el checkpoint de una ejecución interrumpida")
+    parser.add_argument("--keep-text", action="store_true", help="Incluir el texto original en los resultados")
+    args = parser.parse_args()
+    run(args.input, args.output, args.text_column, args.id_column, args.method,
+        args.chunk_size, args.workers, args.resume, args.keep_text)
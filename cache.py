@@ -0,0 +1,162 @@
+"""
+Caché de resultados de validación direccionada por contenido
+"""
+
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+
+def make_cache_key(text: str, method: str, model_version: str, thresholds: Dict[str, Any]) -> str:
+    """Genera la clave del caché a partir del texto normalizado, el método, la versión del modelo y los umbrales"""
+    payload = json.dumps(
+        [unicodedata.normalize("NFC", text), method, model_version, thresholds],
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """Caché LRU con expiración (TTL) y respaldo opcional en SQLite"""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 3600, db_path: Optional[str] = None,
+                 db_max_rows: int = 100000, flush_seconds: float = 1.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.db_max_rows = db_max_rows
+        self.flush_seconds = flush_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._pending: Dict[str, Any] = {}
+        self._writer = None
+        self.reconnect()
+
+    def reconnect(self) -> None:
+        """Abre (o reabre tras un fork) la conexión al archivo SQLite"""
+        if not self.db_path:
+            return
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL: las lecturas no esperan a las escrituras
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+        self._db.commit()
+        # El hilo de escritura no sobrevive al fork: se crea de nuevo con la primera escritura
+        self._pending = {}
+        self._writer = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Devuelve el resultado guardado o None si no existe o expiró"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._load(key, now - self.ttl_seconds)
+                if entry is not None:
+                    self._store(key, entry)
+            if entry is not None and now - entry[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Guarda un resultado en memoria y, si está configurado, lo encola para escribirlo en disco"""
+        entry = (time.time(), value)
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                # Se escribe en segundo plano, en una sola transacción por intervalo, fuera del event loop
+                self._pending[key] = entry
+                self._ensure_writer()
+
+    def flush(self) -> None:
+        """Escribe en disco los resultados pendientes y, con ellos, elimina las filas expiradas o sobrantes"""
+        if self._db is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        rows = [(key, json.dumps(value, ensure_ascii=False), created) for key, (created, value) in pending.items()]
+        # Conexión propia: las lecturas de get() no esperan a la escritura
+        with closing(sqlite3.connect(self.db_path)) as db, db:
+            db.executemany("INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)", rows)
+            db.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl_seconds,))
+            # Conservar solo las filas más recientes
+            db.execute(
+                "DELETE FROM results WHERE created < "
+                "(SELECT created FROM results ORDER BY created DESC LIMIT 1 OFFSET ?)",
+                (self.db_max_rows - 1,)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._pending.clear()
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso del caché"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def _store(self, key: str, entry: Any) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        # Expulsar las entradas menos usadas
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str, oldest: float) -> Optional[Any]:
+        row = self._db.execute(
+            "SELECT created, value FROM results WHERE key = ? AND created >= ?", (key, oldest)
+        ).fetchone()
+        if row is None:
+            return None
+        return (row[0], json.loads(row[1]))
+
+    def _ensure_writer(self) -> None:
+        # El hilo se crea con la primera escritura pendiente (se llama con el lock tomado)
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="result-cache-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Error al escribir el caché en SQLite: {e}")
+            # Sin escrituras pendientes el hilo termina; set() lo vuelve a crear
+            with self._lock:
+                if not self._pending:
+                    self._writer = None
+                    return
@@ -2,20 +2,104 @@
 Configuración de la API de Validación de Textos
 """
 
+import os
+
 # Configuración del servidor
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 8000
+SERVER_WORKERS = 1  # Procesos de serve.py (modelos compartidos entre workers)
 DEBUG = True
 
 # Configuración de modelos
+STUDENT_MODEL_PATH = "student_model.npz"  # Modelo alumno generado por train_student.py
+
 SENTIMENT_MODELS = {
     "transformers": "nlptown/bert-base-multilingual-uncased-sentiment",
     "textblob": "textblob",
-    "vader": "vader"
+    "vader": "vader",
+    "ensemble": "ensemble",  # VADER + TextBlob, y transformers solo en los casos dudosos
+    "student": STUDENT_MODEL_PATH  # N-gramas + clasificador lineal destilado de transformers (español)
 }
 
 DEFAULT_SENTIMENT_METHOD = "transformers"  # Opción 2 del proyecto existente
 MAX_TEXT_LENGTH = 1000
+PREPROCESS_CACHE_SIZE = 4096  # Textos preprocesados que se conservan para reutilizarlos entre etapas
+
+# Configuración de inferencia por lotes (transformers)
+TRANSFORMERS_BATCH_SIZE = 16  # Textos por mini-lote enviado al modelo
+TRANSFORMERS_MAX_TOKENS = 512  # Longitud máxima de entrada de BERT
+TRANSFORMERS_CHUNK_OVERLAP = 64  # Tokens compartidos entre ventanas consecutivas de un texto largo
+TRANSFORMERS_CHUNK_AGGREGATION = "weighted"  # "weighted" (promedio ponderado por tokens) o "min" (ventana más negativa)
+
+# Modelos que se cargan en segundo plano al arrancar; el resto se carga con la primera petición que los use
+# ("student" carga en milisegundos y no existe hasta entrenarlo con train_student.py)
+MODEL_PRELOAD = ["transformers", "textblob", "vader", "profanity", "profanity_fuzzy", "langid"]
+MODEL_RETRY_SECONDS = 30  # Espera antes de reintentar la carga de un modelo que falló
+
+# Backend de inferencia para transformers: "pytorch" o "onnx" (requiere exportar con export_onnx.py)
+TRANSFORMERS_BACKEND = "pytorch"
+ONNX_MODEL_DIR = "onnx_model"  # Directorio generado por export_onnx.py
+ONNX_USE_QUANTIZED = True  # Usar la versión con cuantización dinámica int8
+
+# Configuración de /validate/stream (NDJSON sin límite de textos)
+STREAM_BATCH_SIZE = 32  # Líneas analizadas por lote
+STREAM_MAX_LINE_BYTES = 65536  # Las líneas más largas se reportan como error
+STREAM_BUSY_RETRY_MS = 20  # Con el pool saturado, el lote siguiente espera en lugar de cortar la respuesta ya iniciada
+
+# Métricas de Prometheus (/metrics) y tiempos por etapa
+METRICS_ENABLED = True
+METRICS_LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]  # Segundos
+
+# Perfilado de peticiones (solo depuración): con PROFILING_ENABLED = False no se instala nada
+PROFILING_ENABLED = False
+PROFILING_MODE = "sampling"  # "sampling" (pilas colapsadas de todos los hilos) o "cprofile" (pstats del event loop)
+PROFILING_SAMPLE_RATE = 0.0  # Fracción de peticiones perfiladas sin pedirlo (cabecera X-Profile o ?profile=1)
+PROFILING_INTERVAL_MS = 1.0  # Intervalo de muestreo del modo "sampling"
+PROFILING_DIR = "profiles"
+PROFILING_MAX_FILES = 200  # Se conservan los más recientes
+
+# Informe de benchmarks/bench_methods.py que sirve /compare (si existe)
+METHOD_BENCHMARK_REPORT = "method_benchmark.json"
+
+# Configuración del procesamiento masivo de archivos (bulk.py)
+BULK_CHUNK_SIZE = 1000  # Filas leídas y analizadas por tarea
+BULK_WORKERS = max(1, (os.cpu_count() or 1) // 2)  # Procesos de análisis
+
+# Configuración de micro-lotes para /validate (agrupa peticiones concurrentes)
+MICRO_BATCH_ENABLED = True
+MICRO_BATCH_MAX_SIZE = 16  # Máximo de textos por lote agrupado
+MICRO_BATCH_MAX_WAIT_MS = 8  # Espera máxima antes de enviar un lote incompleto
+
+# Configuración del pool de inferencia (trabajo de CPU fuera del event loop)
+INFERENCE_WORKERS = 4  # Hilos dedicados al análisis
+INFERENCE_MAX_PENDING = 64  # Análisis en curso + en cola antes de responder 429
+TORCH_NUM_THREADS = max(1, (os.cpu_count() or 1) // INFERENCE_WORKERS)  # Hilos intra-op de torch
+
+# Configuración del caché de resultados de /validate
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_MAX_SIZE = 10000  # Entradas en memoria (LRU)
+RESULT_CACHE_TTL_SECONDS = 3600  # Vigencia de cada entrada
+RESULT_CACHE_DB_PATH = None  # Ruta a un archivo SQLite para conservar el caché entre reinicios
+RESULT_CACHE_DB_MAX_ROWS = 100000  # Filas en el archivo SQLite; se eliminan las más antiguas y las expiradas
+RESULT_CACHE_DB_FLUSH_SECONDS = 1.0  # Intervalo de escritura en SQLite (una transacción por intervalo)
+
+# Índice de casi duplicados de /validate (SimHash): las variantes de un mismo mensaje (emojis,
+# signos, menciones o enlaces cambiados) reutilizan la emoción ya calculada y se agrupan en campañas
+NEAR_DUPLICATE_ENABLED = True
+NEAR_DUPLICATE_MAX_DISTANCE = 3  # Bits distintos (de 64) entre dos huellas para considerarlas el mismo mensaje
+NEAR_DUPLICATE_REUSE = True  # Reutilizar la emoción de variantes que solo cambian menciones, enlaces, emojis o signos; False: solo informar
+NEAR_DUPLICATE_MIN_WORDS = 5  # Los textos más cortos no se indexan (cambiar una palabra cambia su sentido)
+NEAR_DUPLICATE_MAX_ENTRIES = 50000  # Huellas en memoria; se descartan las más antiguas
+NEAR_DUPLICATE_TTL_SECONDS = 3600  # Antigüedad máxima de una huella
+
+# Enrutado por idioma: con sentiment_method "auto" (u omitido) cada texto va al método
+# más barato adecuado para su idioma; VADER y TextBlob solo conocen el inglés
+AUTO_METHOD = "auto"
+LANGUAGE_ROUTING_ENABLED = True  # Si es False, omitir sentiment_method usa DEFAULT_SENTIMENT_METHOD
+LANGUAGE_ROUTES = {"en": "vader", "es": "transformers"}  # Con un modelo alumno entrenado: "es": "student"
+LANGUAGE_ROUTE_DEFAULT = "transformers"  # Otros idiomas o detección dudosa: BERT multilingüe
+LANGUAGE_MIN_CONFIDENCE = 0.9  # Probabilidad mínima de la detección para seguir LANGUAGE_ROUTES
+LANGUAGE_MIN_LENGTH = 10  # Los textos más cortos (en caracteres) no se detectan
 
 # Umbrales para diferentes métodos
 EMOTION_THRESHOLDS = {
@@ -36,9 +120,37 @@ EMOTION_THRESHOLDS = {
         "negative": -0.1,
         "neutral": 0.1,
         "positive": 0.5
+    },
+    "ensemble": {
+        "very_negative": 0.2,
+        "negative": 0.4,
+        "neutral": 0.6,
+        "positive": 0.8
+    },
+    # Score continuo (estrellas esperadas / 5): los cortes van entre las estrellas de BERT;
+    # train_student.py sugiere unos calibrados contra BERT que pueden ir en el léxico
+    "student": {
+        "very_negative": 0.3,
+        "negative": 0.5,
+        "neutral": 0.7,
+        "positive": 0.9
     }
 }
 
+# Entrenamiento del modelo alumno (train_student.py)
+STUDENT_HASH_BUCKETS = 2 ** 18  # Columnas del espacio de n-gramas (el modelo guarda las suyas)
+STUDENT_EPOCHS = 8
+STUDENT_LEARNING_RATE = 0.5  # Adagrad
+STUDENT_L2 = 1e-6
+STUDENT_BATCH_SIZE = 256  # Textos por paso de entrenamiento
+STUDENT_TEACHER_BATCH_SIZE = 64  # Textos por llamada a BERT al etiquetar el corpus
+
+# Configuración del modo ensemble
+ENSEMBLE_CHEAP_METHODS = ["vader", "textblob"]  # Se ejecutan siempre, antes que transformers
+ENSEMBLE_WEIGHTS = {"transformers": 0.6, "textblob": 0.2, "vader": 0.2}  # Peso de cada método en el score combinado
+ENSEMBLE_BOUNDARY_MARGIN = 0.05  # Distancia (en escala 0-1) a un umbral por debajo de la cual se consulta a transformers
+ENSEMBLE_MIN_SIGNAL = 0.05  # Scores por debajo de este valor absoluto se consideran sin señal
+
 # Configuración de groserías
 PROFANITY_REPLACEMENTS = {
     "puta": "persona",
@@ -66,6 +178,14 @@ PROFANITY_REPLACEMENTS = {
     "chingada": "expresión"
 }
 
+# Países de spanlp cuyas listas de groserías se cargan (vacío = todos)
+PROFANITY_COUNTRIES = []
+
+# Detección aproximada de groserías ofuscadas ("p3ndej0", "m.i.e.r.d.a", "puuuta")
+PROFANITY_FUZZY_ENABLED = True
+PROFANITY_FUZZY_THRESHOLD = 0.6  # Similitud de Jaccard mínima (trigramas) para comprobar si el token es una errata
+PROFANITY_FUZZY_MIN_LENGTH = 4  # Las palabras más cortas solo se detectan de forma exacta
+
 # Configuración de sugerencias
 SUGGESTION_TEMPLATES = {
     "negative_emotion": [
@@ -92,6 +212,12 @@ SUGGESTION_TEMPLATES = {
     ]
 }
 
+# Léxico recargable sin reiniciar (ver lexicon.py): un archivo JSON con las secciones
+# "profanity_replacements", "emotion_thresholds" y/o "suggestion_templates" sustituye a los valores de arriba
+LEXICON_PATH = "lexicon.json"  # Si no existe se usan los valores de este archivo
+LEXICON_WATCH_INTERVAL_SECONDS = 5.0  # Cada cuánto se comprueba si el archivo cambió (0 = solo con /admin/lexicon/reload)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Los endpoints /admin exigen la cabecera X-Admin-Token; sin definir están desactivados (403)
+
 # Configuración de CORS
 CORS_ORIGINS = ["*"]
 CORS_METHODS = ["*"]
@@ -113,5 +239,15 @@ SENTIMENT_ANALYSIS_CONFIG = {
         "description": "Análisis basado en reglas léxicas (VADER)",
         "advantages": ["Muy rápido", "No requiere modelos", "Bueno para redes sociales"],
         "disadvantages": ["Basado en reglas", "Menos contexto"]
+    },
+    "ensemble": {
+        "description": "Combinación de VADER y TextBlob que consulta a BERT solo en los casos dudosos",
+        "advantages": ["Rápido en los casos claros", "Precisión de BERT en los casos difíciles"],
+        "disadvantages": ["Latencia variable", "Requiere cargar todos los modelos"]
+    },
+    "student": {
+        "description": "Modelo alumno para español destilado de BERT: n-gramas con hashing y clasificador lineal en NumPy",
+        "advantages": ["Decenas de miles de textos por segundo", "Sin torch ni GPU", "Imita a BERT en español"],
+        "disadvantages": ["Hay que entrenarlo (train_student.py)", "Menos contexto que BERT", "Solo español"]
     }
 } 
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Combinación de métodos de análisis de sentimientos (modo "ensemble")
+
+VADER y TextBlob deciden los casos claros en microsegundos; el modelo de
+transformers solo se consulta cuando no están de acuerdo, cuando quedan cerca
+de los umbrales del léxico vigente o cuando no encuentran señal.
+"""
+
+from typing import Any, Dict, List, Optional
+from config import ENSEMBLE_WEIGHTS, ENSEMBLE_BOUNDARY_MARGIN, ENSEMBLE_MIN_SIGNAL, ENSEMBLE_CHEAP_METHODS
+from lexicon import current_lexicon
+from utils import get_emotion_label, normalize_score
+
+def escalation_reason(results: List[Dict[str, Any]]) -> Optional[str]:
+    """Motivo para consultar a transformers, o None si los métodos rápidos bastan"""
+    # VADER y TextBlob usan léxicos en inglés: sin señal no pueden decidir
+    if all(abs(result["score"]) < ENSEMBLE_MIN_SIGNAL for result in results):
+        return "no_signal"
+    if len({result["label"] for result in results}) > 1:
+        return "disagreement"
+    for result in results:
+        score = normalize_score(result["score"], result["method"])
+        for threshold in current_lexicon().thresholds[result["method"]].values():
+            if abs(score - normalize_score(threshold, result["method"])) < ENSEMBLE_BOUNDARY_MARGIN:
+                return "near_threshold"
+    return None
+
+def fuse_results(results: List[Dict[str, Any]], reason: Optional[str] = None) -> Dict[str, Any]:
+    """Promedio ponderado de los scores normalizados (0 a 1) de los métodos que aportan señal"""
+    voting = results
+    if reason == "no_signal":
+        # El 0.0 de VADER y TextBlob significa que no conocen las palabras, no que el texto sea neutral:
+        # promediarlo llevaría un texto de 1 estrella (0.2) a ~0.32, por encima del umbral de ofensivo
+        voting = [result for result in results if result["method"] not in ENSEMBLE_CHEAP_METHODS] or results
+    total_weight = sum(ENSEMBLE_WEIGHTS[result["method"]] for result in voting)
+    score = sum(
+        ENSEMBLE_WEIGHTS[result["method"]] * normalize_score(result["score"], result["method"])
+        for result in voting
+    ) / total_weight
+    confidence = sum(
+        ENSEMBLE_WEIGHTS[result["method"]] * min(1.0, result["confidence"])
+        for result in voting
+    ) / total_weight
+    return {
+        "score": score,
+        "label": get_emotion_label(score, "ensemble"),
+        "confidence": confidence,
+        "method": "ensemble",
+        "escalated": reason is not None,
+        "escalation_reason": reason,
+        "components": {result["method"]: result["score"] for result in results},
+        "fallback": any(result.get("fallback", False) for result in results)
+    }
@@ -0,0 +1,148 @@
+"""
+Exporta el modelo de transformers a ONNX (con cuantización dinámica int8 opcional)
+y comprueba la paridad de resultados y latencia frente a PyTorch
+
+Uso:
+    python export_onnx.py --output onnx_model
+    python export_onnx.py --output onnx_model --check-only
+"""
+
+from typing import Any, Dict, List
+import argparse
+import inspect
+import json
+import os
+import statistics
+import time
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+from config import SENTIMENT_MODELS, ONNX_MODEL_DIR
+from onnx_backend import OnnxSentimentPipeline, ONNX_MODEL_FILE, ONNX_QUANTIZED_MODEL_FILE
+
+# Textos de referencia para la comprobación de paridad
+PARITY_TEXTS = [
+    "Este producto es increíble, me encanta.",
+    "Me parece un producto promedio, nada fuera de lo común.",
+    "No me gustó para nada, muy malo.",
+    "Excelente calidad, totalmente recomendado.",
+    "Horrible experiencia, nunca volveré a comprar.",
+    "La entrega fue rápida, pero el servicio al cliente no fue excelente.",
+    "Muy buen servicio, pero el producto podría mejorar.",
+    "Es lo peor que he comprado, muy decepcionado.",
+    "¡Me fascina! Sin duda volveré a comprar.",
+    "No cumple con las expectativas, esperaba mucho más.",
+    "Es un buen producto, aunque un poco caro.",
+    "Muy satisfecho con la compra, todo perfecto.",
+    "El producto está bien, pero no es lo que esperaba.",
+    "Este código es una mierda, el desarrollador es un gilipollas.",
+    "Necesito ayuda con mi proyecto, ¿alguien puede ayudarme?",
+]
+
+def export_model(model_name: str, output_dir: str, quantize: bool = True) -> None:
+    """Exporta el modelo a ONNX con ejes dinámicos de lote y secuencia"""
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["texto de ejemplo", "otro texto"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    export_kwargs = {}
+    # Las versiones recientes de torch usan el exportador dynamo por defecto
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **export_kwargs
+        )
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    print(f"Modelo exportado en {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantized_path = os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print(f"Modelo cuantizado (int8) en {quantized_path}")
+
+def _stars_score(label: str) -> float:
+    # Misma escala que analyze_emotion_transformers: estrellas / 5
+    return float(label.split()[0]) / 5.0
+
+def _latency(analyzer, texts: List[str], repeats: int) -> Dict[str, float]:
+    """Latencia por texto individual y rendimiento del lote completo"""
+    single = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            analyzer(text)
+            single.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        analyzer(texts)
+    batch_elapsed = time.perf_counter() - start
+    return {
+        "single_p50_ms": statistics.median(single) * 1000,
+        "single_mean_ms": statistics.mean(single) * 1000,
+        "batch_texts_per_second": len(texts) * repeats / batch_elapsed
+    }
+
+def check_parity(model_name: str, model_dir: str, texts: List[str] = PARITY_TEXTS, repeats: int = 3) -> Dict[str, Any]:
+    """Compara etiquetas, scores y latencia de los modelos ONNX con el pipeline de PyTorch"""
+    reference = pipeline("sentiment-analysis", model=model_name, device=-1)
+    reference_results = [reference(text, truncation=True)[0] for text in texts]
+    report = {"texts": len(texts), "pytorch": _latency(reference, texts, repeats), "onnx": {}}
+
+    for quantized in (False, True):
+        name = "int8" if quantized else "fp32"
+        try:
+            analyzer = OnnxSentimentPipeline(model_dir, quantized=quantized)
+        except FileNotFoundError as e:
+            print(e)
+            continue
+        results = analyzer(texts)
+        score_diffs = [
+            abs(_stars_score(result["label"]) - _stars_score(expected["label"]))
+            for result, expected in zip(results, reference_results)
+        ]
+        report["onnx"][name] = {
+            "label_agreement": sum(
+                result["label"] == expected["label"] for result, expected in zip(results, reference_results)
+            ) / len(texts),
+            "mean_score_diff": statistics.mean(score_diffs),
+            "max_score_diff": max(score_diffs),
+            "mean_confidence_diff": statistics.mean(
+                abs(result["score"] - expected["score"]) for result, expected in zip(results, reference_results)
+            ),
+            **_latency(analyzer, texts, repeats)
+        }
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta el modelo de transformers a ONNX")
+    parser.add_argument("--model", default=SENTIMENT_MODELS["transformers"], help="Modelo de Hugging Face o ruta local")
+    parser.add_argument("--output", default=ONNX_MODEL_DIR, help="Directorio de salida")
+    parser.add_argument("--no-quantize", action="store_true", help="No generar la versión int8")
+    parser.add_argument("--check-only", action="store_true", help="Solo ejecutar la comprobación de paridad")
+    parser.add_argument("--skip-check", action="store_true", help="No ejecutar la comprobación de paridad")
+    args = parser.parse_args()
+
+    if not args.check_only:
+        export_model(args.model, args.output, quantize=not args.no_quantize)
+    if not args.skip_check:
+        print(json.dumps(check_parity(args.model, args.output), indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Utilidades de inferencia por lotes y ejecución de modelos fuera del event loop
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, List, Dict, Any
+import asyncio
+import queue
+import threading
+import time
+from config import (
+    TRANSFORMERS_BATCH_SIZE, TRANSFORMERS_MAX_TOKENS, TRANSFORMERS_CHUNK_OVERLAP, TRANSFORMERS_CHUNK_AGGREGATION,
+    MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS,
+    INFERENCE_WORKERS, INFERENCE_MAX_PENDING
+)
+
+class InferenceBusyError(Exception):
+    """Se lanza cuando el pool de inferencia no admite más trabajo pendiente"""
+
+def length_bucketed_batches(lengths: List[int], batch_size: int = TRANSFORMERS_BATCH_SIZE) -> List[List[int]]:
+    """Agrupa índices en mini-lotes de longitudes similares para minimizar el padding"""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+def aggregate_windows(probabilities, weights: List[int], aggregation: str = TRANSFORMERS_CHUNK_AGGREGATION):
+    """Combina las probabilidades de las ventanas de un texto: promedio ponderado por tokens o la ventana más negativa"""
+    import torch
+
+    if len(weights) == 1:
+        return probabilities[0]
+    if aggregation == "min":
+        # Las etiquetas van de la más negativa (1 star) a la más positiva (5 stars)
+        positions = torch.arange(probabilities.shape[-1], dtype=probabilities.dtype)
+        return probabilities[int((probabilities * positions).sum(dim=-1).argmin())]
+    weights = torch.tensor(weights, dtype=probabilities.dtype).unsqueeze(-1)
+    return (probabilities * weights).sum(dim=0) / weights.sum()
+
+def run_pipeline_batch(sentiment_pipeline, texts: List[str], batch_size: int = TRANSFORMERS_BATCH_SIZE,
+                       return_probabilities: bool = False) -> List[Dict[str, Any]]:
+    """Ejecuta el modelo sobre varios textos en mini-lotes y devuelve los resultados en el orden de entrada
+
+    Los textos más largos que el modelo se dividen en ventanas de tokens solapadas
+    que se analizan en la misma pasada y se combinan con aggregate_windows. Con
+    return_probabilities cada resultado incluye además la distribución completa
+    sobre las etiquetas (en el orden de id2label), por ejemplo para destilarla.
+    """
+    if not texts:
+        return []
+
+    # torch se importa aquí para no pagar su coste en procesos que no usan transformers
+    import torch
+
+    tokenizer = sentiment_pipeline.tokenizer
+    model = sentiment_pipeline.model
+    id2label = model.config.id2label
+    max_tokens = min(TRANSFORMERS_MAX_TOKENS, getattr(model.config, "max_position_embeddings", TRANSFORMERS_MAX_TOKENS))
+
+    # Tokenizar todos los textos una sola vez; los que no caben se devuelven como ventanas solapadas
+    encodings = tokenizer(
+        texts, truncation=True, max_length=max_tokens,
+        stride=TRANSFORMERS_CHUNK_OVERLAP, return_overflowing_tokens=True
+    )
+    # Texto al que pertenece cada ventana (los tokenizadores lentos no dividen: una ventana por texto)
+    owners = list(encodings.get("overflow_to_sample_mapping", range(len(texts))))
+    keys = [key for key in encodings.keys() if key != "overflow_to_sample_mapping"]
+
+    probabilities = [None] * len(owners)
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+    for batch_indices in length_bucketed_batches(lengths, batch_size):
+        # Padding solo hasta la ventana más larga del mini-lote
+        batch = tokenizer.pad(
+            {key: [encodings[key][i] for i in batch_indices] for key in keys},
+            return_tensors="pt"
+        )
+        batch = {key: value.to(model.device) for key, value in batch.items()}
+
+        with torch.no_grad():
+            logits = model(**batch).logits
+        batch_probabilities = torch.softmax(logits, dim=-1).cpu()
+        for position, index in enumerate(batch_indices):
+            probabilities[index] = batch_probabilities[position]
+
+    # Reunir las ventanas de cada texto (consecutivas en owners) y devolver los resultados en el orden original
+    results: List[Dict[str, Any]] = []
+    position = 0
+    for index in range(len(texts)):
+        end = position
+        while end < len(owners) and owners[end] == index:
+            end += 1
+        combined = aggregate_windows(torch.stack(probabilities[position:end]), lengths[position:end])
+        score, label_id = combined.max(dim=-1)
+        result = {
+            "label": id2label[int(label_id)],
+            "score": float(score),
+            "windows": end - position
+        }
+        if return_probabilities:
+            result["probabilities"] = combined.tolist()
+        results.append(result)
+        position = end
+
+    return results
+
+class MicroBatcher:
+    """Agrupa textos de peticiones concurrentes y los envía al modelo como un solo lote"""
+
+    def __init__(self, process_batch: Callable[[List[str]], List[Dict[str, Any]]],
+                 max_batch_size: int = MICRO_BATCH_MAX_SIZE, max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        """Encola un texto y devuelve un futuro que se resuelve con su resultado"""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    @property
+    def queued(self) -> int:
+        """Textos esperando a formar el siguiente lote"""
+        return self._queue.qsize()
+
+    def _ensure_started(self) -> None:
+        # El hilo se crea con la primera petición
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Any]:
+        """Espera el primer texto y agrega más hasta llenar el lote o agotar la espera"""
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self) -> None:
+        while True:
+            # Si el hilo muriera, las peticiones siguientes quedarían esperando para siempre
+            try:
+                self._process(self._collect())
+            except Exception as e:
+                print(f"Error en el micro-batcher: {e}")
+
+    def _process(self, items: List[Any]) -> None:
+        # Las peticiones canceladas mientras esperaban (cliente desconectado) no entran en el lote;
+        # las demás pasan a "en curso" y ya no se pueden cancelar
+        items = [(text, future) for text, future in items if future.set_running_or_notify_cancel()]
+        if not items:
+            return
+        try:
+            results = self.process_batch([text for text, _ in items])
+            if len(results) != len(items):
+                raise RuntimeError(f"El lote devolvió {len(results)} resultados para {len(items)} textos")
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            future.set_result(result)
+
+class InferenceExecutor:
+    """Pool acotado de hilos para el análisis de CPU, con control de saturación"""
+
+    def __init__(self, max_workers: int = INFERENCE_WORKERS, max_pending: int = INFERENCE_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Número de análisis en curso o en cola"""
+        return self._pending
+
+    @contextmanager
+    def _reserve(self):
+        # Rechazar de inmediato en lugar de acumular trabajo sin límite
+        if not self._slots.acquire(blocking=False):
+            raise InferenceBusyError(f"Servidor saturado: {self.max_pending} análisis pendientes")
+        with self._lock:
+            self._pending += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Ejecuta una función bloqueante en el pool y espera su resultado sin bloquear el event loop"""
+        with self._reserve():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def run_when_available(self, func: Callable, *args, retry_seconds: float = 0.02, **kwargs) -> Any:
+        """Como run, pero espera a que se libere capacidad en lugar de rechazar el trabajo"""
+        while True:
+            try:
+                return await self.run(func, *args, **kwargs)
+            except InferenceBusyError:
+                await asyncio.sleep(retry_seconds)
+
+    async def submit_batched(self, batcher: MicroBatcher, text: str) -> Any:
+        """Envía un texto al micro-batcher contando contra el mismo límite de trabajo pendiente"""
+        with self._reserve():
+            return await asyncio.wrap_future(batcher.submit(text))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,148 @@
+"""
+Identificación rápida del idioma con n-gramas de caracteres (Bayes ingenuo)
+
+El modelo se entrena al cargarse con las frases de LANGUAGE_SAMPLES: por cada
+idioma, la log-probabilidad suavizada de cada unigrama, bigrama y trigrama de
+caracteres. Detectar un texto es sumar las filas de sus n-gramas en una matriz
+de NumPy (decenas de microsegundos). Sirve para enrutar cada texto al método de
+análisis más barato adecuado para su idioma.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+import re
+import numpy as np
+
+NGRAM_ORDERS = (1, 2, 3)
+MAX_CHARS = 300  # Basta con el comienzo del texto para decidir
+
+_NON_LETTERS = re.compile(r"[\W\d_]+")
+
+LANGUAGE_SAMPLES: Dict[str, List[str]] = {
+    "es": [
+        "Este producto es increíble, me encanta y lo recomiendo a todos mis amigos.",
+        "No me gustó para nada, la calidad es muy mala y llegó tarde.",
+        "¿Alguien sabe cómo puedo cambiar la contraseña de mi cuenta?",
+        "El servicio al cliente fue excelente, resolvieron mi problema enseguida.",
+        "Estoy muy decepcionado con los resultados del proyecto de este año.",
+        "Mañana vamos a la playa con la familia si no llueve.",
+        "La película estuvo aburrida, pero los actores lo hicieron bien.",
+        "Necesito ayuda con mi tarea de matemáticas, ¿quién me puede explicar?",
+        "Qué buen día hace hoy, vamos a comer algo rico en el centro.",
+        "El gobierno anunció nuevas medidas para la economía del país.",
+        "Gracias por todo, sois los mejores, nos vemos pronto.",
+        "Este código es un desastre, hay que rehacerlo desde cero.",
+        "Mi hermano y yo jugamos al fútbol todos los domingos por la tarde.",
+        "Nunca volveré a comprar en esta tienda, el trato fue horrible.",
+    ],
+    "en": [
+        "This product is amazing, I love it and would recommend it to everyone.",
+        "I did not like it at all, the quality is really bad and it arrived late.",
+        "Does anyone know how I can change the password for my account?",
+        "The customer service was excellent, they solved my problem right away.",
+        "I am very disappointed with the results of the project this year.",
+        "Tomorrow we are going to the beach with the family if it does not rain.",
+        "The movie was boring, but the actors did a good job.",
+        "I need help with my math homework, who can explain it to me?",
+        "What a great day today, let's grab something to eat downtown.",
+        "The government announced new measures for the country's economy.",
+        "Thanks for everything, you are the best, see you soon.",
+        "This code is a mess, we have to rewrite it from scratch.",
+        "My brother and I play football every Sunday afternoon.",
+        "I will never shop at this store again, the service was horrible.",
+    ],
+    "pt": [
+        "Este produto é incrível, eu adoro e recomendo para todos os meus amigos.",
+        "Não gostei nada, a qualidade é muito ruim e chegou atrasado.",
+        "Alguém sabe como posso mudar a senha da minha conta?",
+        "O atendimento ao cliente foi excelente, resolveram meu problema na hora.",
+        "Estou muito decepcionado com os resultados do projeto deste ano.",
+        "Amanhã vamos à praia com a família se não chover.",
+        "O filme foi chato, mas os atores fizeram um bom trabalho.",
+        "Preciso de ajuda com o meu dever de matemática, quem pode me explicar?",
+        "Que dia lindo hoje, vamos comer alguma coisa gostosa no centro.",
+        "O governo anunciou novas medidas para a economia do país.",
+        "Obrigado por tudo, vocês são os melhores, até logo.",
+        "Nunca mais vou comprar nessa loja, o atendimento foi horrível.",
+    ],
+    "fr": [
+        "Ce produit est incroyable, je l'adore et je le recommande à tous mes amis.",
+        "Je n'ai pas aimé du tout, la qualité est très mauvaise et il est arrivé en retard.",
+        "Quelqu'un sait comment je peux changer le mot de passe de mon compte ?",
+        "Le service client était excellent, ils ont résolu mon problème tout de suite.",
+        "Je suis très déçu par les résultats du projet cette année.",
+        "Demain nous allons à la plage avec la famille s'il ne pleut pas.",
+        "Le film était ennuyeux, mais les acteurs ont fait du bon travail.",
+        "J'ai besoin d'aide pour mes devoirs de maths, qui peut m'expliquer ?",
+        "Quelle belle journée aujourd'hui, allons manger quelque chose en ville.",
+        "Le gouvernement a annoncé de nouvelles mesures pour l'économie du pays.",
+        "Merci pour tout, vous êtes les meilleurs, à bientôt.",
+        "Je n'achèterai plus jamais dans ce magasin, l'accueil était horrible.",
+    ],
+    "it": [
+        "Questo prodotto è incredibile, lo adoro e lo consiglio a tutti i miei amici.",
+        "Non mi è piaciuto per niente, la qualità è pessima ed è arrivato in ritardo.",
+        "Qualcuno sa come posso cambiare la password del mio account?",
+        "Il servizio clienti è stato eccellente, hanno risolto subito il mio problema.",
+        "Sono molto deluso dai risultati del progetto di quest'anno.",
+        "Domani andiamo al mare con la famiglia se non piove.",
+        "Il film era noioso, ma gli attori hanno fatto un buon lavoro.",
+        "Ho bisogno di aiuto con i compiti di matematica, chi me lo può spiegare?",
+        "Che bella giornata oggi, andiamo a mangiare qualcosa in centro.",
+        "Il governo ha annunciato nuove misure per l'economia del paese.",
+        "Grazie di tutto, siete i migliori, a presto.",
+        "Non comprerò mai più in questo negozio, il trattamento è stato orribile.",
+    ],
+    "de": [
+        "Dieses Produkt ist unglaublich, ich liebe es und empfehle es allen meinen Freunden.",
+        "Es hat mir überhaupt nicht gefallen, die Qualität ist sehr schlecht und es kam zu spät.",
+        "Weiß jemand, wie ich das Passwort für mein Konto ändern kann?",
+        "Der Kundenservice war ausgezeichnet, sie haben mein Problem sofort gelöst.",
+        "Ich bin sehr enttäuscht von den Ergebnissen des Projekts in diesem Jahr.",
+        "Morgen fahren wir mit der Familie an den Strand, wenn es nicht regnet.",
+        "Der Film war langweilig, aber die Schauspieler haben gute Arbeit geleistet.",
+        "Ich brauche Hilfe bei meinen Mathe-Hausaufgaben, wer kann es mir erklären?",
+        "Was für ein schöner Tag heute, lass uns in der Stadt etwas essen gehen.",
+        "Die Regierung hat neue Maßnahmen für die Wirtschaft des Landes angekündigt.",
+        "Danke für alles, ihr seid die Besten, bis bald.",
+        "Ich werde nie wieder in diesem Laden einkaufen, der Service war schrecklich.",
+    ],
+}
+
+def char_ngrams(text: str, orders: Iterable[int] = NGRAM_ORDERS, max_chars: int = MAX_CHARS) -> List[str]:
+    """N-gramas de caracteres de las palabras del texto (en minúsculas, sin dígitos ni signos)"""
+    padded = " " + _NON_LETTERS.sub(" ", text[:max_chars].lower()).strip() + " "
+    return [padded[start:start + order] for order in orders for start in range(len(padded) - order + 1)]
+
+class LanguageIdentifier:
+    """Clasificador de Bayes ingenuo sobre n-gramas de caracteres"""
+
+    def __init__(self, samples: Dict[str, List[str]] = LANGUAGE_SAMPLES, alpha: float = 0.5):
+        self.languages = list(samples)
+        counts = {language: Counter(ngram for text in texts for ngram in char_ngrams(text))
+                  for language, texts in samples.items()}
+        vocabulary = sorted(set().union(*counts.values()))
+        self._index = {ngram: position for position, ngram in enumerate(vocabulary)}
+        # Una fila por n-grama conocido y una última fila para los desconocidos
+        self._log_probs = np.empty((len(vocabulary) + 1, len(self.languages)))
+        for column, language in enumerate(self.languages):
+            total = sum(counts[language].values()) + alpha * (len(vocabulary) + 1)
+            row_counts = np.array([counts[language].get(ngram, 0) for ngram in vocabulary] + [0], dtype=float)
+            self._log_probs[:, column] = np.log((row_counts + alpha) / total)
+
+    def scores(self, text: str) -> np.ndarray:
+        """Log-verosimilitud del texto para cada idioma"""
+        unknown = len(self._index)
+        rows = [self._index.get(ngram, unknown) for ngram in char_ngrams(text)]
+        return self._log_probs[rows].sum(axis=0)
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """(idioma más probable, probabilidad a posteriori)"""
+        scores = self.scores(text)
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        best = int(probabilities.argmax())
+        return self.languages[best], float(probabilities[best])
+
+    def detect_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        return [self.detect(text) for text in texts]
@@ -0,0 +1,158 @@
+"""
+Léxico recargable en caliente: reemplazos de groserías, umbrales de emoción y plantillas de sugerencias
+
+Los valores de config.py son los predeterminados; el archivo LEXICON_PATH (JSON)
+puede sustituir cualquiera de sus secciones:
+
+    {
+        "profanity_replacements": {"pendejo": "persona", ...},
+        "emotion_thresholds": {"vader": {"very_negative": -0.5, "negative": -0.1, "neutral": 0.1, "positive": 0.5}},
+        "suggestion_templates": {"negative_emotion": [...], "profanity": [...], "length": [...], "positive": [...]}
+    }
+
+"profanity_replacements" y "suggestion_templates" reemplazan la sección completa;
+"emotion_thresholds" se aplica por método (los métodos que no aparecen conservan
+sus umbrales). Cada versión del léxico es inmutable y se identifica por el hash
+de su contenido; recargar construye una versión nueva y la sustituye de una vez.
+"""
+
+from itertools import product
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import os
+import time
+from config import PROFANITY_REPLACEMENTS, EMOTION_THRESHOLDS, SUGGESTION_TEMPLATES, LEXICON_PATH
+
+THRESHOLD_ORDER = ["very_negative", "negative", "neutral", "positive"]
+SUGGESTION_KEYS = ["negative_emotion", "profanity", "length", "positive"]
+SECTIONS = {"profanity_replacements", "emotion_thresholds", "suggestion_templates"}
+
+SuggestionKey = Tuple[bool, bool, bool]
+
+class Lexicon(NamedTuple):
+    version: str
+    source: str
+    loaded_at: float
+    replacements: Dict[str, str]
+    thresholds: Dict[str, Dict[str, float]]
+    suggestion_templates: Dict[str, List[str]]
+    suggestion_table: Dict[SuggestionKey, Tuple[str, ...]]
+
+def compile_suggestion_table(templates: Dict[str, List[str]]) -> Dict[SuggestionKey, Tuple[str, ...]]:
+    """Precalcula las sugerencias para cada combinación de (emoción negativa, groserías, texto largo)"""
+    table = {}
+    for key in product((False, True), repeat=3):
+        negative, profanity, long_text = key
+        suggestions = []
+        if negative:
+            suggestions.extend(templates["negative_emotion"])
+        if profanity:
+            suggestions.extend(templates["profanity"])
+        if long_text:
+            suggestions.extend(templates["length"])
+        # Si no hay sugerencias específicas, dar feedback positivo
+        if not suggestions:
+            suggestions.extend(templates["positive"])
+        # Limitar a máximo 5 sugerencias
+        table[key] = tuple(suggestions[:5])
+    return table
+
+def validate_replacements(replacements: Any) -> Dict[str, str]:
+    if not isinstance(replacements, dict):
+        raise ValueError("'profanity_replacements' debe ser un objeto {grosería: reemplazo}")
+    for word, replacement in replacements.items():
+        if not isinstance(replacement, str) or not word.strip():
+            raise ValueError(f"Reemplazo no válido para '{word}'")
+    return {word.strip().lower(): replacement for word, replacement in replacements.items()}
+
+def validate_thresholds(method: str, thresholds: Any) -> Dict[str, float]:
+    if not isinstance(thresholds, dict) or set(thresholds) != set(THRESHOLD_ORDER):
+        raise ValueError(f"Los umbrales de '{method}' deben definir exactamente {THRESHOLD_ORDER}")
+    values = [thresholds[name] for name in THRESHOLD_ORDER]
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        raise ValueError(f"Los umbrales de '{method}' deben ser numéricos")
+    if values != sorted(values):
+        raise ValueError(f"Los umbrales de '{method}' deben ser crecientes en el orden {THRESHOLD_ORDER}")
+    return {name: float(thresholds[name]) for name in THRESHOLD_ORDER}
+
+def validate_templates(templates: Any) -> Dict[str, List[str]]:
+    if not isinstance(templates, dict) or set(templates) != set(SUGGESTION_KEYS):
+        raise ValueError(f"'suggestion_templates' debe definir exactamente {SUGGESTION_KEYS}")
+    for key, suggestions in templates.items():
+        if not isinstance(suggestions, list) or not all(isinstance(item, str) for item in suggestions):
+            raise ValueError(f"Las sugerencias de '{key}' deben ser una lista de textos")
+    return {key: list(templates[key]) for key in SUGGESTION_KEYS}
+
+def build_lexicon(data: Dict[str, Any], source: str = "config") -> Lexicon:
+    """Valida las secciones del archivo, las combina con los valores de config.py y calcula la versión"""
+    if not isinstance(data, dict):
+        raise ValueError("El léxico debe ser un objeto JSON")
+    unknown = set(data) - SECTIONS
+    if unknown:
+        raise ValueError(f"Secciones desconocidas en el léxico: {sorted(unknown)}")
+
+    replacements = validate_replacements(data.get("profanity_replacements", PROFANITY_REPLACEMENTS))
+    overrides = data.get("emotion_thresholds", {})
+    if not isinstance(overrides, dict):
+        raise ValueError("'emotion_thresholds' debe ser un objeto {método: umbrales}")
+    thresholds = {
+        method: validate_thresholds(method, values)
+        for method, values in {**EMOTION_THRESHOLDS, **overrides}.items()
+    }
+    templates = validate_templates(data.get("suggestion_templates", SUGGESTION_TEMPLATES))
+
+    content = json.dumps([replacements, thresholds, templates], sort_keys=True, ensure_ascii=False)
+    return Lexicon(
+        version=hashlib.sha256(content.encode("utf-8")).hexdigest()[:12],
+        source=source,
+        loaded_at=time.time(),
+        replacements=replacements,
+        thresholds=thresholds,
+        suggestion_templates=templates,
+        suggestion_table=compile_suggestion_table(templates)
+    )
+
+class LexiconStore:
+    """Versión vigente del léxico y lectura del archivo que la define"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._stamp: Optional[Tuple[int, int]] = None
+        self.current = self.load()
+
+    def load(self) -> Lexicon:
+        """Lee el archivo (o los valores de config.py si no existe) sin cambiar la versión vigente"""
+        # Se anota antes de leer para no reintentar en bucle un archivo inválido que no cambia
+        self._stamp = self.file_stamp()
+        if self._stamp is None:
+            return build_lexicon({})
+        with open(self.path, encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                raise ValueError(f"El léxico {self.path} no es JSON válido: {e}")
+        return build_lexicon(data, source=self.path)
+
+    def changed(self) -> bool:
+        """Si el archivo cambió (o apareció o desapareció) desde la última lectura"""
+        return self.file_stamp() != self._stamp
+
+    def swap(self, lexicon: Lexicon) -> None:
+        # Una sola asignación: cada lectura de current ve la versión anterior o la nueva completas
+        self.current = lexicon
+
+    def file_stamp(self) -> Optional[Tuple[int, int]]:
+        if not self.path:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+lexicon_store = LexiconStore(LEXICON_PATH)
+
+def current_lexicon() -> Lexicon:
+    """Versión vigente del léxico"""
+    return lexicon_store.current
@@ -1,26 +1,69 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-import torch
-from transformers import pipeline
-from spanlp.palabrota import Palabrota
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from spanlp.domain.strategies import JaccardIndex
+from contextlib import asynccontextmanager
+import asyncio
+import random
 import re
+import secrets
+import threading
 import time
-from config import SENTIMENT_MODELS, DEFAULT_SENTIMENT_METHOD, SENTIMENT_ANALYSIS_CONFIG
+from config import (
+    SENTIMENT_MODELS, STUDENT_MODEL_PATH, DEFAULT_SENTIMENT_METHOD, SENTIMENT_ANALYSIS_CONFIG, TRANSFORMERS_BATCH_SIZE,
+    MICRO_BATCH_ENABLED, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS,
+    INFERENCE_WORKERS, INFERENCE_MAX_PENDING, TORCH_NUM_THREADS,
+    RESULT_CACHE_ENABLED, RESULT_CACHE_MAX_SIZE, RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_DB_PATH,
+    RESULT_CACHE_DB_MAX_ROWS, RESULT_CACHE_DB_FLUSH_SECONDS,
+    NEAR_DUPLICATE_ENABLED, NEAR_DUPLICATE_MAX_DISTANCE, NEAR_DUPLICATE_REUSE, NEAR_DUPLICATE_MIN_WORDS,
+    NEAR_DUPLICATE_MAX_ENTRIES, NEAR_DUPLICATE_TTL_SECONDS,
+    PROFANITY_COUNTRIES, LEXICON_WATCH_INTERVAL_SECONDS, ADMIN_TOKEN,
+    AUTO_METHOD, LANGUAGE_ROUTING_ENABLED, LANGUAGE_ROUTES, LANGUAGE_ROUTE_DEFAULT,
+    LANGUAGE_MIN_CONFIDENCE, LANGUAGE_MIN_LENGTH,
+    PROFANITY_FUZZY_ENABLED, PROFANITY_FUZZY_THRESHOLD, PROFANITY_FUZZY_MIN_LENGTH,
+    TRANSFORMERS_BACKEND, ONNX_MODEL_DIR, ONNX_USE_QUANTIZED, MODEL_PRELOAD, MODEL_RETRY_SECONDS,
+    STREAM_BATCH_SIZE, STREAM_MAX_LINE_BYTES, STREAM_BUSY_RETRY_MS, ENSEMBLE_CHEAP_METHODS, METHOD_BENCHMARK_REPORT,
+    METRICS_ENABLED, METRICS_LATENCY_BUCKETS,
+    PROFILING_ENABLED, PROFILING_MODE, PROFILING_SAMPLE_RATE, PROFILING_INTERVAL_MS, PROFILING_DIR, PROFILING_MAX_FILES
+)
+from streaming import iter_ndjson_batches, NDJSONStreamingResponse
+from responses import FastJSONResponse, dumps_line, precompile_fragments
+from models import ModelRegistry
+from preprocessing import preprocess
+from lexicon import Lexicon, lexicon_store, current_lexicon
+from langid import LanguageIdentifier
+from student import StudentModel
+from metrics import MetricsRegistry, StageTimer
+from profiling import RequestProfiler, list_profiles, prune_profiles, profile_path
+from profanity import ProfanityMatcher, FuzzyProfanityIndex, load_spanlp_words, merge_matches
+from cache import ResultCache, make_cache_key
+from neardup import NearDuplicateIndex, content_key
+from ensemble import escalation_reason, fuse_results
+from inference import run_pipeline_batch, MicroBatcher, InferenceExecutor, InferenceBusyError
 from utils import (
     get_emotion_label, generate_suggestions, correct_text, 
-    calculate_confidence, validate_input, get_method_info, compare_methods
+    calculate_confidence, validate_input, get_method_info, compare_methods, load_benchmark_report,
+    get_emotion_labels, offensive_flags, calculate_confidences, normalize_score
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia la carga en segundo plano de los modelos configurados al arrancar el servidor"""
+    model_registry.preload(MODEL_PRELOAD)
+    watcher = asyncio.create_task(watch_lexicon()) if LEXICON_WATCH_INTERVAL_SECONDS > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    inference_executor.shutdown()
+    result_cache.flush()
+
 # Configuración de la API
 app = FastAPI(
     title="API de Validación de Textos para Redes Sociales",
     description="API que valida textos para detectar emociones negativas y groserías antes de publicar en redes sociales. Integra múltiples métodos de análisis: Transformers (BERT), TextBlob y VADER.",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -35,8 +78,11 @@ app.add_middleware(
 # Modelos de datos
 class TextRequest(BaseModel):
     text: str
-    language: str = "es"
-    sentiment_method: Optional[str] = DEFAULT_SENTIMENT_METHOD
+    language: Optional[str] = None  # None o "auto": se detecta si hace falta para elegir el método
+    sentiment_method: Optional[str] = None  # None o "auto": el método se elige según el idioma
+    include_timings: bool = False  # Incluir en la respuesta el tiempo de cada etapa
+    include_method_info: bool = True  # Omitir method_info reduce el tamaño de la respuesta
+    include_suggestions: bool = True
 
 class TextResponse(BaseModel):
     original_text: str
@@ -45,43 +91,145 @@ class TextResponse(BaseModel):
     emotion_score: float
     emotion_label: str
     profanity_count: int
-    suggestions: List[str]
+    suggestions: Optional[List[str]] = None
     corrected_text: str
     confidence: float
     sentiment_method: str
-    method_info: Dict[str, Any]
+    method_info: Optional[Dict[str, Any]] = None
+    routing: Optional[Dict[str, Any]] = None
+    near_duplicate: Optional[Dict[str, Any]] = None
     processing_time: float
+    stage_timings: Optional[Dict[str, float]] = None
 
 class MethodComparisonResponse(BaseModel):
     methods: Dict[str, Any]
     recommended: str
+    recommended_by_traffic: Optional[Dict[str, str]] = None
+    benchmark: Optional[Dict[str, Any]] = None
 
-# Inicializar modelos
-print("Cargando modelos de análisis de sentimientos...")
+# Registro de modelos: cada backend se carga al usarse por primera vez
+# o en segundo plano al arrancar (MODEL_PRELOAD), sin bloquear el servidor
+model_registry = ModelRegistry(retry_seconds=MODEL_RETRY_SECONDS)
 
-# Modelo de análisis de sentimientos en español (Opción 2 del proyecto)
-sentiment_analyzer = pipeline(
-    "sentiment-analysis",
-    model=SENTIMENT_MODELS["transformers"],
-    device=0 if torch.cuda.is_available() else -1
-)
+def load_transformers_model():
+    """Carga el modelo de transformers (Opción 2 del proyecto)"""
+    import torch
+    
+    # Repartir los núcleos entre los hilos del pool de inferencia
+    torch.set_num_threads(TORCH_NUM_THREADS)
+    
+    if TRANSFORMERS_BACKEND == "onnx":
+        # Grafo ONNX exportado con export_onnx.py (opcionalmente cuantizado a int8)
+        from onnx_backend import OnnxSentimentPipeline
+        return OnnxSentimentPipeline(
+            ONNX_MODEL_DIR,
+            quantized=ONNX_USE_QUANTIZED,
+            num_threads=TORCH_NUM_THREADS
+        )
+    
+    from transformers import pipeline
+    return pipeline(
+        "sentiment-analysis",
+        model=SENTIMENT_MODELS["transformers"],
+        device=0 if torch.cuda.is_available() else -1
+    )
+
+def load_textblob():
+    """Importa TextBlob (arrastra nltk, por eso no se hace al importar el módulo)"""
+    from textblob import TextBlob
+    return TextBlob
+
+def load_vader():
+    """Inicializa VADER para análisis rápido"""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+def load_student_model():
+    """Carga el modelo alumno entrenado con train_student.py (solo NumPy)"""
+    return StudentModel.load(STUDENT_MODEL_PATH)
+
+def load_profanity_lexicon(lexicon: Optional[Lexicon] = None) -> List[str]:
+    """Léxico de groserías: listas de spanlp + reemplazos del léxico (el vigente por defecto)"""
+    return load_spanlp_words(PROFANITY_COUNTRIES) + list((lexicon or current_lexicon()).replacements)
+
+def load_profanity_matcher(lexicon: Optional[Lexicon] = None):
+    """Compila el léxico de groserías en el autómata exacto"""
+    return ProfanityMatcher(load_profanity_lexicon(lexicon))
+
+def load_fuzzy_profanity_index(lexicon: Optional[Lexicon] = None):
+    """Construye el índice aproximado de groserías ofuscadas"""
+    return FuzzyProfanityIndex(
+        load_profanity_lexicon(lexicon),
+        threshold=PROFANITY_FUZZY_THRESHOLD,
+        min_length=PROFANITY_FUZZY_MIN_LENGTH
+    )
+
+model_registry.register("transformers", load_transformers_model)
+model_registry.register("textblob", load_textblob)
+model_registry.register("vader", load_vader)
+model_registry.register("student", load_student_model)
+model_registry.register("profanity", load_profanity_matcher)
+model_registry.register("profanity_fuzzy", load_fuzzy_profanity_index)
+model_registry.register("langid", LanguageIdentifier)
+
+PROFANITY_LOADERS = {"profanity": load_profanity_matcher, "profanity_fuzzy": load_fuzzy_profanity_index}
+lexicon_reload_lock = threading.Lock()
+
+def reload_lexicon() -> Dict[str, Any]:
+    """Lee de nuevo el léxico, recompila los detectores de groserías y sustituye ambos sin detener el servicio"""
+    with lexicon_reload_lock:
+        previous = current_lexicon()
+        # Si el archivo no es válido se lanza ValueError y sigue vigente la versión anterior
+        lexicon = lexicon_store.load()
+        if lexicon.version == previous.version:
+            return {"reloaded": False, "version": lexicon.version}
+        
+        # Recompilar fuera del camino de las peticiones, que siguen usando los detectores actuales;
+        # los que aún no se cargaron usarán el nuevo léxico al cargarse
+        rebuilt = {}
+        if set(lexicon.replacements) != set(previous.replacements):
+            for name, loader in PROFANITY_LOADERS.items():
+                if model_registry.wait(name):
+                    rebuilt[name] = loader(lexicon)
+        
+        # La versión forma parte de la clave del caché: los resultados anteriores dejan de usarse
+        model_registry.replace(rebuilt)
+        lexicon_store.swap(lexicon)
+        print(f"Léxico recargado: versión {previous.version} -> {lexicon.version} ({lexicon.source})")
+        return {
+            "reloaded": True,
+            "version": lexicon.version,
+            "previous_version": previous.version,
+            "rebuilt_models": list(rebuilt)
+        }
 
-# Inicializar spanlp para detección de groserías
-profanity_detector = Palabrota()
-jaccard = JaccardIndex(threshold=0.9, normalize=True, n_gram=1)
-# Inicializar VADER para análisis rápido
-vader_analyzer = SentimentIntensityAnalyzer()
+async def watch_lexicon():
+    """Recarga el léxico en segundo plano cuando cambia su archivo"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(LEXICON_WATCH_INTERVAL_SECONDS)
+        if not lexicon_store.changed():
+            continue
+        try:
+            await loop.run_in_executor(None, reload_lexicon)
+        except Exception as e:
+            print(f"Error recargando el léxico: {e}")
 
-print("Modelos cargados exitosamente!")
+def gpu_available() -> Optional[bool]:
+    """Disponibilidad de GPU, solo cuando el modelo de transformers ya importó torch"""
+    if not model_registry.is_ready("transformers"):
+        return None
+    import torch
+    return torch.cuda.is_available()
 
 def analyze_emotion_transformers(text: str) -> Dict[str, Any]:
     """Analiza la emoción del texto usando transformers (Opción 2 del proyecto)"""
     try:
-        # Normalizar el texto
-        normalized_text = normalizer.normalize(text)
+        # Texto normalizado del preprocesamiento compartido
+        normalized_text = preprocess(text).normalized
         
-        # Analizar sentimiento
-        result = sentiment_analyzer(normalized_text[:512])  # Limitar longitud para el modelo
+        # Analizar sentimiento (los textos largos se dividen en ventanas de tokens)
+        result = run_pipeline_batch(model_registry.get("transformers"), [normalized_text], TRANSFORMERS_BATCH_SIZE)
         
         # Convertir puntuación de 1-5 a 0-1
         score = float(result[0]['label'].split()[0]) / 5.0
@@ -98,14 +246,15 @@ def analyze_emotion_transformers(text: str) -> Dict[str, Any]:
             "score": 0.5,
             "label": "Neutral",
             "confidence": 0.0,
-            "method": "transformers"
+            "method": "transformers",
+            "fallback": True  # Resultado por defecto: no se guarda en el caché
         }
 
 def analyze_emotion_textblob(text: str) -> Dict[str, Any]:
     """Analiza la emoción del texto usando TextBlob"""
     try:
         # Crear objeto TextBlob
-        blob = TextBlob(text)
+        blob = model_registry.get("textblob")(preprocess(text).normalized)
         
         # Obtener polaridad (-1 a 1) y subjetividad (0 a 1)
         polarity = blob.sentiment.polarity
@@ -124,14 +273,15 @@ def analyze_emotion_textblob(text: str) -> Dict[str, Any]:
             "score": 0.0,
             "label": "Neutral",
             "confidence": 0.0,
-            "method": "textblob"
+            "method": "textblob",
+            "fallback": True
         }
 
 def analyze_emotion_vader(text: str) -> Dict[str, Any]:
     """Analiza la emoción del texto usando VADER"""
     try:
         # Analizar sentimiento con VADER
-        scores = vader_analyzer.polarity_scores(text)
+        scores = model_registry.get("vader").polarity_scores(preprocess(text).normalized)
         
         # Obtener score compuesto (-1 a 1)
         compound_score = scores['compound']
@@ -149,29 +299,220 @@ def analyze_emotion_vader(text: str) -> Dict[str, Any]:
             "score": 0.0,
             "label": "Neutral",
             "confidence": 0.0,
-            "method": "vader"
+            "method": "vader",
+            "fallback": True
         }
 
+def analyze_emotion_student(text: str) -> Dict[str, Any]:
+    """Analiza la emoción del texto usando el modelo alumno"""
+    return analyze_emotion_student_batch([text])[0]
+
 def analyze_emotion(text: str, method: str = DEFAULT_SENTIMENT_METHOD) -> Dict[str, Any]:
     """Analiza la emoción del texto usando el método especificado"""
     if method == "transformers":
         return analyze_emotion_transformers(text)
+    elif method == "student":
+        return analyze_emotion_student(text)
     elif method == "textblob":
         return analyze_emotion_textblob(text)
     elif method == "vader":
         return analyze_emotion_vader(text)
+    elif method == "ensemble":
+        return analyze_emotion_ensemble(text)
     else:
         print(f"Método '{method}' no reconocido, usando transformers por defecto")
         return analyze_emotion_transformers(text)
 
+def analyze_emotion_ensemble(text: str) -> Dict[str, Any]:
+    """Combina VADER y TextBlob, consultando a transformers solo en los casos dudosos"""
+    results = [analyze_emotion(text, method) for method in ENSEMBLE_CHEAP_METHODS]
+    reason = escalation_reason(results)
+    if reason is not None:
+        results.append(analyze_emotion_transformers(text))
+    return fuse_results(results, reason)
+
+def models_for_method(method: str) -> List[str]:
+    """Modelos del registro que necesita un método de análisis"""
+    if method == AUTO_METHOD:
+        routed = set(LANGUAGE_ROUTES.values()) | {LANGUAGE_ROUTE_DEFAULT}
+        return ["langid"] + sorted({name for routed_method in routed for name in models_for_method(routed_method)})
+    if method == "ensemble":
+        return ENSEMBLE_CHEAP_METHODS + ["transformers"]
+    return [method if method in SENTIMENT_MODELS else "transformers"]
+
+def analyze_emotion_transformers_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Analiza la emoción de varios textos usando transformers en mini-lotes"""
+    try:
+        # Una sola tokenización y mini-lotes agrupados por longitud
+        normalized_texts = [preprocess(text).normalized for text in texts]
+        batch_results = run_pipeline_batch(model_registry.get("transformers"), normalized_texts, TRANSFORMERS_BATCH_SIZE)
+        if METRICS_ENABLED:
+            model_batch_size.observe(len(texts))
+    except Exception as e:
+        print(f"Error en análisis de emoción por lotes con transformers: {e}")
+        return [analyze_emotion_transformers(text) for text in texts]
+
+    # Convertir puntuación de 1-5 a 0-1 y etiquetar todo el lote de una vez
+    scores = [float(result['label'].split()[0]) / 5.0 for result in batch_results]
+    labels = get_emotion_labels(scores, "transformers")
+    return [
+        {
+            "score": score,
+            "label": label,
+            "confidence": result['score'],
+            "method": "transformers"
+        }
+        for score, label, result in zip(scores, labels.tolist(), batch_results)
+    ]
+
+def analyze_emotion_student_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Analiza la emoción de varios textos con el modelo alumno en una sola pasada vectorizada"""
+    # Sin el archivo del modelo no hay resultado que dar: el error llega al cliente (503) en vez de un neutral inventado
+    student = model_registry.get("student")
+    try:
+        scores, confidences = student.predict([preprocess(text).normalized for text in texts])
+    except Exception as e:
+        print(f"Error en análisis de emoción con el modelo alumno: {e}")
+        return [
+            {"score": 0.5, "label": "Neutral", "confidence": 0.0, "method": "student", "fallback": True}
+            for _ in texts
+        ]
+
+    labels = get_emotion_labels(scores, "student")
+    return [
+        {
+            "score": score,
+            "label": label,
+            "confidence": confidence,
+            "method": "student"
+        }
+        for score, label, confidence in zip(scores.tolist(), labels.tolist(), confidences.tolist())
+    ]
+
+def analyze_emotion_batch(texts: List[str], method: str = DEFAULT_SENTIMENT_METHOD) -> List[Dict[str, Any]]:
+    """Analiza la emoción de varios textos usando el método especificado"""
+    if method == "transformers" or method not in SENTIMENT_MODELS:
+        return analyze_emotion_transformers_batch(texts)
+    if method == "student":
+        return analyze_emotion_student_batch(texts)
+    if method == "ensemble":
+        return analyze_emotion_ensemble_batch(texts)
+    return [analyze_emotion(text, method) for text in texts]
+
+def analyze_emotion_ensemble_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """Ensemble por lotes: solo los textos dudosos pasan, en un único lote, por transformers"""
+    cheap_results = [[analyze_emotion(text, method) for method in ENSEMBLE_CHEAP_METHODS] for text in texts]
+    reasons = [escalation_reason(results) for results in cheap_results]
+    escalated = [index for index, reason in enumerate(reasons) if reason is not None]
+    if escalated:
+        transformers_results = analyze_emotion_transformers_batch([texts[index] for index in escalated])
+        for index, transformers_result in zip(escalated, transformers_results):
+            cheap_results[index].append(transformers_result)
+    return [fuse_results(results, reason) for results, reason in zip(cheap_results, reasons)]
+
+# Agrupador de peticiones individuales para transformers
+transformers_batcher = MicroBatcher(
+    analyze_emotion_transformers_batch,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS
+)
+
+# Pool dedicado para el trabajo de CPU de los modelos
+inference_executor = InferenceExecutor(max_workers=INFERENCE_WORKERS, max_pending=INFERENCE_MAX_PENDING)
+
+async def analyze_emotion_async(text: str, method: str = DEFAULT_SENTIMENT_METHOD) -> Dict[str, Any]:
+    """Analiza la emoción fuera del event loop, agrupando en micro-lotes las peticiones de transformers"""
+    if method == "transformers" and MICRO_BATCH_ENABLED:
+        return await inference_executor.submit_batched(transformers_batcher, text)
+    if method == "ensemble":
+        return await analyze_emotion_ensemble_async(text)
+    return await inference_executor.run(analyze_emotion, text, method)
+
+def analyze_emotion_cheap(text: str) -> List[Dict[str, Any]]:
+    """Resultados de los métodos rápidos del ensemble (microsegundos, en una sola tarea del pool)"""
+    return [analyze_emotion(text, method) for method in ENSEMBLE_CHEAP_METHODS]
+
+async def analyze_emotion_ensemble_async(text: str) -> Dict[str, Any]:
+    """Ensemble fuera del event loop: los casos dudosos se agrupan en los micro-lotes de transformers"""
+    results = await inference_executor.run(analyze_emotion_cheap, text)
+    reason = escalation_reason(results)
+    if reason is not None:
+        results.append(await analyze_emotion_async(text, "transformers"))
+    return fuse_results(results, reason)
+
+async def ensure_model(name: str) -> bool:
+    """Carga el modelo en un hilo si aún no está listo (sin bloquear el event loop); devuelve si está cargado"""
+    if model_registry.is_ready(name):
+        return True
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, model_registry.get, name)
+    except RuntimeError:
+        return False
+    return True
+
+def is_valid_method(method: str) -> bool:
+    """Indica si el método pedido por el cliente es uno de los disponibles"""
+    return method == AUTO_METHOD or method in SENTIMENT_MODELS
+
+def invalid_method_error(method: str) -> HTTPException:
+    """400 para un método desconocido, con la lista de métodos disponibles"""
+    return HTTPException(
+        status_code=400,
+        detail=f"Método '{method}' no válido. Métodos disponibles: {list(SENTIMENT_MODELS.keys()) + [AUTO_METHOD]}"
+    )
+
+def student_unavailable_error() -> HTTPException:
+    """503 para los métodos que necesitan el modelo alumno cuando no se pudo cargar"""
+    error = model_registry.status()["student"]["error"]
+    return HTTPException(status_code=503, detail=f"El modelo alumno no está disponible: {error}")
+
+def route_text(text: str, language: Optional[str] = None) -> Dict[str, Any]:
+    """Elige el método más barato adecuado para el idioma del texto (indicado por el cliente o detectado)"""
+    if language and language != AUTO_METHOD:
+        # "es-MX" -> "es"
+        detected, confidence, source = language.lower().split("-")[0], 1.0, "request"
+    else:
+        normalized = preprocess(text).normalized
+        if len(normalized) < LANGUAGE_MIN_LENGTH:
+            detected, confidence, source = None, 0.0, "too_short"
+        else:
+            try:
+                detected, confidence = model_registry.get("langid").detect(normalized)
+                source = "detected"
+            except RuntimeError:
+                detected, confidence, source = None, 0.0, "detector_unavailable"
+    
+    if source in ("too_short", "detector_unavailable"):
+        method, reason = LANGUAGE_ROUTE_DEFAULT, source
+    elif confidence < LANGUAGE_MIN_CONFIDENCE:
+        method, reason = LANGUAGE_ROUTE_DEFAULT, "low_confidence"
+    elif detected not in LANGUAGE_ROUTES:
+        method, reason = LANGUAGE_ROUTE_DEFAULT, "no_route"
+    else:
+        method, reason = LANGUAGE_ROUTES[detected], "language_route"
+    if METRICS_ENABLED:
+        language_routes_total.inc(language=detected or "unknown", method=method)
+    return {"language": detected, "confidence": confidence, "source": source, "method": method, "reason": reason}
+
+# Método de /validate cuando el cliente no indica sentiment_method
+VALIDATE_DEFAULT_METHOD = AUTO_METHOD if LANGUAGE_ROUTING_ENABLED else DEFAULT_SENTIMENT_METHOD
+
+def requested_method(request: TextRequest) -> str:
+    """Método pedido por el cliente; AUTO_METHOD si hay que elegirlo por idioma"""
+    return request.sentiment_method or VALIDATE_DEFAULT_METHOD
+
 def detect_profanity(text: str) -> Dict[str, Any]:
-    """Detecta groserías usando spanlp"""
+    """Detecta groserías con el autómata compilado a partir de spanlp y el índice aproximado"""
     try:
-        # Normalizar el texto
-        jaccard = JaccardIndex(threshold=0.9, normalize=True, n_gram=1)
+        # Una sola pasada sobre el texto ya pasado a minúsculas en el preprocesamiento
+        document = preprocess(text)
+        profanity_matches = model_registry.get("profanity").find(document.text, document.folded)
         
-        # Detectar groserías
-        profanity_words = profanity_detector.palabrotas(jaccard.normalize(text))
+        # Añadir variantes ofuscadas que no coinciden de forma exacta
+        if PROFANITY_FUZZY_ENABLED:
+            fuzzy_matches = model_registry.get("profanity_fuzzy").find(document.text, document.tokens)
+            profanity_matches = merge_matches(profanity_matches, fuzzy_matches)
+        profanity_words = [match["text"] for match in profanity_matches]
         
         # Contar groserías
         profanity_count = len(profanity_words)
@@ -182,16 +523,237 @@ def detect_profanity(text: str) -> Dict[str, Any]:
         return {
             "has_profanity": is_offensive,
             "profanity_count": profanity_count,
-            "profanity_words": profanity_words
+            "profanity_words": profanity_words,
+            "profanity_matches": profanity_matches
         }
     except Exception as e:
         print(f"Error en detección de groserías: {e}")
         return {
             "has_profanity": False,
             "profanity_count": 0,
-            "profanity_words": []
+            "profanity_words": [],
+            "profanity_matches": []
         }
 
+# Caché de resultados de validación
+result_cache = ResultCache(
+    max_size=RESULT_CACHE_MAX_SIZE,
+    ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+    db_path=RESULT_CACHE_DB_PATH,
+    db_max_rows=RESULT_CACHE_DB_MAX_ROWS,
+    flush_seconds=RESULT_CACHE_DB_FLUSH_SECONDS
+)
+
+# Huellas de los textos validados recientemente para reconocer variantes del mismo mensaje
+near_duplicate_index = NearDuplicateIndex(
+    max_distance=NEAR_DUPLICATE_MAX_DISTANCE,
+    max_entries=NEAR_DUPLICATE_MAX_ENTRIES,
+    ttl_seconds=NEAR_DUPLICATE_TTL_SECONDS,
+    min_words=NEAR_DUPLICATE_MIN_WORDS
+)
+
+# Métricas de Prometheus (/metrics)
+metrics_registry = MetricsRegistry()
+requests_total = metrics_registry.counter(
+    "validation_requests_total", "Peticiones de validación por endpoint, método y resultado",
+    ["endpoint", "method", "outcome"]
+)
+request_seconds = metrics_registry.histogram(
+    "validation_request_seconds", "Duración total de las peticiones de validación",
+    METRICS_LATENCY_BUCKETS, ["endpoint", "method"]
+)
+stage_seconds = metrics_registry.histogram(
+    "validation_stage_seconds", "Duración de cada etapa de /validate",
+    METRICS_LATENCY_BUCKETS, ["method", "stage"]
+)
+batch_stage_seconds = metrics_registry.histogram(
+    "validation_batch_stage_seconds", "Duración de cada etapa de un lote de /validate/batch, /validate/stream o bulk.py",
+    METRICS_LATENCY_BUCKETS, ["method", "stage"]
+)
+language_routes_total = metrics_registry.counter(
+    "language_routes_total", "Textos enrutados por idioma detectado y método elegido", ["language", "method"]
+)
+near_duplicates_total = metrics_registry.counter(
+    "near_duplicate_matches_total", "Textos de /validate casi iguales a uno reciente, por método y si se reutilizó su emoción",
+    ["method", "reused"]
+)
+batches_total = metrics_registry.counter(
+    "validation_batches_total", "Lotes validados por endpoint y método", ["endpoint", "method"]
+)
+batch_texts_total = metrics_registry.counter(
+    "validation_batch_texts_total", "Textos validados en lotes por endpoint y método", ["endpoint", "method"]
+)
+model_batch_size = metrics_registry.histogram(
+    "transformers_batch_size", "Textos por llamada al modelo de transformers", [1, 2, 4, 8, 16, 32, 64, 128]
+)
+metrics_registry.gauge("result_cache_entries", "Entradas en el caché de resultados", lambda: result_cache.stats()["size"])
+metrics_registry.gauge("result_cache_hits_total", "Aciertos del caché de resultados", lambda: result_cache.hits, metric_type="counter")
+metrics_registry.gauge("result_cache_misses_total", "Fallos del caché de resultados", lambda: result_cache.misses, metric_type="counter")
+metrics_registry.gauge("near_duplicate_entries", "Huellas en el índice de casi duplicados", lambda: near_duplicate_index.stats()["entries"])
+metrics_registry.gauge("inference_pending", "Análisis en curso o en cola en el pool de inferencia", lambda: inference_executor.pending)
+metrics_registry.gauge("micro_batch_queued", "Textos esperando a formar un micro-lote de transformers", lambda: transformers_batcher.queued)
+metrics_registry.gauge(
+    "model_ready", "1 si el modelo está cargado",
+    lambda: {(name,): int(model_registry.is_ready(name)) for name in model_registry.names()}, ["model"]
+)
+
+# method_info es fijo por método: se serializa una sola vez al arrancar
+METHOD_INFO_FRAGMENTS = precompile_fragments({method: get_method_info(method) for method in SENTIMENT_MODELS})
+
+def validation_response(request: TextRequest, result: Dict[str, Any], start_time: float, timer: StageTimer,
+                        routing: Optional[Dict[str, Any]] = None,
+                        near_duplicate: Optional[Dict[str, Any]] = None) -> FastJSONResponse:
+    """Respuesta de /validate con las partes opcionales que pidió el cliente"""
+    content = {"original_text": request.text, **result}
+    # Las entradas antiguas del caché persistente aún pueden traer method_info
+    content.pop("method_info", None)
+    if not request.include_suggestions:
+        del content["suggestions"]
+    if request.include_method_info:
+        content["method_info"] = METHOD_INFO_FRAGMENTS[content["sentiment_method"]]
+    if routing is not None:
+        content["routing"] = routing
+    if near_duplicate is not None:
+        content["near_duplicate"] = near_duplicate
+    content["processing_time"] = time.perf_counter() - start_time
+    if request.include_timings:
+        content["stage_timings"] = dict(timer.timings)
+    return FastJSONResponse(content)
+
+def analysis_version(method: str) -> str:
+    """Modelo, versión de la API y del léxico con los que se calcula el resultado de un método"""
+    model_version = f"{SENTIMENT_MODELS.get(method)}@{app.version}+lexicon-{current_lexicon().version}"
+    if method in ("transformers", "ensemble"):
+        # Los resultados de ONNX int8 pueden diferir ligeramente de PyTorch
+        model_version += f"/{TRANSFORMERS_BACKEND}" + ("-int8" if TRANSFORMERS_BACKEND == "onnx" and ONNX_USE_QUANTIZED else "")
+    elif method == "student":
+        # Reentrenar el alumno en la misma ruta invalida sus resultados anteriores (sin cargarlo aquí:
+        # esta función se llama desde el event loop)
+        student_ready = model_registry.is_ready("student")
+        model_version += f"/{model_registry.get('student').version}" if student_ready else "/unavailable"
+    return model_version
+
+def validation_cache_key(text: str, method: str) -> str:
+    """Clave del caché para un texto validado con un método"""
+    return make_cache_key(text, method, analysis_version(method), current_lexicon().thresholds.get(method, {}))
+
+def analyze_texts_batch(texts: List[str], method: str = DEFAULT_SENTIMENT_METHOD,
+                        timer: Optional[StageTimer] = None) -> List[Any]:
+    """Analiza emoción y groserías de varios textos (se ejecuta en el pool de inferencia)"""
+    timer = timer or StageTimer()
+    with timer.stage("preprocessing"):
+        for text in texts:
+            preprocess(text)
+    with timer.stage("emotion"):
+        emotion_results = analyze_emotion_batch(texts, method)
+    with timer.stage("profanity"):
+        profanity_results = [detect_profanity(text) for text in texts]
+    return list(zip(emotion_results, profanity_results))
+
+def validate_batch(texts: List[str], method: str = DEFAULT_SENTIMENT_METHOD) -> List[Dict[str, Any]]:
+    """Valida varios textos y devuelve un resultado por texto en el mismo orden (se ejecuta en el pool de inferencia)"""
+    timer = StageTimer(batch_stage_seconds if METRICS_ENABLED else None, method=method)
+    results = [None] * len(texts)
+    valid_indices = []
+    with timer.stage("validation"):
+        for index, text in enumerate(texts):
+            # Validar entrada
+            validation_result = validate_input(text)
+            if not validation_result["is_valid"]:
+                results[index] = {
+                    "text": text,
+                    "error": validation_result["errors"][0],
+                    "valid": False
+                }
+                continue
+            valid_indices.append(index)
+    
+    # Analizar todos los textos válidos en un solo lote (uno por método si se enruta por idioma)
+    valid_texts = [texts[i] for i in valid_indices]
+    routes = None
+    if method == AUTO_METHOD:
+        with timer.stage("language"):
+            routes = [route_text(text) for text in valid_texts]
+        groups: Dict[str, List[int]] = {}
+        for position, route in enumerate(routes):
+            groups.setdefault(route["method"], []).append(position)
+        batch_results = [None] * len(valid_texts)
+        for routed_method, positions in groups.items():
+            group_results = analyze_texts_batch([valid_texts[position] for position in positions], routed_method, timer)
+            for position, group_result in zip(positions, group_results):
+                batch_results[position] = group_result
+    else:
+        batch_results = analyze_texts_batch(valid_texts, method, timer)
+    
+    with timer.stage("scoring"):
+        # Determinar qué textos son ofensivos en una sola operación vectorizada
+        scores = [emotion_result["score"] for emotion_result, _ in batch_results]
+        profanity_counts = [profanity_result["profanity_count"] for _, profanity_result in batch_results]
+        methods = [route["method"] for route in routes] if routes is not None else method
+        is_offensive = offensive_flags(scores, profanity_counts, methods).tolist()
+        confidences = calculate_confidences(
+            [emotion_result["confidence"] for emotion_result, _ in batch_results], profanity_counts
+        ).tolist()
+        
+        for position, (index, (emotion_result, _)) in enumerate(zip(valid_indices, batch_results)):
+            results[index] = {
+                "text": texts[index],
+                "is_offensive": is_offensive[position],
+                "emotion_score": scores[position],
+                "emotion_label": emotion_result["label"],
+                "confidence": confidences[position],
+                "profanity_count": profanity_counts[position],
+                "valid": True
+            }
+            if routes is not None:
+                results[index]["sentiment_method"] = routes[position]["method"]
+                results[index]["language"] = routes[position]["language"]
+    
+    return results
+
+def validate_stream_batch(items: List[Dict[str, Any]], method: str = DEFAULT_SENTIMENT_METHOD) -> List[Dict[str, Any]]:
+    """Valida un lote de líneas NDJSON conservando su índice, id y errores de lectura"""
+    parsed_items = [item for item in items if "text" in item]
+    validated = iter(validate_batch([item["text"] for item in parsed_items], method))
+    results = []
+    for item in items:
+        if "text" in item:
+            result = next(validated)
+        else:
+            result = {"error": item["error"], "valid": False}
+        result["index"] = item["index"]
+        if "id" in item:
+            result["id"] = item["id"]
+        results.append(result)
+    return results
+
+async def profile_requests(request: Request, call_next):
+    """Perfila las peticiones que lo piden (cabecera X-Profile o ?profile=1) o una fracción al azar"""
+    requested = request.headers.get("x-profile") == "1" or request.query_params.get("profile") == "1"
+    if request.url.path.startswith("/profiles") or not (requested or random.random() < PROFILING_SAMPLE_RATE):
+        return await call_next(request)
+    
+    profiler = RequestProfiler(PROFILING_MODE, PROFILING_INTERVAL_MS)
+    profiler.start()
+    try:
+        # En respuestas en streaming solo se perfila hasta el envío de las cabeceras
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+    name = await asyncio.get_running_loop().run_in_executor(None, profiler.save, PROFILING_DIR, request.url.path)
+    prune_profiles(PROFILING_DIR, PROFILING_MAX_FILES)
+    response.headers["X-Profile-Id"] = name
+    return response
+
+# El middleware solo se instala en modo depuración: sin coste cuando está deshabilitado
+if PROFILING_ENABLED:
+    app.middleware("http")(profile_requests)
+
+@app.exception_handler(InferenceBusyError)
+async def inference_busy_handler(request: Request, exc: InferenceBusyError):
+    """Responde 429 cuando el pool de inferencia está saturado"""
+    return JSONResponse(status_code=429, content={"detail": str(exc)})
+
 @app.get("/")
 async def root():
     """Endpoint raíz con información de la API"""
@@ -203,10 +765,14 @@ async def root():
             "/validate": "POST - Valida un texto",
             "/health": "GET - Estado de salud de la API",
             "/methods": "GET - Información sobre métodos de análisis",
-            "/compare": "GET - Comparación de métodos"
+            "/validate/stream": "POST - Valida textos NDJSON en streaming, sin límite de cantidad",
+            "/compare": "GET - Comparación de métodos",
+            "/cache/stats": "GET - Estadísticas del caché de resultados",
+            "/metrics": "GET - Métricas en formato Prometheus",
+            "/profiles": "GET - Perfiles de peticiones guardados (si PROFILING_ENABLED)"
         },
-        "default_method": DEFAULT_SENTIMENT_METHOD,
-        "available_methods": list(SENTIMENT_MODELS.keys())
+        "default_method": VALIDATE_DEFAULT_METHOD,
+        "available_methods": list(SENTIMENT_MODELS.keys()) + [AUTO_METHOD]
     }
 
 @app.get("/health")
@@ -214,10 +780,14 @@ async def health_check():
     """Verifica el estado de salud de la API"""
     return {
         "status": "healthy",
-        "models_loaded": True,
-        "gpu_available": torch.cuda.is_available(),
-        "available_methods": list(SENTIMENT_MODELS.keys()),
-        "default_method": DEFAULT_SENTIMENT_METHOD
+        "models_loaded": all(model_registry.is_ready(name) for name in MODEL_PRELOAD),
+        "models": model_registry.status(),
+        "gpu_available": gpu_available(),
+        "transformers_backend": TRANSFORMERS_BACKEND,
+        "inference_pending": inference_executor.pending,
+        "lexicon_version": current_lexicon().version,
+        "available_methods": list(SENTIMENT_MODELS.keys()) + [AUTO_METHOD],
+        "default_method": VALIDATE_DEFAULT_METHOD
     }
 
 @app.get("/methods")
@@ -225,93 +795,258 @@ async def get_methods():
     """Obtiene información sobre los métodos de análisis disponibles"""
     return {
         "available_methods": SENTIMENT_ANALYSIS_CONFIG,
-        "default_method": DEFAULT_SENTIMENT_METHOD,
+        "default_method": VALIDATE_DEFAULT_METHOD,
         "recommendations": {
             "transformers": "Para análisis de alta precisión y multilingüe",
             "textblob": "Para análisis rápido y eficiente",
-            "vader": "Para análisis en tiempo real y redes sociales"
+            "vader": "Para análisis en tiempo real y redes sociales",
+            "ensemble": "Para alto volumen con precisión de BERT en los casos dudosos",
+            "student": "Para volúmenes masivos en español a una fracción del coste de BERT",
+            AUTO_METHOD: "Para tráfico en varios idiomas: cada texto va al método más barato adecuado para su idioma"
+        },
+        "language_routing": {
+            "enabled": LANGUAGE_ROUTING_ENABLED,
+            "routes": LANGUAGE_ROUTES,
+            "default": LANGUAGE_ROUTE_DEFAULT,
+            "min_confidence": LANGUAGE_MIN_CONFIDENCE
         }
     }
 
 @app.get("/compare")
 async def compare_analysis_methods():
-    """Compara los diferentes métodos de análisis de sentimientos"""
+    """Compara los diferentes métodos de análisis de sentimientos con las mediciones del último benchmark"""
+    report = load_benchmark_report(METHOD_BENCHMARK_REPORT)
     return MethodComparisonResponse(
-        methods=compare_methods(),
-        recommended=DEFAULT_SENTIMENT_METHOD
+        methods=compare_methods(report),
+        recommended=DEFAULT_SENTIMENT_METHOD,
+        recommended_by_traffic=report["recommendations"] if report else None,
+        benchmark={key: report[key] for key in ("generated_at", "platform", "corpus_size", "batch_sizes")} if report else None
     )
 
-@app.post("/validate", response_model=TextResponse)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas deshabilitadas (METRICS_ENABLED)")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/profiles")
+async def get_profiles():
+    """Lista los perfiles guardados"""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Perfilado deshabilitado (PROFILING_ENABLED)")
+    return {"mode": PROFILING_MODE, "directory": PROFILING_DIR, "profiles": list_profiles(PROFILING_DIR)}
+
+@app.get("/profiles/{name}")
+async def download_profile(name: str):
+    """Descarga un perfil guardado (.collapsed para flamegraph/speedscope o .prof para pstats/snakeviz)"""
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Perfilado deshabilitado (PROFILING_ENABLED)")
+    path = profile_path(PROFILING_DIR, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Perfil '{name}' no encontrado")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Obtiene las estadísticas del caché de resultados"""
+    return {
+        "enabled": RESULT_CACHE_ENABLED,
+        **result_cache.stats(),
+        "near_duplicates": {"enabled": NEAR_DUPLICATE_ENABLED, "reuse": NEAR_DUPLICATE_REUSE, **near_duplicate_index.stats()}
+    }
+
+def check_admin_token(token: Optional[str]) -> None:
+    """Rechaza con 403 las peticiones a /admin sin el token correcto, o todas si ADMIN_TOKEN no está definido"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoints de administración desactivados: ADMIN_TOKEN no está definido")
+    if not secrets.compare_digest((token or "").encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Token de administración no válido")
+
+@app.get("/admin/lexicon")
+async def lexicon_info(x_admin_token: Optional[str] = Header(None)):
+    """Versión vigente del léxico y de dónde se cargó"""
+    check_admin_token(x_admin_token)
+    lexicon = current_lexicon()
+    return {
+        "version": lexicon.version,
+        "source": lexicon.source,
+        "loaded_at": lexicon.loaded_at,
+        "profanity_replacements": len(lexicon.replacements),
+        "emotion_thresholds": lexicon.thresholds,
+        "file_changed": lexicon_store.changed()
+    }
+
+@app.post("/admin/lexicon/reload")
+async def lexicon_reload(x_admin_token: Optional[str] = Header(None)):
+    """Recarga el léxico desde su archivo sin reiniciar (solo en el proceso que atiende la petición)"""
+    check_admin_token(x_admin_token)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, reload_lexicon)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/admin/near-duplicates")
+async def near_duplicate_clusters(min_texts: int = Query(2, ge=1), limit: int = Query(50, ge=1, le=1000),
+                                  x_admin_token: Optional[str] = Header(None)):
+    """Campañas de mensajes casi iguales vigentes en el índice, de la más numerosa a la menos"""
+    check_admin_token(x_admin_token)
+    return {
+        "max_distance": NEAR_DUPLICATE_MAX_DISTANCE,
+        "clusters": near_duplicate_index.clusters(min_texts, limit)
+    }
+
+@app.post("/admin/student/reload")
+async def student_reload(x_admin_token: Optional[str] = Header(None)):
+    """Carga de nuevo el modelo alumno tras reentrenarlo con train_student.py, sin reiniciar"""
+    check_admin_token(x_admin_token)
+    try:
+        student = await asyncio.get_running_loop().run_in_executor(None, load_student_model)
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    model_registry.replace({"student": student})
+    return {"version": student.version, "metadata": student.metadata}
+
+@app.post("/validate", response_model=TextResponse, response_model_exclude_none=True)
 async def validate_text(request: TextRequest):
     """Valida un texto para detectar emociones negativas y groserías"""
-    start_time = time.time()
+    start_time = time.perf_counter()
+    method = requested_method(request)
+    # El método llega del cliente: uno desconocido se registra con una etiqueta fija para no crear series sin límite
+    metric_method = method if is_valid_method(method) else "invalid"
+    timer = StageTimer(stage_seconds if METRICS_ENABLED else None, method=metric_method)
+    outcome = "error"
     
     try:
+        # Validar método de análisis
+        if metric_method == "invalid":
+            outcome = "invalid"
+            raise invalid_method_error(method)
+        
         # Validar entrada
-        validation_result = validate_input(request.text)
+        with timer.stage("validation"):
+            validation_result = validate_input(request.text)
         if not validation_result["is_valid"]:
+            outcome = "invalid"
             raise HTTPException(status_code=400, detail=validation_result["errors"][0])
         
-        # Validar método de análisis
-        if request.sentiment_method not in SENTIMENT_MODELS:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Método '{request.sentiment_method}' no válido. Métodos disponibles: {list(SENTIMENT_MODELS.keys())}"
-            )
+        # Elegir el método según el idioma (microsegundos, antes del caché para usar la clave del método elegido)
+        routing = None
+        if method == AUTO_METHOD:
+            with timer.stage("language"):
+                await ensure_model("langid")
+                routing = route_text(request.text, request.language)
+        analysis_method = routing["method"] if routing else method
+        # Cargar el alumno antes del caché: su versión forma parte de la clave
+        if analysis_method == "student" and not await ensure_model("student"):
+            outcome = "unavailable"
+            raise student_unavailable_error()
+        
+        # Reutilizar el resultado si el mismo texto ya fue validado
+        with timer.stage("cache"):
+            cache_key = validation_cache_key(request.text, analysis_method) if RESULT_CACHE_ENABLED else None
+            cached_result = result_cache.get(cache_key) if RESULT_CACHE_ENABLED else None
         
-        # Analizar emoción
-        emotion_result = analyze_emotion(request.text, request.sentiment_method)
+        # Buscar variantes recientes del mismo mensaje (campañas) por su huella SimHash
+        fingerprint = match = near_duplicate = None
+        if NEAR_DUPLICATE_ENABLED:
+            with timer.stage("near_duplicate"):
+                fingerprint = near_duplicate_index.fingerprint(request.text)
+                if fingerprint is not None:
+                    scope = analysis_version(analysis_method)
+                    content = content_key(request.text)
+                    match = near_duplicate_index.find(fingerprint, scope, content)
+        # Solo se reutiliza la emoción de variantes con las mismas palabras (otra mención, enlace, emoji o signos)
+        reuse = match is not None and match.same_content and NEAR_DUPLICATE_REUSE and cached_result is None
+        if match is not None:
+            near_duplicate = near_duplicate_index.report(match, reused=reuse)
+            if METRICS_ENABLED:
+                near_duplicates_total.inc(method=analysis_method, reused=str(reuse).lower())
+        
+        if cached_result is not None:
+            outcome = "cache_hit"
+            return validation_response(request, cached_result, start_time, timer, routing, near_duplicate)
+        
+        # Normalizar y tokenizar una sola vez; las demás etapas reutilizan el documento
+        with timer.stage("preprocessing"):
+            preprocess(request.text)
+        
+        # Analizar emoción (o tomarla de la variante ya analizada; las groserías se detectan siempre en este texto)
+        with timer.stage("emotion"):
+            if reuse:
+                emotion_result = match.emotion
+            else:
+                emotion_result = await analyze_emotion_async(request.text, analysis_method)
+                if fingerprint is not None and not emotion_result.get("fallback"):
+                    near_duplicate_index.add(
+                        fingerprint, scope, emotion_result, request.text, match.cluster if match else None, content
+                    )
         
         # Detectar groserías
-        profanity_result = detect_profanity(request.text)
+        with timer.stage("profanity"):
+            profanity_result = await inference_executor.run(detect_profanity, request.text)
         
-        # Determinar si es ofensivo en general
-        is_offensive = emotion_result["score"] < 0.4 or profanity_result["has_profanity"]
+        # Determinar si es ofensivo en general (VADER y TextBlob puntúan de -1 a 1: su 0.0 es neutral)
+        normalized_score = normalize_score(emotion_result["score"], analysis_method)
+        is_offensive = normalized_score < 0.4 or profanity_result["has_profanity"]
         
         # Generar sugerencias
-        suggestions = generate_suggestions(
-            request.text, 
-            emotion_result["score"], 
-            profanity_result["profanity_count"],
-            request.sentiment_method
-        )
+        with timer.stage("suggestions"):
+            suggestions = generate_suggestions(
+                request.text, 
+                emotion_result["score"], 
+                profanity_result["profanity_count"],
+                analysis_method
+            )
         
         # Corregir texto
-        corrected_text = correct_text(request.text, profanity_result["profanity_words"])
+        with timer.stage("correction"):
+            corrected_text = correct_text(
+                request.text,
+                profanity_result["profanity_words"],
+                profanity_result["profanity_matches"]
+            )
         
         # Calcular confianza general
         confidence = calculate_confidence(
             emotion_result["confidence"], 
             profanity_result["profanity_count"],
-            request.sentiment_method
+            analysis_method
         )
         
-        # Obtener información del método
-        method_info = get_method_info(request.sentiment_method)
-        
-        # Calcular tiempo de procesamiento
-        processing_time = time.time() - start_time
+        result = {
+            "is_offensive": is_offensive,
+            "has_profanity": profanity_result["has_profanity"],
+            "emotion_score": emotion_result["score"],
+            "emotion_label": emotion_result["label"],
+            "profanity_count": profanity_result["profanity_count"],
+            "suggestions": suggestions,
+            "corrected_text": corrected_text,
+            "confidence": confidence,
+            "sentiment_method": analysis_method
+        }
+        # Un resultado por defecto (el modelo falló) o tomado de otra variante no se guarda como propio de este texto
+        if RESULT_CACHE_ENABLED and not reuse and not emotion_result.get("fallback"):
+            result_cache.set(cache_key, result)
+        outcome = "ok"
         
-        return TextResponse(
-            original_text=request.text,
-            is_offensive=is_offensive,
-            has_profanity=profanity_result["has_profanity"],
-            emotion_score=emotion_result["score"],
-            emotion_label=emotion_result["label"],
-            profanity_count=profanity_result["profanity_count"],
-            suggestions=suggestions,
-            corrected_text=corrected_text,
-            confidence=confidence,
-            sentiment_method=request.sentiment_method,
-            method_info=method_info,
-            processing_time=processing_time
-        )
+        # La respuesta se serializa directamente (sin pasar por TextResponse) con las partes pedidas
+        return validation_response(request, result, start_time, timer, routing, near_duplicate)
         
+    except InferenceBusyError:
+        outcome = "busy"
+        raise
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error en validación: {e}")
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    finally:
+        if METRICS_ENABLED:
+            requests_total.inc(endpoint="/validate", method=metric_method, outcome=outcome)
+            request_seconds.observe(time.perf_counter() - start_time, endpoint="/validate", method=metric_method)
 
-@app.post("/validate/batch")
+@app.post("/validate/batch", response_class=FastJSONResponse)
 async def validate_texts_batch(texts: List[str], method: str = Query(DEFAULT_SENTIMENT_METHOD)):
     """Valida múltiples textos en lote"""
     if not texts:
@@ -320,43 +1055,19 @@ async def validate_texts_batch(texts: List[str], method: str = Query(DEFAULT_SEN
     if len(texts) > 50:
         raise HTTPException(status_code=400, detail="Máximo 50 textos por lote")
     
-    results = []
-    for text in texts:
-        try:
-            # Validar entrada
-            validation_result = validate_input(text)
-            if not validation_result["is_valid"]:
-                results.append({
-                    "text": text,
-                    "error": validation_result["errors"][0],
-                    "valid": False
-                })
-                continue
-            
-            # Analizar emoción
-            emotion_result = analyze_emotion(text, method)
-            
-            # Detectar groserías
-            profanity_result = detect_profanity(text)
-            
-            # Determinar si es ofensivo
-            is_offensive = emotion_result["score"] < 0.4 or profanity_result["has_profanity"]
-            
-            results.append({
-                "text": text,
-                "is_offensive": is_offensive,
-                "emotion_score": emotion_result["score"],
-                "emotion_label": emotion_result["label"],
-                "profanity_count": profanity_result["profanity_count"],
-                "valid": True
-            })
-            
-        except Exception as e:
-            results.append({
-                "text": text,
-                "error": str(e),
-                "valid": False
-            })
+    if not is_valid_method(method):
+        raise invalid_method_error(method)
+    
+    if "student" in models_for_method(method) and not await ensure_model("student"):
+        raise student_unavailable_error()
+    
+    # Validar y analizar todos los textos en un solo lote, fuera del event loop
+    start_time = time.perf_counter()
+    results = await inference_executor.run(validate_batch, texts, method)
+    if METRICS_ENABLED:
+        batches_total.inc(endpoint="/validate/batch", method=method)
+        batch_texts_total.inc(len(texts), endpoint="/validate/batch", method=method)
+        request_seconds.observe(time.perf_counter() - start_time, endpoint="/validate/batch", method=method)
     
     return {
         "method": method,
@@ -365,6 +1076,42 @@ async def validate_texts_batch(texts: List[str], method: str = Query(DEFAULT_SEN
         "results": results
     }
 
+@app.post("/validate/stream")
+async def validate_texts_stream(request: Request, method: str = Query(DEFAULT_SENTIMENT_METHOD)):
+    """Valida textos enviados como NDJSON (un texto por línea) y devuelve los resultados en NDJSON a medida que se procesan"""
+    if not is_valid_method(method):
+        raise invalid_method_error(method)
+    
+    # Una vez enviada la cabecera 200 ya no se puede responder 429 ni 503: se rechaza antes de empezar
+    if "student" in models_for_method(method) and not await ensure_model("student"):
+        raise student_unavailable_error()
+    if inference_executor.pending >= inference_executor.max_pending:
+        raise InferenceBusyError(f"Servidor saturado: {inference_executor.max_pending} análisis pendientes")
+    
+    async def generate_results():
+        # Como máximo un lote en análisis mientras se lee el siguiente: memoria acotada
+        pending = None
+        try:
+            async for batch in iter_ndjson_batches(request.stream(), STREAM_BATCH_SIZE, STREAM_MAX_LINE_BYTES):
+                previous, pending = pending, asyncio.ensure_future(inference_executor.run_when_available(
+                    validate_stream_batch, batch, method, retry_seconds=STREAM_BUSY_RETRY_MS / 1000
+                ))
+                if METRICS_ENABLED:
+                    batches_total.inc(endpoint="/validate/stream", method=method)
+                    batch_texts_total.inc(len(batch), endpoint="/validate/stream", method=method)
+                if previous is not None:
+                    for result in await previous:
+                        yield dumps_line(result)
+            if pending is not None:
+                for result in await pending:
+                    yield dumps_line(result)
+        finally:
+            # Si el cliente se desconecta, el lote adelantado no debe seguir ocupando el pool
+            if pending is not None and not pending.done():
+                pending.cancel()
+    
+    return NDJSONStreamingResponse(generate_results())
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
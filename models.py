@@ -0,0 +1,120 @@
+"""
+Registro de modelos con carga diferida o en segundo plano
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import threading
+import time
+
+class ModelRegistry:
+    """Carga cada backend la primera vez que se usa, o en hilos de fondo al arrancar"""
+
+    def __init__(self, retry_seconds: float = 30):
+        # Tras un fallo de carga, las peticiones fallan de inmediato hasta que pasa este tiempo
+        self.retry_seconds = retry_seconds
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, threading.Event] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Registra la función que construye un modelo (no lo carga todavía)"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._status[name] = {"status": "not_loaded", "load_time": None, "error": None}
+
+    def names(self) -> List[str]:
+        return list(self._loaders)
+
+    def get(self, name: str) -> Any:
+        """Devuelve el modelo, cargándolo o esperando a que termine su carga si hace falta"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        event, owner = self._claim(name)
+        if owner:
+            self._load(name, event)
+        else:
+            event.wait()
+        if name not in self._models:
+            raise RuntimeError(f"El modelo '{name}' no se pudo cargar: {self._status[name]['error']}")
+        return self._models[name]
+
+    def preload(self, names: Optional[Iterable[str]] = None) -> List[threading.Thread]:
+        """Inicia la carga de los modelos indicados en hilos de fondo, en paralelo"""
+        threads = []
+        for name in (names if names is not None else self.names()):
+            event, owner = self._claim(name)
+            if owner:
+                thread = threading.Thread(target=self._load, args=(name, event), name=f"load-{name}", daemon=True)
+                thread.start()
+                threads.append(thread)
+        return threads
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Espera (como mucho timeout segundos) a que termine la carga en curso; devuelve si el modelo está cargado"""
+        with self._lock:
+            event = self._events.get(name)
+        if event is not None:
+            event.wait(timeout)
+        return name in self._models
+
+    def replace(self, models: Dict[str, Any]) -> None:
+        """Sustituye de una vez modelos ya cargados por versiones reconstruidas (recarga en caliente)"""
+        with self._lock:
+            for name, model in models.items():
+                self._models[name] = model
+                self._status[name] = {**self._status[name], "status": "ready", "error": None}
+
+    def is_ready(self, name: str) -> bool:
+        return name in self._models
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Estado de cada modelo: not_loaded, loading, ready o failed, con su tiempo de carga"""
+        with self._lock:
+            return {name: dict(status) for name, status in self._status.items()}
+
+    def _claim(self, name: str):
+        # Solo un hilo carga cada modelo; el resto espera al mismo evento
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"Modelo '{name}' no registrado")
+            event = self._events.get(name)
+            if event is not None and not self._retry_due(name, event):
+                return event, False
+            event = threading.Event()
+            self._events[name] = event
+            self._status[name] = {"status": "loading", "load_time": None, "error": None}
+            return event, True
+
+    def _retry_due(self, name: str, event: threading.Event) -> bool:
+        # Un fallo no es definitivo: el archivo puede aparecer o la red volver
+        failed_at = self._failed_at.get(name)
+        return (
+            event.is_set() and name not in self._models and failed_at is not None
+            and time.monotonic() - failed_at >= self.retry_seconds
+        )
+
+    def _load(self, name: str, event: threading.Event) -> None:
+        print(f"Cargando modelo '{name}'...")
+        start = time.perf_counter()
+        try:
+            model = self._loaders[name]()
+            with self._lock:
+                self._models[name] = model
+                self._status[name] = {"status": "ready", "load_time": time.perf_counter() - start, "error": None}
+            print(f"Modelo '{name}' cargado en {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            with self._lock:
+                self._status[name] = {
+                    "status": "failed",
+                    "load_time": time.perf_counter() - start,
+                    "error": str(e),
+                    "retry_after_seconds": self.retry_seconds
+                }
+                self._failed_at[name] = time.monotonic()
+            print(f"Error cargando el modelo '{name}': {e}")
+        finally:
+            event.set()
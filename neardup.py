@@ -0,0 +1,197 @@
+"""
+Índice de casi duplicados con SimHash para agrupar campañas de mensajes repetidos
+
+Cada texto se reduce a sus palabras (sin menciones, enlaces, emojis, signos,
+dígitos, mayúsculas ni tildes) y se resume en una huella SimHash de 64 bits
+sobre sus palabras y trigramas de caracteres: variantes mínimas de un mismo
+mensaje quedan a pocos bits de distancia de Hamming. La búsqueda usa el
+principio del palomar: con una distancia máxima k, la huella se parte en k + 1
+bloques y dos huellas a distancia <= k coinciden al menos en uno, así que solo
+se comparan las entradas que comparten algún bloque.
+
+La huella solo agrupa textos en campañas. La emoción de una variante solo se
+reutiliza si el texto tiene el mismo contenido (content_key): las mismas palabras
+y números con sus mayúsculas y tildes, de modo que solo cambian menciones,
+enlaces, emojis o signos. Una palabra distinta a pocos bits puede cambiar el veredicto.
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+import numpy as np
+
+FINGERPRINT_BITS = 64
+SAMPLE_LENGTH = 120  # Caracteres del primer texto de cada campaña que se conservan como muestra
+
+# Menciones y enlaces: en una campaña suelen ser lo único que cambia
+_MENTIONS_AND_LINKS = re.compile(r"@\w+|https?://\S+|www\.\S+")
+_WORDS = re.compile(r"[^\W\d_]+")
+_CONTENT_TOKENS = re.compile(r"[^\W_]+")
+
+def fingerprint_words(text: str) -> List[str]:
+    """Palabras del texto en minúsculas y sin tildes, sin menciones ni enlaces"""
+    decomposed = unicodedata.normalize("NFKD", _MENTIONS_AND_LINKS.sub(" ", text).lower())
+    return _WORDS.findall("".join(char for char in decomposed if not unicodedata.combining(char)))
+
+def content_key(text: str) -> str:
+    """Resumen de las palabras y números del texto tal cual (mayúsculas y tildes incluidas), sin menciones ni enlaces"""
+    tokens = _CONTENT_TOKENS.findall(unicodedata.normalize("NFC", _MENTIONS_AND_LINKS.sub(" ", text)))
+    return hashlib.blake2b(" ".join(tokens).encode("utf-8"), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=65536)
+def feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+def simhash(words: List[str]) -> int:
+    """Huella de 64 bits: cada bit es el signo de la suma de ese bit (+1/-1) en los hashes de las características"""
+    joined = " ".join(words)
+    features = words + [joined[start:start + 3] for start in range(len(joined) - 2)]
+    hashes = np.fromiter((feature_hash(feature) for feature in features), dtype=np.uint64, count=len(features))
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(len(features), FINGERPRINT_BITS)
+    return int.from_bytes(np.packbits(bits.sum(axis=0) * 2 > len(features)).tobytes(), "big")
+
+class NearDuplicateMatch(NamedTuple):
+    fingerprint: int
+    distance: int
+    emotion: Dict[str, Any]  # Resultado de la emoción del texto indexado
+    cluster: Dict[str, Any]
+    same_content: bool  # Solo difiere en menciones, enlaces, emojis o signos: su emoción se puede reutilizar
+
+class _Entry(NamedTuple):
+    fingerprint: int
+    scope: str
+    emotion: Dict[str, Any]
+    created: float
+    cluster: Dict[str, Any]
+    content: Optional[str]
+
+class NearDuplicateIndex:
+    """Huellas de los textos validados recientemente, acotadas en número y antigüedad"""
+
+    def __init__(self, max_distance: int = 3, max_entries: int = 50000, ttl_seconds: float = 3600, min_words: int = 5):
+        if not 0 <= max_distance < FINGERPRINT_BITS:
+            raise ValueError(f"max_distance debe estar entre 0 y {FINGERPRINT_BITS - 1}")
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_words = min_words
+        self.matches = 0
+        self.reused = 0
+        # max_distance + 1 bloques de bits contiguos (tamaños lo más parecidos posible)
+        edges = np.linspace(0, FINGERPRINT_BITS, max_distance + 2).astype(int)
+        self._blocks = [(int(start), (1 << int(end - start)) - 1) for start, end in zip(edges[:-1], edges[1:])]
+        self._tables: List[Dict[int, set]] = [{} for _ in self._blocks]
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()  # En orden de llegada: la primera es la más antigua
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def fingerprint(self, text: str) -> Optional[int]:
+        """Huella del texto, o None si es demasiado corto para compararlo con seguridad"""
+        words = fingerprint_words(text)
+        return simhash(words) if len(words) >= self.min_words else None
+
+    def _keys(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> start) & mask for start, mask in self._blocks]
+
+    def find(self, fingerprint: int, scope: str, content: Optional[str] = None) -> Optional[NearDuplicateMatch]:
+        """Entrada más cercana del mismo alcance (método y versión) a distancia <= max_distance; en empate, la del mismo contenido"""
+        with self._lock:
+            self._evict(time.time())
+            best = None
+            best_rank = None
+            seen = set()
+            for table, key in zip(self._tables, self._keys(fingerprint)):
+                for entry_id in table.get(key, ()):
+                    if entry_id in seen:
+                        continue
+                    seen.add(entry_id)
+                    entry = self._entries[entry_id]
+                    if entry.scope != scope:
+                        continue
+                    distance = bin(fingerprint ^ entry.fingerprint).count("1")
+                    same_content = content is not None and entry.content == content
+                    rank = (distance, not same_content)
+                    if distance <= self.max_distance and (best_rank is None or rank < best_rank):
+                        best_rank = rank
+                        best = NearDuplicateMatch(entry.fingerprint, distance, entry.emotion, entry.cluster, same_content)
+            return best
+
+    def add(self, fingerprint: int, scope: str, emotion: Dict[str, Any], text: str,
+            cluster: Optional[Dict[str, Any]] = None, content: Optional[str] = None) -> Dict[str, Any]:
+        """Indexa un texto recién analizado, en la campaña indicada o en una nueva"""
+        now = time.time()
+        with self._lock:
+            if cluster is None:
+                cluster = {
+                    "cluster_id": f"{fingerprint:016x}",
+                    "first_seen": now,
+                    "last_seen": now,
+                    "texts": 1,
+                    "sample": text[:SAMPLE_LENGTH],
+                }
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(fingerprint, scope, emotion, now, cluster, content)
+            for table, key in zip(self._tables, self._keys(fingerprint)):
+                table.setdefault(key, set()).add(entry_id)
+            self._evict(now)
+            return cluster
+
+    def report(self, match: NearDuplicateMatch, reused: bool) -> Dict[str, Any]:
+        """Cuenta el texto en la campaña de la coincidencia y devuelve lo que se incluye en la respuesta"""
+        with self._lock:
+            cluster = match.cluster
+            cluster["texts"] += 1
+            cluster["last_seen"] = time.time()
+            self.matches += 1
+            self.reused += int(reused)
+            return {
+                "cluster_id": cluster["cluster_id"],
+                "distance": match.distance,
+                "cluster_texts": cluster["texts"],
+                "first_seen": cluster["first_seen"],
+                "reused_verdict": reused,
+            }
+
+    def clusters(self, min_texts: int = 2, limit: int = 50) -> List[Dict[str, Any]]:
+        """Campañas con entradas vigentes, de la más numerosa a la menos"""
+        with self._lock:
+            self._evict(time.time())
+            unique = {id(entry.cluster): entry.cluster for entry in self._entries.values()}
+            found = [dict(cluster) for cluster in unique.values() if cluster["texts"] >= min_texts]
+        return sorted(found, key=lambda cluster: cluster["texts"], reverse=True)[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "ttl_seconds": self.ttl_seconds,
+                "matches": self.matches,
+                "reused": self.reused,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for table in self._tables:
+                table.clear()
+
+    def _evict(self, now: float) -> None:
+        # Las entradas están en orden de llegada: se descartan desde la más antigua
+        while self._entries:
+            entry_id, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and now - entry.created <= self.ttl_seconds:
+                break
+            del self._entries[entry_id]
+            for table, key in zip(self._tables, self._keys(entry.fingerprint)):
+                bucket = table[key]
+                bucket.discard(entry_id)
+                if not bucket:
+                    del table[key]
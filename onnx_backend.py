@@ -0,0 +1,55 @@
+"""
+Backend de ONNX Runtime para el método de transformers
+"""
+
+from types import SimpleNamespace
+from typing import Any, Dict, List, Union
+import os
+import numpy as np
+import onnxruntime as ort
+import torch
+from transformers import AutoConfig, AutoTokenizer
+from inference import run_pipeline_batch
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model.int8.onnx"
+
+class OnnxSentimentModel:
+    """Sesión de ONNX Runtime con la misma interfaz que el modelo de PyTorch (devuelve .logits)"""
+
+    def __init__(self, model_path: str, config, num_threads: int = 0):
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.config = config
+        self.device = torch.device("cpu")
+        self._input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def __call__(self, **inputs) -> Any:
+        feeds = {
+            name: inputs[name].cpu().numpy().astype(np.int64)
+            for name in self._input_names
+            if name in inputs
+        }
+        logits = self.session.run(["logits"], feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+class OnnxSentimentPipeline:
+    """Sustituto del pipeline de sentiment-analysis que ejecuta el grafo ONNX exportado"""
+
+    def __init__(self, model_dir: str, quantized: bool = True, num_threads: int = 0):
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No se encontró {model_path}. Exporta el modelo con: python export_onnx.py --output {model_dir}"
+            )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = OnnxSentimentModel(model_path, AutoConfig.from_pretrained(model_dir), num_threads)
+
+    def __call__(self, texts: Union[str, List[str]], **kwargs) -> List[Dict[str, Any]]:
+        # Igual que el pipeline de transformers: [{'label': '4 stars', 'score': 0.61}, ...]
+        if isinstance(texts, str):
+            texts = [texts]
+        return run_pipeline_batch(self, texts)
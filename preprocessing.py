@@ -0,0 +1,26 @@
+"""
+Preprocesamiento compartido: cada texto se normaliza y tokeniza una sola vez
+y el resultado lo reutilizan todos los analizadores
+"""
+
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+import re
+import unicodedata
+from config import PREPROCESS_CACHE_SIZE
+from profanity import fold_text, tokenize
+
+_WHITESPACE = re.compile(r"\s+")
+
+class TextDocument(NamedTuple):
+    """Texto preprocesado; las posiciones de folded y tokens corresponden al texto original"""
+    text: str
+    normalized: str  # Unicode NFC y espacios colapsados, entrada de los modelos de sentimiento
+    folded: str  # Minúsculas con la misma longitud que el original, para el autómata de groserías
+    tokens: List[Tuple[str, int, int]]  # (token, inicio, fin), para el índice aproximado de groserías
+
+@lru_cache(maxsize=PREPROCESS_CACHE_SIZE)
+def preprocess(text: str) -> TextDocument:
+    """Construye (o recupera del caché) el documento de un texto"""
+    normalized = _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+    return TextDocument(text, normalized, fold_text(text), tokenize(text))
@@ -0,0 +1,263 @@
+"""
+Detección de groserías: autómata Aho-Corasick exacto e índice aproximado de n-gramas
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import re
+import spanlp
+from spanlp.domain.countries import Country
+
+_SPANLP_DATASET_DIR = os.path.join(os.path.dirname(spanlp.__file__), "dataset")
+
+def fold_char(char: str) -> str:
+    """Pasa un carácter a minúsculas sin cambiar la longitud del texto"""
+    if char.isspace():
+        return " "
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+def fold_text(text: str) -> str:
+    """Versión en minúsculas del texto con las mismas posiciones que el original"""
+    return "".join(fold_char(char) for char in text)
+
+def load_spanlp_words(countries: Optional[Iterable[str]] = None) -> List[str]:
+    """Carga las listas de groserías de spanlp para los países indicados (todos por defecto)"""
+    codes = list(countries) if countries else Country.all()
+    words = []
+    for code in codes:
+        path = os.path.join(_SPANLP_DATASET_DIR, f"{code}.txt")
+        try:
+            with open(path, encoding="utf-8") as infile:
+                words.extend(line.strip() for line in infile)
+        except OSError as e:
+            print(f"No se pudo cargar la lista de groserías de {code}: {e}")
+    return words
+
+class ProfanityMatcher:
+    """Autómata Aho-Corasick que encuentra todas las groserías del léxico en una sola pasada"""
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]
+        # Longitud de la palabra más larga que termina en cada estado (siguiendo los enlaces de fallo)
+        self._dict_link: List[int] = [0]
+        self.words = set()
+        for word in words:
+            normalized = " ".join(fold_text(word).strip(" ,.;").split())
+            if normalized and normalized not in self.words:
+                self.words.add(normalized)
+                self._add(normalized)
+        self._build()
+
+    def _add(self, word: str) -> None:
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._dict_link.append(0)
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] = word
+
+    def _build(self) -> None:
+        # Recorrido en anchura para calcular los enlaces de fallo
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                failed = self._fail[next_state]
+                self._dict_link[next_state] = failed if self._output[failed] else self._dict_link[failed]
+
+    def find(self, text: str, folded: Optional[str] = None) -> List[Dict[str, object]]:
+        """Devuelve las groserías del texto (palabras completas, sin solapamientos) con su posición"""
+        if folded is None:
+            folded = fold_text(text)
+        goto, fail, output, dict_link = self._goto, self._fail, self._output, self._dict_link
+        candidates = []
+        state = 0
+        for end, char in enumerate(folded, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match_state = state if output[state] else dict_link[state]
+            while match_state:
+                word = output[match_state]
+                start = end - len(word)
+                # Solo palabras completas: "culo" no debe coincidir dentro de "ridículo"
+                if (start == 0 or not folded[start - 1].isalnum()) and (end == len(folded) or not folded[end].isalnum()):
+                    candidates.append((start, end, word))
+                match_state = dict_link[match_state]
+
+        # Preferir la coincidencia más a la izquierda y, a igual inicio, la más larga
+        candidates.sort(key=lambda match: (match[0], -match[1]))
+        matches = []
+        last_end = 0
+        for start, end, word in candidates:
+            if start >= last_end:
+                matches.append({"word": word, "similarity": 1.0, "text": text[start:end], "start": start, "end": end})
+                last_end = end
+        return matches
+
+# Sustituciones habituales para ofuscar groserías ("p3ndej0", "$exo", "@migo")
+LEET_TABLE = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+    "@": "a", "$": "s", "|": "l", "!": "i",
+    "á": "a", "é": "e", "í": "i", "ó": "o", "ú": "u", "ü": "u"
+})
+
+# Palabras deletreadas con separadores ("m.i.e.r.d.a", "p u t a") o palabras normales
+_TOKEN_PATTERN = re.compile(
+    r"(?<![\w@$])(?:[\w@$][.\-_*\s]+){3,}[\w@$](?![\w@$])"
+    r"|[\w@$]*\w[\w@$]*"
+)
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """Tokens del texto (incluidas las palabras deletreadas) con su posición en el original"""
+    return [(match.group(), match.start(), match.end()) for match in _TOKEN_PATTERN.finditer(text)]
+
+_SEPARATORS = re.compile(r"[.\-_*\s]+")
+_LONG_RUNS = re.compile(r"(.)\1{2,}")
+
+def normalize_obfuscation(token: str, keep_doubles: bool = False) -> str:
+    """Deshace leetspeak, separadores y letras alargadas ("puuuta") para comparar con el léxico"""
+    token = _SEPARATORS.sub("", fold_text(token)).translate(LEET_TABLE)
+    # Las dobles letras son legítimas en español ("perra"), solo se recortan las series de 3 o más
+    return _LONG_RUNS.sub(r"\1\1" if keep_doubles else r"\1", token)
+
+# Un deletreo seguido de una palabra de una letra ("p u t a y") se la come al tokenizar
+_TRAILING_LETTER = re.compile(r"\s+\w$")
+_PLURAL_SUFFIXES = ("es", "s")
+
+def typo_distance(first: str, second: str) -> int:
+    """Distancia de edición contando el intercambio de dos letras vecinas como una sola edición"""
+    previous2, previous = None, list(range(len(second) + 1))
+    for i, char in enumerate(first, 1):
+        current = [i] + [0] * len(second)
+        for j, other in enumerate(second, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other))
+            if previous2 is not None and j > 1 and char == second[j - 2] and first[i - 2] == other:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+def is_typo(key: str, word: str) -> bool:
+    """Una sola edición en el interior de una palabra de 5 o más letras"""
+    # Cambiar la primera o la última letra da otra palabra o una flexión ("ridícula" no es "ridículo")
+    return (
+        len(word) >= 5 and abs(len(key) - len(word)) <= 1
+        and key[0] == word[0] and key[-1] == word[-1]
+        and typo_distance(key, word) <= 1
+    )
+
+def char_ngrams(word: str, n: int = 3) -> set:
+    """N-gramas de caracteres con marcas de inicio y fin de palabra"""
+    padded = f"#{word}#"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+class FuzzyProfanityIndex:
+    """Índice invertido de n-gramas de caracteres para encontrar groserías ofuscadas"""
+
+    def __init__(self, words: Iterable[str], threshold: float = 0.6, n_gram: int = 3, min_length: int = 4):
+        self.threshold = threshold
+        self.n_gram = n_gram
+        self.min_length = min_length
+        self._canonical: Dict[str, str] = {}
+        self._grams: List[set] = []
+        self._keys: List[str] = []
+        self._postings: Dict[str, List[int]] = {}
+        for word in words:
+            canonical = " ".join(fold_text(word).strip(" ,.;").split())
+            # Las expresiones de varias palabras se detectan con el autómata exacto
+            if not canonical or " " in canonical:
+                continue
+            key = normalize_obfuscation(canonical)
+            if key in self._canonical:
+                continue
+            self._canonical[key] = canonical
+            if len(key) < min_length:
+                continue
+            word_id = len(self._keys)
+            grams = char_ngrams(key, n_gram)
+            self._keys.append(key)
+            self._grams.append(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(word_id)
+
+    def lookup(self, token: str) -> Optional[Dict[str, object]]:
+        """Busca la palabra del léxico de la que el token es una variante: ofuscada, en plural o con una errata"""
+        key = normalize_obfuscation(token)
+        for candidate in (key, normalize_obfuscation(token, keep_doubles=True)):
+            canonical = self._canonical.get(candidate)
+            if canonical is not None:
+                return {"word": canonical, "similarity": 1.0}
+        grams = char_ngrams(key, self.n_gram)
+
+        # Plurales de palabras del léxico, incluidas las cortas ("culos", "pendejos")
+        for suffix in _PLURAL_SUFFIXES:
+            singular = key[:-len(suffix)]
+            if key.endswith(suffix) and singular in self._canonical:
+                similarity = self._similarity(grams, char_ngrams(singular, self.n_gram))
+                return {"word": self._canonical[singular], "similarity": similarity}
+        if len(key) < self.min_length:
+            return None
+
+        # Solo se comparan las palabras que comparten algún n-grama con el token
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for word_id in self._postings.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        # Parecerse no basta: la palabra más parecida tiene que ser una errata del token
+        candidates = []
+        for word_id, count in shared.items():
+            similarity = count / (len(grams) + len(self._grams[word_id]) - count)
+            if similarity >= self.threshold:
+                candidates.append((similarity, word_id))
+        for similarity, word_id in sorted(candidates, reverse=True):
+            if is_typo(key, self._keys[word_id]):
+                return {"word": self._canonical[self._keys[word_id]], "similarity": similarity}
+        return None
+
+    @staticmethod
+    def _similarity(grams: set, other: set) -> float:
+        return len(grams & other) / len(grams | other)
+
+    def find(self, text: str, tokens: Optional[List[Tuple[str, int, int]]] = None) -> List[Dict[str, object]]:
+        """Devuelve las groserías aproximadas del texto con la palabra canónica, similitud y posición"""
+        matches = []
+        for token, start, end in (tokens if tokens is not None else tokenize(text)):
+            found = self.lookup(token)
+            if found is None and _SEPARATORS.search(token):
+                trailing = _TRAILING_LETTER.search(token)
+                if trailing is not None:
+                    token, end = token[:trailing.start()], start + trailing.start()
+                    found = self.lookup(token)
+            if found is not None:
+                found.update({"text": token, "start": start, "end": end})
+                matches.append(found)
+        return matches
+
+def merge_matches(exact: List[Dict[str, object]], fuzzy: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Combina coincidencias exactas y aproximadas descartando las que se solapan con una exacta"""
+    merged = list(exact)
+    for match in fuzzy:
+        if all(match["end"] <= other["start"] or match["start"] >= other["end"] for other in exact):
+            merged.append(match)
+    merged.sort(key=lambda match: match["start"])
+    return merged
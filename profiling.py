@@ -0,0 +1,125 @@
+"""
+Perfilado opcional de peticiones (solo para depuración)
+
+Dos modos:
+- "sampling": un hilo muestrea cada pocos milisegundos las pilas de todos los
+  hilos (incluidos los del pool de inferencia, donde corren los modelos) y
+  guarda las pilas colapsadas, listas para flamegraph.pl o speedscope.
+- "cprofile": cProfile sobre el hilo del event loop; se guarda en formato pstats.
+
+Mientras dura la petición perfilada se registran también las demás peticiones
+concurrentes del mismo proceso.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import cProfile
+import os
+import sys
+import threading
+import time
+import uuid
+
+# Hilos bloqueados esperando trabajo: no aportan al flamegraph
+IDLE_FRAMES = {
+    ("_worker", "thread.py"),
+    ("wait", "threading.py"),
+    ("get", "queue.py"),
+    ("select", "selectors.py"),
+}
+
+class StackSampler:
+    """Muestrea periódicamente las pilas de todos los hilos del proceso"""
+
+    def __init__(self, interval_ms: float = 1.0):
+        self.interval = interval_ms / 1000.0
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Pilas en formato colapsado: "hilo;func (archivo:línea);... N" por línea"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+class RequestProfiler:
+    """Perfila una petición con el modo configurado y guarda el resultado al terminar"""
+
+    def __init__(self, mode: str, interval_ms: float = 1.0):
+        self.mode = mode
+        self._sampler = StackSampler(interval_ms) if mode == "sampling" else None
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+
+    def start(self) -> None:
+        if self._sampler is not None:
+            self._sampler.start()
+        else:
+            self._profile.enable()
+
+    def stop(self) -> None:
+        if self._sampler is not None:
+            self._sampler.stop()
+        else:
+            self._profile.disable()
+
+    def save(self, directory: str, label: str) -> str:
+        """Guarda el perfil y devuelve el nombre del archivo"""
+        os.makedirs(directory, exist_ok=True)
+        safe_label = "".join(char if char.isalnum() else "_" for char in label).strip("_") or "request"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_label}-{uuid.uuid4().hex[:8]}"
+        if self._sampler is not None:
+            name += ".collapsed"
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                f.write(self._sampler.collapsed())
+        else:
+            name += ".prof"
+            self._profile.dump_stats(os.path.join(directory, name))
+        return name
+
+def list_profiles(directory: str) -> List[Dict[str, Any]]:
+    """Perfiles guardados, del más reciente al más antiguo"""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if name.endswith((".collapsed", ".prof")):
+            stat = os.stat(os.path.join(directory, name))
+            profiles.append({"name": name, "size": stat.st_size, "created": stat.st_mtime})
+    return sorted(profiles, key=lambda profile: profile["created"], reverse=True)
+
+def prune_profiles(directory: str, max_files: int) -> None:
+    """Borra los perfiles más antiguos por encima de max_files"""
+    for profile in list_profiles(directory)[max_files:]:
+        try:
+            os.remove(os.path.join(directory, profile["name"]))
+        except OSError:
+            pass
+
+def profile_path(directory: str, name: str) -> Optional[str]:
+    """Ruta de un perfil guardado, solo si el nombre corresponde a uno existente"""
+    if name not in {profile["name"] for profile in list_profiles(directory)}:
+        return None
+    return os.path.join(directory, name)
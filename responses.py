@@ -0,0 +1,47 @@
+"""
+Serialización JSON rápida para los endpoints de validación
+
+Usa orjson cuando está instalado (varias veces más rápido que json y con
+soporte para tipos de NumPy) y json de la biblioteca estándar si no lo está.
+Las partes estáticas de la respuesta (method_info) se serializan una sola vez
+al arrancar y se insertan tal cual en cada respuesta (orjson.Fragment).
+"""
+
+from typing import Any, Dict
+import json
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY if orjson is not None else 0
+
+def dumps(content: Any) -> bytes:
+    """Serializa a JSON en UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def dumps_line(content: Any) -> bytes:
+    """Una línea NDJSON (termina en salto de línea)"""
+    if orjson is not None:
+        return orjson.dumps(content, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+    return dumps(content) + b"\n"
+
+def json_fragment(content: Any) -> Any:
+    """JSON pre-serializado que se inserta sin volver a serializar (el propio valor si no hay orjson)"""
+    if orjson is not None and hasattr(orjson, "Fragment"):
+        return orjson.Fragment(orjson.dumps(content, option=ORJSON_OPTIONS))
+    return content
+
+def precompile_fragments(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Pre-serializa cada valor de un diccionario (por ejemplo, method_info por método)"""
+    return {key: json_fragment(value) for key, value in values.items()}
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada con orjson cuando está disponible"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
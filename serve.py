@@ -0,0 +1,103 @@
+"""
+Servidor multi-proceso con modelos compartidos (pre-fork)
+
+El proceso padre carga los modelos una sola vez y después crea los workers con
+fork(): los pesos del modelo se comparten copy-on-write entre todos los procesos,
+de modo que N workers ocupan aproximadamente la memoria de un solo modelo.
+Solo disponible en sistemas con fork() (Linux/Mac).
+
+Uso:
+    python serve.py --workers 4
+"""
+
+from typing import List
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import uvicorn
+from config import SERVER_HOST, SERVER_PORT, SERVER_WORKERS, MODEL_PRELOAD, TRANSFORMERS_BACKEND
+import main
+
+def create_socket(host: str, port: int) -> socket.socket:
+    """Abre el socket en el padre para que todos los workers acepten conexiones del mismo puerto"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def preload_models(names: List[str]) -> None:
+    """Carga los modelos en el padre, antes del fork, sin ejecutar inferencia"""
+    for name in names:
+        if name == "transformers" and TRANSFORMERS_BACKEND == "onnx":
+            # Las sesiones de ONNX Runtime crean sus hilos al iniciarse y no sobreviven a fork()
+            print("Backend ONNX: cada worker cargará su propia sesión de transformers")
+            continue
+        try:
+            main.model_registry.get(name)
+        except Exception as e:
+            print(f"No se pudo precargar '{name}': {e}")
+    # Evitar que el recolector de basura toque (y copie) las páginas de los modelos en los hijos
+    gc.collect()
+    gc.freeze()
+
+def run_worker(sock: socket.socket, threads_per_worker: int) -> None:
+    """Ejecuta uvicorn en el proceso hijo sobre el socket compartido"""
+    main.TORCH_NUM_THREADS = threads_per_worker
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads_per_worker)
+    # La conexión SQLite del caché no se puede compartir entre procesos
+    main.result_cache.reconnect()
+
+    server = uvicorn.Server(uvicorn.Config(main.app, log_level="info"))
+    server.run(sockets=[sock])
+
+def serve(host: str, port: int, workers: int) -> None:
+    threads_per_worker = max(1, (os.cpu_count() or 1) // (workers * main.INFERENCE_WORKERS))
+    sock = create_socket(host, port)
+
+    # Un solo hilo durante la carga: los pools de hilos de torch no sobreviven a fork()
+    main.TORCH_NUM_THREADS = 1
+    print(f"Cargando modelos en el proceso principal: {MODEL_PRELOAD}")
+    preload_models(MODEL_PRELOAD)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock, threads_per_worker)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    print(f"{workers} workers iniciados en http://{host}:{port} ({threads_per_worker} hilos de torch por hilo de inferencia)")
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in children:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor multi-proceso con modelos compartidos")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    args = parser.parse_args()
+    if not hasattr(os, "fork"):
+        sys.exit("serve.py requiere fork(); en Windows usa python main.py")
+    serve(args.host, args.port, args.workers)
@@ -48,5 +48,9 @@ echo ""
 echo "Presiona Ctrl+C para detener la API"
 echo "=========================================================="
 
-# Iniciar la API
-python3 main.py 
\ No newline at end of file
+# Iniciar la API (API_WORKERS>1: varios procesos compartiendo los modelos cargados)
+if [ "${API_WORKERS:-1}" -gt 1 ]; then
+    python3 serve.py --workers "$API_WORKERS"
+else
+    python3 main.py
+fi 
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Lectura incremental de cuerpos NDJSON para la validación en streaming
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+import json
+from fastapi.responses import StreamingResponse
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Respuesta NDJSON que no consume receive(), para seguir leyendo el cuerpo de la petición mientras se responde"""
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        # StreamingResponse escucha la desconexión con receive() y se quedaría con los fragmentos del cuerpo;
+        # aquí la desconexión se detecta al leer request.stream()
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def parse_ndjson_line(line: bytes) -> Dict[str, Any]:
+    """Interpreta una línea NDJSON: un texto JSON ("...") o un objeto {"text": ..., "id": ...}"""
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return {"error": "Línea JSON inválida"}
+    if isinstance(item, str):
+        return {"text": item}
+    if isinstance(item, dict) and isinstance(item.get("text"), str):
+        parsed = {"text": item["text"]}
+        if "id" in item:
+            parsed["id"] = item["id"]
+        return parsed
+    return {"error": "Cada línea debe ser un texto o un objeto con el campo 'text'"}
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Optional[bytes]]:
+    """Separa el cuerpo en líneas sin cargarlo completo; devuelve None por cada línea demasiado larga"""
+    buffer = bytearray()
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        # Recorrer el fragmento con un desplazamiento y recortar el buffer una sola vez al final
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline < 0:
+                break
+            if skipping:
+                # Fin de la línea demasiado larga que ya se reportó
+                skipping = False
+            elif newline - start > max_line_bytes:
+                yield None
+            elif buffer[start:newline].strip():
+                yield bytes(buffer[start:newline])
+            start = newline + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            # Descartar el resto de la línea para mantener la memoria acotada
+            if not skipping:
+                yield None
+            buffer.clear()
+            skipping = True
+    if buffer.strip() and not skipping:
+        yield bytes(buffer)
+
+async def iter_ndjson_batches(chunks: AsyncIterator[bytes], batch_size: int,
+                              max_line_bytes: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Agrupa las líneas del cuerpo NDJSON en lotes del tamaño del modelo, numerándolas en orden"""
+    batch = []
+    index = 0
+    async for line in iter_ndjson_lines(chunks, max_line_bytes):
+        if line is None:
+            item = {"error": f"Línea demasiado larga (máximo {max_line_bytes} bytes)"}
+        else:
+            item = parse_ndjson_line(line)
+        item["index"] = index
+        index += 1
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,136 @@
+"""
+Modelo alumno para español: n-gramas con hashing y un clasificador lineal en NumPy
+
+Se entrena con train_student.py para imitar las probabilidades de BERT (nlptown,
+1 a 5 estrellas) sobre un corpus sin etiquetar. Cada texto se representa con sus
+palabras, los pares de palabras consecutivas y los n-gramas de caracteres de cada
+palabra, proyectados por hashing a un número fijo de columnas. Analizar un lote es
+sumar filas de la matriz de pesos y aplicar un softmax: sin torch ni transformers.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import re
+import zlib
+import numpy as np
+
+FEATURE_VERSION = 1
+BIAS_FEATURE = 0  # Columna presente en todos los textos: ningún texto queda sin características
+CHAR_ORDERS = (3, 4, 5)
+WORD_CACHE_SIZE = 200000  # Palabras con sus columnas ya calculadas
+
+_WORDS = re.compile(r"\w+")
+
+def stable_bucket(feature: str, buckets: int) -> int:
+    """Columna de una característica (crc32, igual en todos los procesos); la 0 es el sesgo"""
+    return 1 + zlib.crc32(feature.encode("utf-8")) % (buckets - 1)
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class HashedNgramFeaturizer:
+    """Convierte textos en listas de columnas (formato CSR: ids concatenados y desplazamientos)"""
+
+    def __init__(self, buckets: int, char_orders: Sequence[int] = CHAR_ORDERS, word_bigrams: bool = True):
+        self.buckets = buckets
+        self.char_orders = tuple(char_orders)
+        self.word_bigrams = word_bigrams
+        self._word_cache: Dict[str, List[int]] = {}
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "feature_version": FEATURE_VERSION,
+            "buckets": self.buckets,
+            "char_orders": list(self.char_orders),
+            "word_bigrams": self.word_bigrams,
+        }
+
+    def word_features(self, word: str) -> List[int]:
+        """La palabra completa y sus n-gramas de caracteres con marcas de inicio y fin"""
+        features = self._word_cache.get(word)
+        if features is None:
+            marked = f"<{word}>"
+            features = [stable_bucket(f"w:{word}", self.buckets)] + [
+                stable_bucket(f"c:{marked[start:start + order]}", self.buckets)
+                for order in self.char_orders for start in range(len(marked) - order + 1)
+            ]
+            if len(self._word_cache) >= WORD_CACHE_SIZE:
+                self._word_cache.clear()
+            self._word_cache[word] = features
+        return features
+
+    def text_features(self, text: str) -> List[int]:
+        words = _WORDS.findall(text.lower())
+        features = [BIAS_FEATURE]
+        for word in words:
+            features.extend(self.word_features(word))
+        if self.word_bigrams:
+            features.extend(stable_bucket(f"b:{first} {second}", self.buckets) for first, second in zip(words, words[1:]))
+        return features
+
+    def transform(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, offsets): las columnas del texto i son ids[offsets[i]:offsets[i + 1]]"""
+        rows = [self.text_features(text) for text in texts]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=offsets[1:])
+        ids = np.fromiter((feature for row in rows for feature in row), dtype=np.int64, count=int(offsets[-1]))
+        return ids, offsets
+
+def linear_logits(weights: np.ndarray, bias: np.ndarray, ids: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Suma de las filas de cada texto, escalada por 1/sqrt(nº de características), más el sesgo"""
+    lengths = np.diff(offsets)
+    # Todos los textos tienen al menos BIAS_FEATURE, así que reduceat no ve segmentos vacíos
+    sums = np.add.reduceat(weights[ids], offsets[:-1], axis=0)
+    return sums / np.sqrt(lengths)[:, None] + bias
+
+class StudentModel:
+    """Clasificador lineal sobre HashedNgramFeaturizer con las clases de BERT ("1 star" ... "5 stars")"""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: List[str], featurizer: HashedNgramFeaturizer,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.labels = list(labels)
+        self.featurizer = featurizer
+        self.metadata = metadata or {}
+        # Score en la escala de transformers: estrellas esperadas / 5
+        self.star_values = np.array([float(label.split()[0]) for label in self.labels]) / 5.0
+        self.version = self.metadata.get("version", "unsaved")
+
+    @classmethod
+    def load(cls, path: str) -> "StudentModel":
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                config = json.loads(str(data["config"]))
+                weights, bias = data["weights"], data["bias"]
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"No se encontró {path}. Entrena el modelo con: python train_student.py corpus.txt --output {path}"
+            )
+        if config["featurizer"]["feature_version"] != FEATURE_VERSION:
+            raise ValueError(f"{path} usa características v{config['featurizer']['feature_version']}; vuelve a entrenarlo")
+        featurizer = HashedNgramFeaturizer(
+            config["featurizer"]["buckets"], config["featurizer"]["char_orders"], config["featurizer"]["word_bigrams"]
+        )
+        return cls(weights, bias, config["labels"], featurizer, config.get("metadata"))
+
+    def save(self, path: str) -> None:
+        """Guarda el modelo; la versión es un hash de los pesos (entra en la clave del caché de resultados)"""
+        digest = hashlib.sha256(self.weights.tobytes() + self.bias.tobytes()).hexdigest()[:12]
+        self.version = self.metadata["version"] = digest
+        config = {"labels": self.labels, "featurizer": self.featurizer.config(), "metadata": self.metadata}
+        with open(path, "wb") as outfile:
+            np.savez_compressed(outfile, weights=self.weights, bias=self.bias, config=np.array(json.dumps(config)))
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, len(self.labels)), dtype=np.float32)
+        ids, offsets = self.featurizer.transform(texts)
+        return softmax(linear_logits(self.weights, self.bias, ids, offsets))
+
+    def predict(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores de 0.2 a 1 como las estrellas esperadas / 5, confianza = probabilidad de la clase más probable)"""
+        probabilities = self.predict_proba(texts)
+        return probabilities @ self.star_values, probabilities.max(axis=1)
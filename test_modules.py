@@ -0,0 +1,508 @@
+"""
+Pruebas de comportamiento de los módulos de la API, sin servidor ni modelos
+
+Se ejecutan con `python test_modules.py` (o con pytest, que recoge las
+funciones test_*).
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from cache import ResultCache, make_cache_key
+from ensemble import escalation_reason, fuse_results
+from lexicon import LexiconStore, build_lexicon
+from models import ModelRegistry
+from neardup import NearDuplicateIndex, content_key
+from responses import dumps, dumps_line, precompile_fragments
+from profanity import FuzzyProfanityIndex, ProfanityMatcher, merge_matches
+from streaming import iter_ndjson_batches, iter_ndjson_lines
+from utils import calculate_confidence, calculate_confidences, normalize_score, offensive_flags
+
+THRESHOLDS = {"very_negative": 0.2, "negative": 0.4}
+PROFANITY_WORDS = ["culo", "mierda", "pendejo", "ridículo", "cargar", "paloma", "hijo de puta"]
+
+# --- bulk.py ---
+
+def test_bulk_resume_after_interruption():
+    """Una ejecución interrumpida continúa con --resume desde el último bloque escrito, sin duplicar ni perder filas"""
+    import bulk
+
+    texts = [f"comentario número {index}" for index in range(10)]
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "comentarios.csv")
+        with open(input_path, "w", encoding="utf-8") as outfile:
+            outfile.write("id,texto\n" + "".join(f"{index},{text}\n" for index, text in enumerate(texts)))
+        options = {"text_column": "texto", "id_column": "id", "method": "vader", "chunk_size": 3, "workers": 1}
+        expected_path = os.path.join(directory, "completo.jsonl")
+        bulk.run(input_path, expected_path, **options)
+
+        output_path = os.path.join(directory, "resultados.jsonl")
+        process_chunk, calls = bulk.process_chunk, []
+
+        def interrupted(chunk_texts, method):
+            calls.append(len(chunk_texts))
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return process_chunk(chunk_texts, method)
+
+        bulk.process_chunk = interrupted
+        try:
+            bulk.run(input_path, output_path, **options)
+            raise AssertionError("se esperaba la interrupción")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            bulk.process_chunk = process_chunk
+        assert bulk.load_checkpoint(output_path)["rows_done"] == 6
+
+        try:
+            bulk.run(input_path, output_path, resume=True, keep_text=True, **options)
+            raise AssertionError("checkpoint aceptado con otras columnas")
+        except ValueError:
+            pass
+        summary = bulk.run(input_path, output_path, resume=True, **options)
+        assert summary["rows"] == 10 and summary["rows_processed"] == 4
+        with open(output_path, encoding="utf-8") as resumed, open(expected_path, encoding="utf-8") as complete:
+            rows = [json.loads(line) for line in resumed]
+            assert rows == [json.loads(line) for line in complete]
+        assert [row["row"] for row in rows] == list(range(10)) and [row["id"] for row in rows] == [str(index) for index in range(10)]
+
+# --- cache.py ---
+
+def test_cache_key_changes_with_inputs():
+    """La clave cambia con el método, la versión del modelo y los umbrales del léxico"""
+    base = make_cache_key("Hola mundo", "vader", "v1", THRESHOLDS)
+    assert base == make_cache_key("Hola mundo", "vader", "v1", dict(THRESHOLDS))
+    assert base != make_cache_key("Hola mundo", "textblob", "v1", THRESHOLDS)
+    assert base != make_cache_key("Hola mundo", "vader", "v2", THRESHOLDS)
+    assert base != make_cache_key("Hola mundo", "vader", "v1", {**THRESHOLDS, "negative": 0.5})
+
+def test_cache_key_normalizes_unicode():
+    """Un texto con tildes compuestas o precompuestas comparte la clave"""
+    assert make_cache_key("canci\u00f3n", "vader", "v1", {}) == make_cache_key("cancio\u0301n", "vader", "v1", {})
+
+def test_result_cache_ttl_and_lru():
+    """Las entradas expiran con el TTL y la más antigua sale al superar el tamaño"""
+    cache = ResultCache(max_size=2, ttl_seconds=60)
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": 2})
+    assert cache.get("a") == {"value": 1}
+    cache.set("c", {"value": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("a") is None
+
+def test_result_cache_shared_between_workers():
+    """Con db_path, los workers de serve.py comparten resultados a través de SQLite, también tras reconnect()"""
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "cache.db")
+        first, second = ResultCache(db_path=db_path), ResultCache(db_path=db_path)
+        first.set("clave", {"is_offensive": False, "emotion_score": 0.8})
+        first.flush()
+        assert second.get("clave") == {"is_offensive": False, "emotion_score": 0.8}
+        first.reconnect()
+        first.set("otra", {"is_offensive": True, "emotion_score": 0.1})
+        first.flush()
+        assert ResultCache(db_path=db_path).get("otra") == {"is_offensive": True, "emotion_score": 0.1}
+        second.clear()
+        assert ResultCache(db_path=db_path).get("clave") is None
+
+def test_result_cache_prunes_sqlite_rows():
+    """El archivo SQLite no crece sin límite: se eliminan las filas expiradas y las que superan db_max_rows"""
+    import sqlite3
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "cache.db")
+        cache = ResultCache(ttl_seconds=60, db_path=db_path, db_max_rows=3, flush_seconds=0.01)
+        for index in range(5):
+            cache.set(f"clave-{index}", {"value": index})
+            time.sleep(0.002)
+        time.sleep(0.2)
+        with sqlite3.connect(db_path) as db:
+            keys = [row[0] for row in db.execute("SELECT key FROM results ORDER BY created")]
+        assert keys == ["clave-2", "clave-3", "clave-4"], keys
+        cache.ttl_seconds = 0
+        cache.set("nueva", {"value": 5})
+        time.sleep(0.01)
+        cache.flush()
+        with sqlite3.connect(db_path) as db:
+            assert db.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+
+# --- ensemble.py ---
+
+def _result(method: str, score: float, label: str, confidence: float = 0.5, **extra):
+    return {"method": method, "score": score, "label": label, "confidence": confidence, **extra}
+
+def test_escalation_reasons():
+    """Sin señal, desacuerdo entre VADER y TextBlob o cercanía a un umbral escalan a transformers; el resto no"""
+    cases = [
+        ([_result("vader", 0.0, "Neutral"), _result("textblob", 0.02, "Neutral")], "no_signal"),
+        ([_result("vader", -0.7, "Muy Negativo"), _result("textblob", -0.3, "Negativo")], "disagreement"),
+        ([_result("vader", -0.45, "Negativo"), _result("textblob", -0.3, "Negativo")], "near_threshold"),
+        ([_result("vader", -0.3, "Negativo"), _result("textblob", -0.3, "Negativo")], None),
+        ([_result("vader", 0.8, "Muy Positivo"), _result("textblob", 0.8, "Muy Positivo")], None),
+    ]
+    for results, expected in cases:
+        assert escalation_reason(results) == expected, (results, expected)
+
+def test_fuse_results_ignores_cheap_methods_without_signal():
+    """Sin señal, el 0.0 de VADER y TextBlob no arrastra hacia neutral el score de transformers"""
+    results = [
+        _result("vader", 0.0, "Neutral", 0.0),
+        _result("textblob", 0.0, "Neutral", 0.5),
+        _result("transformers", 0.2, "Muy Negativo", 0.9, fallback=True),
+    ]
+    fused = fuse_results(results, "no_signal")
+    assert abs(fused["score"] - 0.2) < 1e-9 and fused["label"] == "Muy Negativo"
+    assert abs(fused["confidence"] - 0.9) < 1e-9
+    assert fused["escalated"] and fused["fallback"]
+    assert fused["components"] == {"vader": 0.0, "textblob": 0.0, "transformers": 0.2}
+    # Con otro motivo votan los tres métodos (0.6 * 0.2 + 0.2 * 0.5 + 0.2 * 0.5)
+    assert abs(fuse_results(results, "disagreement")["score"] - 0.32) < 1e-9
+    # Si solo hay métodos rápidos, votan ellos
+    assert fuse_results(results[:2], "no_signal")["score"] == 0.5
+
+# --- inference.py ---
+
+def test_aggregate_windows():
+    """Promedio ponderado por tokens de las ventanas, o la ventana más negativa con la agregación min"""
+    import torch
+    from inference import aggregate_windows
+
+    probabilities = torch.tensor([[0.0, 0.0, 0.0, 0.0, 1.0], [1.0, 0.0, 0.0, 0.0, 0.0]])
+    assert torch.equal(aggregate_windows(probabilities[:1], [10], "weighted"), probabilities[0])
+    weighted = aggregate_windows(probabilities, [300, 100], "weighted")
+    assert torch.allclose(weighted, torch.tensor([0.25, 0.0, 0.0, 0.0, 0.75]))
+    assert torch.equal(aggregate_windows(probabilities, [300, 100], "min"), probabilities[1])
+
+def test_micro_batcher_skips_cancelled_requests():
+    """Una petición cancelada mientras espera no entra en el lote ni detiene el hilo"""
+    from inference import MicroBatcher
+
+    release, batches = threading.Event(), []
+
+    def process_batch(texts):
+        release.wait(1)
+        batches.append(list(texts))
+        return [{"text": text} for text in texts]
+
+    batcher = MicroBatcher(process_batch, max_batch_size=1, max_wait_ms=0)
+    first = batcher.submit("uno")
+    cancelled = batcher.submit("dos")
+    assert cancelled.cancel()
+    release.set()
+    assert first.result(1) == {"text": "uno"}
+    assert batcher.submit("tres").result(1) == {"text": "tres"}
+    assert batches == [["uno"], ["tres"]]
+
+def test_micro_batcher_survives_failed_batch():
+    """Un error del modelo llega a todas las peticiones del lote y el siguiente lote se procesa"""
+    from inference import MicroBatcher
+
+    def process_batch(texts):
+        if "falla" in texts:
+            raise ValueError("modelo caído")
+        return [{"text": text} for text in texts]
+
+    batcher = MicroBatcher(process_batch, max_batch_size=4, max_wait_ms=0)
+    failed = batcher.submit("falla")
+    try:
+        failed.result(1)
+        assert False, "se esperaba el error del lote"
+    except ValueError as e:
+        assert str(e) == "modelo caído"
+    assert batcher.submit("bien").result(1) == {"text": "bien"}
+
+# --- lexicon.py ---
+
+def _write_json(path: str, content) -> None:
+    with open(path, "w", encoding="utf-8") as outfile:
+        json.dump(content, outfile)
+    # Marca de tiempo distinta aunque el sistema de archivos tenga poca resolución
+    stamp = time.time_ns() + 10 ** 9
+    os.utime(path, ns=(stamp, stamp))
+
+def test_lexicon_validation():
+    """Secciones desconocidas, umbrales desordenados o incompletos y reemplazos no válidos se rechazan"""
+    invalid = [
+        {"profanity": {}},
+        {"emotion_thresholds": {"vader": {"very_negative": 0.1, "negative": -0.1, "neutral": 0.2, "positive": 0.5}}},
+        {"emotion_thresholds": {"vader": {"negative": -0.1}}},
+        {"profanity_replacements": {"pendejo": 3}},
+        {"suggestion_templates": {"negative_emotion": []}},
+    ]
+    for data in invalid:
+        try:
+            build_lexicon(data)
+            raise AssertionError(f"léxico aceptado: {data}")
+        except ValueError:
+            pass
+    default = build_lexicon({})
+    custom = build_lexicon({"profanity_replacements": {" Pendejo ": "persona"}})
+    assert custom.replacements == {"pendejo": "persona"} and custom.version != default.version
+    assert custom.thresholds == default.thresholds
+
+def test_lexicon_store_reload():
+    """El archivo se relee solo cuando cambia; un archivo inválido no sustituye la versión vigente"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "lexicon.json")
+        store = LexiconStore(path)
+        assert store.current.source == "config" and not store.changed()
+
+        _write_json(path, {"profanity_replacements": {"mierda": "caramba"}})
+        assert store.changed()
+        store.swap(store.load())
+        assert store.current.replacements == {"mierda": "caramba"} and not store.changed()
+
+        previous = store.current
+        with open(path, "w", encoding="utf-8") as outfile:
+            outfile.write("{no es json")
+        try:
+            store.swap(store.load())
+            raise AssertionError("JSON inválido aceptado")
+        except ValueError:
+            pass
+        assert store.current is previous and not store.changed()
+
+# --- main.py ---
+
+class _FixedDetector:
+    """Detector de idioma sustituto con un resultado fijo"""
+
+    def __init__(self, language: str, confidence: float):
+        self.language, self.confidence = language, confidence
+
+    def detect(self, text: str):
+        return self.language, self.confidence
+
+def test_route_text_reasons():
+    """El idioma de la petición manda sobre el detector; textos cortos, detecciones dudosas o sin ruta van al método por defecto"""
+    import main
+    from config import LANGUAGE_ROUTE_DEFAULT, LANGUAGE_ROUTES
+    from langid import LanguageIdentifier
+
+    # El detector real toma "Te odio" por italiano y "jajaja que risa me das wey" por portugués
+    cases = [
+        ("Te odio", "es-MX", _FixedDetector("it", 0.99), "es", "request", LANGUAGE_ROUTES["es"], "language_route"),
+        ("Te odio", None, _FixedDetector("it", 0.99), None, "too_short", LANGUAGE_ROUTE_DEFAULT, "too_short"),
+        ("jajaja que risa me das wey", None, _FixedDetector("pt", 0.6), "pt", "detected", LANGUAGE_ROUTE_DEFAULT, "low_confidence"),
+        ("jajaja que risa me das wey", "auto", _FixedDetector("pt", 0.99), "pt", "detected", LANGUAGE_ROUTE_DEFAULT, "no_route"),
+        ("This product is amazing, I love it", None, _FixedDetector("en", 0.99), "en", "detected", LANGUAGE_ROUTES["en"], "language_route"),
+    ]
+    try:
+        for text, language, detector, detected, source, method, reason in cases:
+            main.model_registry.replace({"langid": detector})
+            route = main.route_text(text, language)
+            assert (route["language"], route["source"], route["method"], route["reason"]) == (detected, source, method, reason), route
+    finally:
+        main.model_registry.replace({"langid": LanguageIdentifier()})
+
+# --- models.py ---
+
+def test_registry_retries_failed_loads_after_backoff():
+    """Un fallo de carga se recuerda durante retry_seconds y después se vuelve a intentar"""
+    calls = []
+
+    def flaky_loader():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise OSError("archivo no encontrado")
+        return "modelo"
+
+    registry = ModelRegistry(retry_seconds=60)
+    registry.register("flaky", flaky_loader)
+    for _ in range(2):
+        try:
+            registry.get("flaky")
+            raise AssertionError("la carga debía fallar")
+        except RuntimeError:
+            pass
+    assert len(calls) == 1 and registry.status()["flaky"]["status"] == "failed"
+    registry.retry_seconds = 0
+    assert registry.get("flaky") == "modelo" and len(calls) == 2
+    assert registry.wait("flaky", timeout=0.1)
+
+# --- neardup.py ---
+
+CAMPAIGN = "@juan eres un inútil y todos en el equipo lo sabemos, vete ya"
+
+def test_near_duplicate_distance_and_content():
+    """Las variantes de una campaña se encuentran; su emoción solo se reutiliza si las palabras coinciden tal cual"""
+    index = NearDuplicateIndex(max_distance=3)
+    fingerprint = index.fingerprint(CAMPAIGN)
+    index.add(fingerprint, "vader@1", {"score": -0.6}, CAMPAIGN, content=content_key(CAMPAIGN))
+
+    same = "@pedro eres un inútil y todos en el equipo lo sabemos, vete ya!!! 😡 https://t.co/x"
+    match = index.find(index.fingerprint(same), "vader@1", content_key(same))
+    assert match is not None and match.distance == 0 and match.same_content
+
+    # Mismas palabras para la huella, pero las mayúsculas cambian el veredicto de VADER
+    shouting = "@maria ERES UN INÚTIL y todos en el equipo lo sabemos, vete ya"
+    match = index.find(index.fingerprint(shouting), "vader@1", content_key(shouting))
+    assert match is not None and not match.same_content
+
+    assert index.find(fingerprint, "transformers@1") is None
+    other = index.fingerprint("Me encanta este producto, lo recomiendo a todos mis amigos")
+    assert bin(fingerprint ^ other).count("1") > index.max_distance
+    assert index.find(other, "vader@1") is None
+    assert index.fingerprint("ok gracias") is None
+
+def test_near_duplicate_eviction():
+    """El índice descarta primero las huellas más antiguas al superar max_entries o ttl_seconds"""
+    index = NearDuplicateIndex(max_distance=3, max_entries=2, ttl_seconds=60)
+    texts = [
+        "el envío llegó tarde y la caja venía rota",
+        "me encanta este producto y lo recomiendo a todos",
+        "la atención al cliente resolvió mi problema enseguida",
+    ]
+    fingerprints = [index.fingerprint(text) for text in texts]
+    for fingerprint, text in zip(fingerprints, texts):
+        index.add(fingerprint, "vader@1", {"score": 0.0}, text)
+    assert index.stats()["entries"] == 2
+    assert index.find(fingerprints[0], "vader@1") is None
+    assert index.find(fingerprints[2], "vader@1").distance == 0
+    index.ttl_seconds = 0
+    time.sleep(0.01)
+    assert index.find(fingerprints[2], "vader@1") is None and index.stats()["entries"] == 0
+
+# --- profanity.py ---
+
+def test_matcher_whole_words():
+    """El autómata solo acepta palabras completas y conserva las posiciones del texto original"""
+    matcher = ProfanityMatcher(PROFANITY_WORDS)
+    assert matcher.find("Qué ridículo eres") == [
+        {"word": "ridículo", "similarity": 1.0, "text": "ridículo", "start": 4, "end": 12}
+    ]
+    assert [match["text"] for match in matcher.find("Eres un HIJO DE PUTA, culo")] == ["HIJO DE PUTA", "culo"]
+    assert matcher.find("El culote y la mierdita") == []
+
+def test_fuzzy_detects_obfuscations():
+    """Leetspeak, deletreos, letras alargadas, plurales y erratas de una letra"""
+    index = FuzzyProfanityIndex(PROFANITY_WORDS)
+    for token in ["m13rd4", "m.i.e.r.d.a", "culooo", "culos", "pendejos", "mierrda", "pendejjo"]:
+        found = index.lookup(token)
+        assert found is not None, token
+    assert [match["text"] for match in index.find("Eres una m i e r d a y lo sabes")] == ["m i e r d a"]
+
+def test_fuzzy_precision():
+    """Las flexiones y palabras cercanas a entradas del léxico no son groserías"""
+    index = FuzzyProfanityIndex(PROFANITY_WORDS)
+    clean = "Qué situación tan ridícula: la batería se cargará en el palomar, mi pendiente es el pollo"
+    assert index.find(clean) == []
+    matcher = ProfanityMatcher(PROFANITY_WORDS)
+    assert merge_matches(matcher.find(clean), index.find(clean)) == []
+
+# --- responses.py ---
+
+def test_fast_json_matches_json():
+    """orjson (o json si no está instalado) produce el mismo contenido, con fragmentos precalculados"""
+    import json
+
+    info = precompile_fragments({"vader": {"name": "VADER", "advantages": ["Rápido"]}})
+    content = {"texto": "canción ñandú 😀", "score": 0.25, "info": info["vader"]}
+    expected = {"texto": "canción ñandú 😀", "score": 0.25, "info": {"name": "VADER", "advantages": ["Rápido"]}}
+    assert json.loads(dumps(content)) == expected
+    line = dumps_line({"index": 3, "valid": True})
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert json.loads(line) == {"index": 3, "valid": True}
+
+# --- streaming.py ---
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def _lines(data: bytes, chunk_size: int, max_line_bytes: int):
+    async def collect():
+        return [line async for line in iter_ndjson_lines(_chunks(data, chunk_size), max_line_bytes)]
+    return asyncio.run(collect())
+
+def test_ndjson_lines_split_across_chunks():
+    """Las líneas se reconstruyen aunque lleguen partidas; las vacías se ignoran y la última no necesita salto"""
+    data = b'"uno"\n\n{"text": "dos", "id": 7}\n"tres"'
+    for chunk_size in (1, 3, len(data)):
+        assert _lines(data, chunk_size, 100) == [b'"uno"', b'{"text": "dos", "id": 7}', b'"tres"']
+
+def test_ndjson_long_lines_reported_once():
+    """Una línea demasiado larga se reporta una sola vez, llegue entera en un fragmento o repartida en varios"""
+    data = b'"corta"\n"' + b"x" * 50 + b'"\n"siguiente"\n'
+    for chunk_size in (4, 16, len(data)):
+        assert _lines(data, chunk_size, 20) == [b'"corta"', None, b'"siguiente"'], chunk_size
+
+def test_ndjson_batches_number_items():
+    """Los lotes numeran las líneas en orden e incluyen los errores de cada línea"""
+    data = b'"uno"\n[1, 2]\nno es json\n"' + b"x" * 50 + b'"\n"cinco"\n'
+
+    async def collect():
+        return [batch async for batch in iter_ndjson_batches(_chunks(data, 8), 2, 20)]
+    batches = asyncio.run(collect())
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    items = [item for batch in batches for item in batch]
+    assert [item["index"] for item in items] == [0, 1, 2, 3, 4]
+    assert items[0] == {"text": "uno", "index": 0} and items[4]["text"] == "cinco"
+    assert all("error" in item for item in items[1:4])
+
+# --- student.py ---
+
+def test_student_model_round_trip():
+    """Guardar y cargar conserva las predicciones; la versión es el hash de los pesos y cambia con ellos"""
+    from benchmarks.stubs import stub_student_model
+    from student import StudentModel
+
+    texts = ["Me encanta este producto", "Qué servicio tan horrible", ""]
+    model = stub_student_model()
+    assert model.version == "stub"
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "student.npz")
+        model.save(path)
+        assert model.version != "stub" and len(model.version) == 12
+        loaded = StudentModel.load(path)
+        assert loaded.version == model.version and loaded.labels == model.labels
+        for expected, actual in zip(model.predict(texts), loaded.predict(texts)):
+            assert np.allclose(expected, actual)
+        scores, confidences = loaded.predict(texts)
+        assert ((scores >= 0.2) & (scores <= 1.0)).all() and ((confidences > 0) & (confidences <= 1)).all()
+
+        model.weights[0, 0] += 1.0
+        model.save(path)
+        assert StudentModel.load(path).version not in ("stub", loaded.version)
+
+# --- utils.py ---
+
+def test_offensive_flags_and_confidences():
+    """Un 0.0 de VADER es neutral (0.5 normalizado), no negativo; cada texto usa la escala de su método.
+    La confianza del lote coincide con calculate_confidence y queda en [0, 1]"""
+    scores = [0.0, 0.3, -0.5, 0.9]
+    methods = ["vader", "transformers", "textblob", "student"]
+    assert offensive_flags(scores, [0, 0, 0, 1], methods).tolist() == [False, True, True, True]
+    assert offensive_flags([0.0, -0.9], [0, 0], "vader").tolist() == [False, True]
+    assert [normalize_score(score, method) < 0.4 for score, method in zip(scores, methods)] == [False, True, True, False]
+    emotion_confidences, counts = [0.9, 0.1, 1.4, 0.5], [0, 2, 1, 5]
+    expected = [calculate_confidence(value, count) for value, count in zip(emotion_confidences, counts)]
+    assert np.allclose(calculate_confidences(emotion_confidences, counts), expected)
+    assert expected[1] == 0.0 and expected[2] == 1.0
+
+def run_all_tests():
+    """Ejecuta todas las pruebas del módulo y devuelve el número de fallos"""
+    tests = [(name, test) for name, test in globals().items() if name.startswith("test_") and callable(test)]
+    failures = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except Exception as e:
+            failures += 1
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+    print(f"\n📊 {len(tests) - failures}/{len(tests)} pruebas correctas")
+    return failures
+
+if __name__ == "__main__":
+    raise SystemExit(1 if run_all_tests() else 0)
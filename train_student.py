@@ -0,0 +1,281 @@
+"""
+Entrena el modelo alumno (student.py) destilando las predicciones de BERT sobre un corpus sin etiquetar
+
+1. Lee el corpus (.txt con un texto por línea, o CSV/JSONL/Parquet con --text-column)
+   y se queda con los textos en español según el identificador de idioma.
+2. Etiqueta cada texto con el pipeline de transformers configurado: la
+   distribución completa de 1 a 5 estrellas, no solo la clase (se guarda en
+   --labels para reentrenar sin volver a pasar por BERT).
+3. Ajusta un clasificador lineal sobre n-gramas con hashing con Adagrad y
+   entropía cruzada contra esas distribuciones.
+4. Mide el acuerdo con BERT en los textos reservados, calibra los umbrales de
+   emoción del alumno y la velocidad de inferencia, y guarda el modelo.
+
+Uso:
+    python train_student.py comentarios.txt --labels etiquetas_bert.npz
+    python train_student.py comentarios.csv --text-column texto --epochs 12 --report student_report.json
+    curl -X POST http://localhost:8000/admin/student/reload -H "X-Admin-Token: $ADMIN_TOKEN"  # Cargar el modelo nuevo sin reiniciar
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from config import (
+    STUDENT_MODEL_PATH, STUDENT_HASH_BUCKETS, STUDENT_EPOCHS, STUDENT_LEARNING_RATE, STUDENT_L2,
+    STUDENT_BATCH_SIZE, STUDENT_TEACHER_BATCH_SIZE, LANGUAGE_MIN_CONFIDENCE
+)
+from lexicon import THRESHOLD_ORDER
+from student import HashedNgramFeaturizer, StudentModel, linear_logits, softmax
+from utils import EMOTION_LABELS
+
+def read_corpus(path: str, text_column: str, limit: Optional[int] = None) -> List[str]:
+    """Textos del corpus sin vacíos ni duplicados, en el orden del archivo"""
+    from bulk import read_chunks
+    from preprocessing import preprocess
+
+    if path.lower().endswith(".txt"):
+        with open(path, encoding="utf-8") as infile:
+            chunks = iter([([line.rstrip("\n") for line in infile], [])])
+    else:
+        chunks = read_chunks(path, text_column, None, 10000)
+
+    texts, seen = [], set()
+    for chunk, _ in chunks:
+        for text in chunk:
+            # El mismo texto normalizado que reciben los modelos en la API
+            normalized = preprocess.__wrapped__(text).normalized
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                texts.append(normalized)
+                if limit is not None and len(texts) >= limit:
+                    return texts
+    return texts
+
+def filter_language(texts: List[str], language: str) -> List[str]:
+    """Textos detectados en el idioma indicado con la confianza mínima del enrutado"""
+    from langid import LanguageIdentifier
+    identifier = LanguageIdentifier()
+    kept = []
+    for text in texts:
+        detected, confidence = identifier.detect(text)
+        if detected == language and confidence >= LANGUAGE_MIN_CONFIDENCE:
+            kept.append(text)
+    return kept
+
+def corpus_digest(texts: List[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+def label_with_teacher(texts: List[str], batch_size: int, stub_teacher: bool = False) -> Tuple[np.ndarray, List[str]]:
+    """Distribuciones de BERT (n textos x etiquetas) y los nombres de las etiquetas"""
+    from inference import run_pipeline_batch
+    if stub_teacher:
+        from benchmarks.stubs import StubSentimentPipeline
+        teacher = StubSentimentPipeline()
+    else:
+        import main
+        teacher = main.load_transformers_model()
+
+    labels = [teacher.model.config.id2label[index] for index in range(len(teacher.model.config.id2label))]
+    probabilities = np.empty((len(texts), len(labels)), dtype=np.float32)
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        results = run_pipeline_batch(teacher, texts[offset:offset + batch_size], return_probabilities=True)
+        probabilities[offset:offset + len(results)] = [result["probabilities"] for result in results]
+        done = offset + len(results)
+        if done % (batch_size * 50) < batch_size or done == len(texts):
+            print(f"Etiquetados {done}/{len(texts)} textos con BERT ({done / (time.perf_counter() - start):.1f} textos/s)")
+    return probabilities, labels
+
+def teacher_labels(texts: List[str], labels_path: Optional[str], batch_size: int,
+                   stub_teacher: bool = False) -> Tuple[np.ndarray, List[str]]:
+    """Reutiliza las etiquetas guardadas si corresponden exactamente a estos textos"""
+    digest = corpus_digest(texts)
+    if labels_path and os.path.exists(labels_path):
+        with np.load(labels_path, allow_pickle=False) as data:
+            if str(data["digest"]) == digest:
+                print(f"Etiquetas de BERT reutilizadas de {labels_path}")
+                return data["probabilities"], [str(label) for label in data["labels"]]
+        print(f"{labels_path} corresponde a otro corpus: se vuelve a etiquetar")
+    probabilities, labels = label_with_teacher(texts, batch_size, stub_teacher)
+    if labels_path:
+        with open(labels_path, "wb") as outfile:
+            np.savez_compressed(outfile, probabilities=probabilities, labels=np.array(labels), digest=np.array(digest))
+    return probabilities, labels
+
+def select_rows(ids: np.ndarray, offsets: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Submatriz CSR con las filas indicadas"""
+    lengths = np.diff(offsets)[rows]
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    positions = np.arange(new_offsets[-1]) - np.repeat(new_offsets[:-1] - offsets[rows], lengths)
+    return ids[positions], new_offsets
+
+def cross_entropy(probabilities: np.ndarray, targets: np.ndarray) -> float:
+    return float(-(targets * np.log(np.clip(probabilities, 1e-12, 1.0))).sum(axis=1).mean())
+
+def fit(ids: np.ndarray, offsets: np.ndarray, targets: np.ndarray, buckets: int, epochs: int, learning_rate: float,
+        l2: float, batch_size: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Regresión logística multinomial con objetivos blandos; Adagrad solo sobre las filas de cada mini-lote"""
+    rng = np.random.default_rng(seed)
+    classes = targets.shape[1]
+    weights = np.zeros((buckets, classes))
+    bias = np.log(targets.mean(axis=0) + 1e-6)  # Empezar en la distribución de clases de BERT
+    weights_accum = np.zeros_like(weights)
+    bias_accum = np.zeros_like(bias)
+    scale = 1.0 / np.sqrt(np.diff(offsets))
+
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        order = rng.permutation(len(targets))
+        for begin in range(0, len(order), batch_size):
+            rows = order[begin:begin + batch_size]
+            batch_ids, batch_offsets = select_rows(ids, offsets, rows)
+            delta = (softmax(linear_logits(weights, bias, batch_ids, batch_offsets)) - targets[rows]) / len(rows)
+
+            # Gradiente de cada columna presente en el lote (las demás no cambian)
+            owners = np.repeat(np.arange(len(rows)), np.diff(batch_offsets))
+            contributions = delta[owners] * scale[rows][owners, None]
+            columns, inverse = np.unique(batch_ids, return_inverse=True)
+            gradient = np.stack(
+                [np.bincount(inverse, weights=contributions[:, k], minlength=len(columns)) for k in range(classes)],
+                axis=1
+            ) + l2 * weights[columns]
+            weights_accum[columns] += gradient ** 2
+            weights[columns] -= learning_rate * gradient / (np.sqrt(weights_accum[columns]) + 1e-8)
+
+            bias_gradient = delta.sum(axis=0)
+            bias_accum += bias_gradient ** 2
+            bias -= learning_rate * bias_gradient / (np.sqrt(bias_accum) + 1e-8)
+
+        loss = cross_entropy(softmax(linear_logits(weights, bias, ids, offsets)), targets)
+        print(f"Época {epoch + 1}/{epochs}: entropía cruzada {loss:.4f} ({time.perf_counter() - start:.1f}s)")
+    return weights, bias
+
+def calibrate_thresholds(scores: np.ndarray, teacher_stars: np.ndarray) -> Dict[str, float]:
+    """Cortes del score del alumno que mejor separan las estrellas de BERT (1|2, 2|3, 3|4, 4|5)"""
+    candidates = np.linspace(0.2, 1.0, 161)
+    below = scores[None, :] <= candidates[:, None]
+    cuts = []
+    for stars in range(1, len(THRESHOLD_ORDER) + 1):
+        errors = (below != (teacher_stars <= stars)[None, :]).sum(axis=1)
+        cuts.append(float(candidates[errors.argmin()]))
+    # Los umbrales del léxico deben ser crecientes
+    return {name: round(value, 3) for name, value in zip(THRESHOLD_ORDER, np.maximum.accumulate(cuts))}
+
+def emotion_labels(scores: np.ndarray, thresholds: Dict[str, float]) -> np.ndarray:
+    return EMOTION_LABELS[np.searchsorted([thresholds[name] for name in THRESHOLD_ORDER], scores, side="left")]
+
+def measure_throughput(model: StudentModel, texts: List[str], batch_size: int = 1024, min_seconds: float = 1.0) -> float:
+    """Textos por segundo en un solo hilo, en lotes de batch_size (sin el caché de palabras del entrenamiento)"""
+    model.featurizer._word_cache.clear()
+    done, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        for offset in range(0, len(texts), batch_size):
+            model.predict(texts[offset:offset + batch_size])
+        done += len(texts)
+    return done / (time.perf_counter() - start)
+
+def evaluate(model: StudentModel, texts: List[str], teacher: np.ndarray) -> Dict[str, Any]:
+    """Acuerdo del alumno con BERT en textos que no vio al entrenar"""
+    from config import EMOTION_THRESHOLDS
+    probabilities = model.predict_proba(texts)
+    scores = probabilities @ model.star_values
+    teacher_stars = teacher.argmax(axis=1) + 1
+    student_stars = probabilities.argmax(axis=1) + 1
+    thresholds = calibrate_thresholds(scores, teacher_stars)
+    teacher_emotions = emotion_labels(teacher_stars / 5.0, EMOTION_THRESHOLDS["transformers"])
+    return {
+        "texts": len(texts),
+        "star_agreement": float((student_stars == teacher_stars).mean()),
+        "star_within_one": float((np.abs(student_stars - teacher_stars) <= 1).mean()),
+        "score_mae": float(np.abs(scores - teacher_stars / 5.0).mean()),
+        "cross_entropy": cross_entropy(probabilities, teacher),
+        "emotion_agreement": float((emotion_labels(scores, thresholds) == teacher_emotions).mean()),
+        "emotion_agreement_default_thresholds": float(
+            (emotion_labels(scores, EMOTION_THRESHOLDS["student"]) == teacher_emotions).mean()
+        ),
+        "thresholds": thresholds,
+        "throughput_texts_per_second": measure_throughput(model, texts),
+    }
+
+def train(corpus: str, output: str, text_column: str = "text", language: Optional[str] = "es",
+          labels_path: Optional[str] = None, limit: Optional[int] = None, buckets: int = STUDENT_HASH_BUCKETS,
+          epochs: int = STUDENT_EPOCHS, learning_rate: float = STUDENT_LEARNING_RATE, l2: float = STUDENT_L2,
+          batch_size: int = STUDENT_BATCH_SIZE, teacher_batch_size: int = STUDENT_TEACHER_BATCH_SIZE,
+          validation_fraction: float = 0.1, seed: int = 0, stub_teacher: bool = False) -> Dict[str, Any]:
+    texts = read_corpus(corpus, text_column, limit)
+    print(f"{len(texts)} textos distintos en {corpus}")
+    if language:
+        texts = filter_language(texts, language)
+        print(f"{len(texts)} textos detectados en '{language}'")
+    if len(texts) < 20:
+        raise ValueError("El corpus es demasiado pequeño para entrenar y evaluar el modelo alumno")
+
+    teacher, labels = teacher_labels(texts, labels_path, teacher_batch_size, stub_teacher)
+
+    order = np.random.default_rng(seed).permutation(len(texts))
+    validation_size = max(1, int(len(texts) * validation_fraction))
+    validation_rows, train_rows = order[:validation_size], order[validation_size:]
+
+    featurizer = HashedNgramFeaturizer(buckets)
+    ids, offsets = featurizer.transform([texts[row] for row in train_rows])
+    print(f"Entrenando con {len(train_rows)} textos ({len(ids) / len(train_rows):.0f} características por texto)")
+    weights, bias = fit(ids, offsets, teacher[train_rows], buckets, epochs, learning_rate, l2, batch_size, seed)
+
+    model = StudentModel(weights, bias, labels, featurizer, {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": os.path.basename(corpus),
+        "language": language,
+        "train_texts": int(len(train_rows)),
+    })
+    metrics = evaluate(model, [texts[row] for row in validation_rows], teacher[validation_rows])
+    model.metadata["validation"] = metrics
+    model.save(output)
+    return {"model": output, "version": model.version, **model.metadata}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Destila BERT en el modelo alumno de n-gramas para español")
+    parser.add_argument("corpus", help="Textos sin etiquetar: .txt (uno por línea), .csv, .jsonl o .parquet")
+    parser.add_argument("--output", default=STUDENT_MODEL_PATH)
+    parser.add_argument("--text-column", default="text", help="Columna con el texto (CSV, JSONL o Parquet)")
+    parser.add_argument("--language", default="es", help="Idioma de los textos que se conservan ('' para no filtrar)")
+    parser.add_argument("--labels", help="Archivo .npz donde guardar (o reutilizar) las etiquetas de BERT")
+    parser.add_argument("--limit", type=int, help="Máximo de textos leídos del corpus")
+    parser.add_argument("--buckets", type=int, default=STUDENT_HASH_BUCKETS)
+    parser.add_argument("--epochs", type=int, default=STUDENT_EPOCHS)
+    parser.add_argument("--learning-rate", type=float, default=STUDENT_LEARNING_RATE)
+    parser.add_argument("--l2", type=float, default=STUDENT_L2)
+    parser.add_argument("--batch-size", type=int, default=STUDENT_BATCH_SIZE)
+    parser.add_argument("--teacher-batch-size", type=int, default=STUDENT_TEACHER_BATCH_SIZE)
+    parser.add_argument("--validation-fraction", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stub-teacher", action="store_true",
+                        help="Etiquetar con el modelo sustituto de benchmarks/stubs.py (solo para probar el proceso)")
+    parser.add_argument("--report", help="Archivo JSON donde guardar las métricas")
+    args = parser.parse_args()
+
+    report = train(
+        args.corpus, args.output, args.text_column, args.language or None, args.labels, args.limit,
+        args.buckets, args.epochs, args.learning_rate, args.l2, args.batch_size, args.teacher_batch_size,
+        args.validation_fraction, args.seed, args.stub_teacher
+    )
+    validation = report["validation"]
+    print(f"Modelo guardado en {report['model']} (versión {report['version']})")
+    print(f"Acuerdo con BERT: {validation['star_agreement']:.1%} en estrellas, "
+          f"{validation['star_within_one']:.1%} a una estrella, {validation['emotion_agreement']:.1%} en la emoción")
+    print(f"Velocidad: {validation['throughput_texts_per_second']:.0f} textos/s en un núcleo")
+    print("Umbrales calibrados para el léxico:")
+    print(json.dumps({"emotion_thresholds": {"student": validation["thresholds"]}}, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as outfile:
+            json.dump(report, outfile, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
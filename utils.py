@@ -2,9 +2,12 @@
 Utilidades para el procesamiento y validación de textos
 """
 
+import json
 import re
-from typing import List, Dict, Any
-from config import PROFANITY_REPLACEMENTS, SUGGESTION_TEMPLATES, EMOTION_THRESHOLDS, SENTIMENT_ANALYSIS_CONFIG
+import numpy as np
+from typing import List, Dict, Any, Optional, Sequence, Union
+from config import SENTIMENT_ANALYSIS_CONFIG
+from lexicon import current_lexicon, THRESHOLD_ORDER
 
 def clean_text(text: str) -> str:
     """Limpia y normaliza el texto"""
@@ -16,10 +19,11 @@ def clean_text(text: str) -> str:
 
 def get_emotion_label(score: float, method: str = "transformers") -> str:
     """Determina la etiqueta de emoción basada en el score y método"""
-    thresholds = EMOTION_THRESHOLDS.get(method, EMOTION_THRESHOLDS["transformers"])
+    all_thresholds = current_lexicon().thresholds
+    thresholds = all_thresholds.get(method, all_thresholds["transformers"])
     
-    if method == "transformers":
-        # Para transformers: score de 0 a 1
+    if method in ["transformers", "ensemble", "student"]:
+        # Para transformers, ensemble y student: score de 0 a 1
         if score <= thresholds["very_negative"]:
             return "Muy Negativo"
         elif score <= thresholds["negative"]:
@@ -47,7 +51,7 @@ def get_emotion_label(score: float, method: str = "transformers") -> str:
 
 def normalize_score(score: float, method: str = "transformers") -> float:
     """Normaliza el score a un rango de 0 a 1 para comparación"""
-    if method == "transformers":
+    if method in ["transformers", "ensemble", "student"]:
         # Ya está en rango 0-1
         return score
     elif method in ["textblob", "vader"]:
@@ -56,39 +60,74 @@ def normalize_score(score: float, method: str = "transformers") -> float:
     else:
         return 0.5
 
+EMOTION_LABELS = np.array(["Muy Negativo", "Negativo", "Neutral", "Positivo", "Muy Positivo"], dtype=object)
+
+def get_emotion_labels(scores: Sequence[float], method: str = "transformers") -> np.ndarray:
+    """Versión vectorizada de get_emotion_label para un lote de scores"""
+    scores = np.asarray(scores, dtype=float)
+    if method not in ["transformers", "ensemble", "student", "textblob", "vader"]:
+        return np.full(scores.shape, "Desconocido", dtype=object)
+    all_thresholds = current_lexicon().thresholds
+    thresholds = all_thresholds.get(method, all_thresholds["transformers"])
+    bounds = np.array([thresholds[name] for name in THRESHOLD_ORDER])
+    # side="left": un score igual al umbral queda en la etiqueta inferior, como en get_emotion_label
+    return EMOTION_LABELS[np.searchsorted(bounds, scores, side="left")]
+
+def normalize_scores(scores: Sequence[float], method: Union[str, Sequence[str]] = "transformers") -> np.ndarray:
+    """Versión vectorizada de normalize_score, con un método para todo el lote o uno por score"""
+    scores = np.asarray(scores, dtype=float)
+    if not isinstance(method, str):
+        # Lotes enrutados por idioma: cada texto puede venir de un método distinto
+        methods = np.asarray(method, dtype=object)
+        return np.select(
+            [np.isin(methods, ["transformers", "ensemble", "student"]), np.isin(methods, ["textblob", "vader"])],
+            [scores, (scores + 1) / 2],
+            0.5
+        )
+    if method in ["transformers", "ensemble", "student"]:
+        return scores
+    elif method in ["textblob", "vader"]:
+        return (scores + 1) / 2
+    return np.full(scores.shape, 0.5)
+
+def offensive_flags(scores: Sequence[float], profanity_counts: Sequence[int],
+                    method: Union[str, Sequence[str]] = "transformers") -> np.ndarray:
+    """Textos ofensivos de un lote: emoción negativa (score normalizado < 0.4) o alguna grosería"""
+    return (normalize_scores(scores, method) < 0.4) | (np.asarray(profanity_counts) > 0)
+
+def calculate_confidences(emotion_confidences: Sequence[float], profanity_counts: Sequence[int]) -> np.ndarray:
+    """Versión vectorizada de calculate_confidence"""
+    penalties = np.minimum(0.3, np.asarray(profanity_counts, dtype=float) * 0.1)
+    return np.clip(np.asarray(emotion_confidences, dtype=float) - penalties, 0.0, 1.0)
+
 def generate_suggestions(text: str, emotion_score: float, profanity_count: int, method: str = "transformers") -> List[str]:
     """Genera sugerencias personalizadas para mejorar el texto"""
-    suggestions = []
-    
-    # Normalizar score para comparación
-    normalized_score = normalize_score(emotion_score, method)
-    
-    # Sugerencias basadas en emociones negativas
-    if normalized_score < 0.4:
-        suggestions.extend(SUGGESTION_TEMPLATES["negative_emotion"])
-    
-    # Sugerencias basadas en groserías
-    if profanity_count > 0:
-        suggestions.extend(SUGGESTION_TEMPLATES["profanity"])
-    
-    # Sugerencias basadas en longitud
-    if len(text) > 280:  # Límite de Twitter
-        suggestions.extend(SUGGESTION_TEMPLATES["length"])
-    
-    # Si no hay sugerencias específicas, dar feedback positivo
-    if not suggestions:
-        suggestions.extend(SUGGESTION_TEMPLATES["positive"])
-    
-    # Limitar a máximo 5 sugerencias
-    return suggestions[:5]
+    # Emoción negativa (score normalizado < 0.4), groserías y longitud mayor que el límite de Twitter
+    key = (normalize_score(emotion_score, method) < 0.4, profanity_count > 0, len(text) > 280)
+    return list(current_lexicon().suggestion_table[key])
 
-def correct_text(text: str, profanity_words: List[str]) -> str:
+def correct_text(text: str, profanity_words: List[str], profanity_matches: Optional[List[Dict[str, Any]]] = None) -> str:
     """Corrige el texto reemplazando groserías con alternativas apropiadas"""
+    replacements = current_lexicon().replacements
+    if profanity_matches is not None:
+        # Reconstruir el texto a partir de las posiciones detectadas, sin volver a recorrerlo
+        parts = []
+        position = 0
+        for match in profanity_matches:
+            replacement = replacements.get(match["word"])
+            if replacement is None:
+                continue
+            parts.append(text[position:match["start"]])
+            parts.append(replacement)
+            position = match["end"]
+        parts.append(text[position:])
+        return "".join(parts)
+    
     corrected_text = text
     
     for profanity in profanity_words:
-        if profanity.lower() in PROFANITY_REPLACEMENTS:
-            replacement = PROFANITY_REPLACEMENTS[profanity.lower()]
+        if profanity.lower() in replacements:
+            replacement = replacements[profanity.lower()]
             corrected_text = re.sub(
                 re.escape(profanity), 
                 replacement, 
@@ -139,8 +178,22 @@ def get_method_info(method: str) -> Dict[str, Any]:
     """Obtiene información sobre el método de análisis de sentimientos"""
     return SENTIMENT_ANALYSIS_CONFIG.get(method, SENTIMENT_ANALYSIS_CONFIG["transformers"])
 
-def compare_methods() -> Dict[str, Any]:
-    """Compara los diferentes métodos de análisis de sentimientos"""
+def load_benchmark_report(path: str) -> Optional[Dict[str, Any]]:
+    """Lee el informe de benchmarks/bench_methods.py, o None si todavía no se generó"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+TRAFFIC_CLASSES = {
+    "realtime": "Análisis en tiempo real (menor latencia p95)",
+    "bulk": "Procesamiento masivo (mayor rendimiento por lotes)",
+    "accuracy": "Alta precisión (mayor acuerdo con el corpus etiquetado)"
+}
+
+def compare_methods(report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Compara los diferentes métodos de análisis de sentimientos, con las mediciones del benchmark si existen"""
     comparison = {}
     for method, info in SENTIMENT_ANALYSIS_CONFIG.items():
         comparison[method] = {
@@ -148,6 +201,14 @@ def compare_methods() -> Dict[str, Any]:
             "advantages": info["advantages"],
             "disadvantages": info["disadvantages"],
             "recommended_for": "Análisis general" if method == "transformers" else 
-                              "Análisis rápido" if method == "textblob" else "Análisis en tiempo real"
+                              "Análisis rápido" if method == "textblob" else
+                              "Análisis de alto volumen" if method == "ensemble" else
+                              "Análisis masivo en español" if method == "student" else "Análisis en tiempo real"
         }
+        measured = report["methods"].get(method) if report else None
+        if measured is not None:
+            comparison[method]["measured"] = measured
+            # Recomendación basada en las mediciones en lugar del texto fijo
+            classes = [TRAFFIC_CLASSES[traffic] for traffic, best in report["recommendations"].items() if best == method]
+            comparison[method]["recommended_for"] = ", ".join(classes) if classes else "Sin ventaja medida"
     return comparison 
\ No newline at end of file